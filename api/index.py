@@ -30,17 +30,65 @@ app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-pro
 app.config['SQLALCHEMY_DATABASE_URI'] = database_url
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Engine tuning profile (see src/utils/db_profiles.py)
+from src.utils.db_profiles import get_profile, register_pragmas, register_request_settings
+db_profile, profile = get_profile(os.getenv('DB_PROFILE'), database_url)
+app.config['DB_PROFILE'] = db_profile
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(profile['engine_options'])
+app.config['DB_REQUEST_SETTINGS'] = dict(profile['request_settings'])
+
+# JSON encoder and opt-in gzip (see src/utils/json_provider.py)
+from src.utils.json_provider import get_provider_class, register_compression
+json_provider, provider_class = get_provider_class(os.getenv('JSON_PROVIDER'))
+app.config['JSON_PROVIDER'] = json_provider
+app.json = provider_class(app)
+app.config['JSON_GZIP'] = os.getenv('JSON_GZIP', 'false').lower() == 'true'
+app.config['JSON_GZIP_MIN_BYTES'] = int(os.getenv('JSON_GZIP_MIN_BYTES', 1024))
+app.config['JSON_GZIP_LEVEL'] = int(os.getenv('JSON_GZIP_LEVEL', 6))
+register_compression(app)
+
+# Admission control (see src/utils/rate_limit.py)
+from src.utils.rate_limit import DEFAULT_LIMITS, rate_limiter, expensive_requests
+rate_limiter.configure(
+    {name: os.getenv(f'RATE_LIMIT_{name.upper()}', spec) for name, spec in DEFAULT_LIMITS.items()},
+    enabled=os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+)
+expensive_requests.configure(int(os.getenv('EXPENSIVE_CONCURRENCY', 4)))
+
+# Request metrics (see src/utils/metrics.py)
+from src.utils.metrics import init_metrics, register_query_hooks
+app.config['METRICS_HEADERS'] = os.getenv('METRICS_HEADERS', 'false').lower() == 'true'
+init_metrics(app)
+from src.utils.slow_queries import slow_query_log
+slow_query_ms = os.getenv('SLOW_QUERY_MS', '250')
+slow_query_log.configure(
+    None if slow_query_ms.lower() == 'off' else float(slow_query_ms),
+    int(os.getenv('SLOW_QUERY_LOG_SIZE', 100))
+)
+app.config['SLOW_QUERY_ENDPOINT'] = os.getenv('SLOW_QUERY_ENDPOINT', 'false').lower() == 'true'
+
 # Initialize CORS
 CORS(app)
 
 # Import and initialize database
-from src.models import db
+from src.models import db, ensure_schema, SchemaMismatchError
 db.init_app(app)
+with app.app_context():
+    register_pragmas(db.engine, profile['pragmas'])
+    register_query_hooks(db.engine)
+register_request_settings(db.session)
 
-# Create database tables (Safe for serverless)
+# Create database tables (Safe for serverless), skipped when the stored
+# schema version already matches the models
 with app.app_context():
     try:
-        db.create_all()
+        ensure_schema()
+        from src.services.search_index import search_index
+        search_index.install()
+        from src.services.archive_service import archived_ranges
+        archived_ranges.load()
+    except SchemaMismatchError:
+        raise
     except Exception as e:
         print(f"Database creation warning: {e}")
 
@@ -49,11 +97,13 @@ from src.api.students import students_bp
 from src.api.nfc import nfc_bp
 from src.api.attendance import attendance_bp
 from src.api.faculty import faculty_bp
+from src.api.metrics import metrics_bp
 
 app.register_blueprint(students_bp, url_prefix='/api/students')
 app.register_blueprint(nfc_bp, url_prefix='/api/nfc')
 app.register_blueprint(attendance_bp, url_prefix='/api/attendance')
 app.register_blueprint(faculty_bp, url_prefix='/api/faculty')
+app.register_blueprint(metrics_bp, url_prefix='/api/metrics')
 
 # Frontend routes
 @app.route('/')
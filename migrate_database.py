@@ -42,7 +42,8 @@ try:
         'section': 'VARCHAR(20)',
         'subject': 'VARCHAR(100)',
         'date': 'VARCHAR(20)',
-        'class_time': 'VARCHAR(20)'
+        'class_time': 'VARCHAR(20)',
+        'scan_uuid': 'VARCHAR(36)'
     }
     
     print(f"\n[CHECK] Checking for missing columns...")
@@ -71,7 +72,8 @@ try:
     indexes = [
         ('idx_attendance_section', 'section'),
         ('idx_attendance_subject', 'subject'),
-        ('idx_attendance_date', 'date')
+        ('idx_attendance_date', 'date'),
+        ('ix_attendance_student_timestamp', 'student_id, timestamp')
     ]
     
     for index_name, column_name in indexes:
@@ -81,6 +83,10 @@ try:
         except Exception as e:
             print(f"   [INFO] Index '{index_name}' already exists or error: {e}")
     
+    # Offline sync relies on scan_uuid being unique
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS ix_attendance_scan_uuid ON attendance(scan_uuid)")
+    print("   [SUCCESS] Unique index 'ix_attendance_scan_uuid' created")
+    
     conn.commit()
     
     # Verify the final schema
@@ -23,7 +23,7 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 CORS(app)
 
 # Import and initialize database
-from src.models import db, Student, Attendance
+from src.models import db, Student
 db.init_app(app)
 
 # Create database tables
@@ -122,6 +122,8 @@ def get_student(student_id):
 
 @app.route('/api/nfc/register', methods=['POST'])
 def register_nfc():
+    from src.services.nfc_service import NFCService
+    
     data = request.get_json()
     
     student_id = data.get('student_id')
@@ -130,18 +132,13 @@ def register_nfc():
     if not student_id or not nfc_tag_id:
         return {'error': 'student_id and nfc_tag_id are required'}, 400
     
-    student = Student.query.get(student_id)
-    if not student:
-        return {'error': 'Student not found'}, 404
-    
-    existing = Student.query.filter_by(nfc_tag_id=nfc_tag_id.strip()).first()
-    if existing and existing.id != student_id:
-        return {'error': f'NFC tag already registered to {existing.name}'}, 400
-    
-    student.nfc_tag_id = nfc_tag_id.strip()
-    db.session.commit()
+    # Invalidates the tag cache that /api/attendance/record resolves through
+    success, result = NFCService.register_tag(student_id, nfc_tag_id)
+    if not success:
+        status = 404 if result == 'Student not found' else 400
+        return {'error': result}, status
     
-    return {'message': 'NFC tag registered successfully', 'student': student.to_dict()}, 200
+    return {'message': 'NFC tag registered successfully', 'student': result.to_dict()}, 200
 
 @app.route('/api/nfc/student/<nfc_tag_id>', methods=['GET'])
 def get_student_by_tag(nfc_tag_id):
@@ -154,7 +151,8 @@ def get_student_by_tag(nfc_tag_id):
 
 @app.route('/api/attendance/record', methods=['POST'])
 def record_attendance():
-    from datetime import datetime, timedelta
+    from src.services.attendance_service import AttendanceService
+    from src.services.nfc_service import NFCService
     
     data = request.get_json()
     
@@ -162,8 +160,10 @@ def record_attendance():
     nfc_tag_id = data.get('nfc_tag_id')
     faculty_name = data.get('faculty_name', 'Unknown Faculty')
     
+    # Get student by NFC tag if provided
+    student = None
     if nfc_tag_id and not student_id:
-        student = Student.query.filter_by(nfc_tag_id=nfc_tag_id).first()
+        student = NFCService.resolve_tag(nfc_tag_id)
         if not student:
             return {'error': 'No student found with this NFC tag'}, 404
         student_id = student.id
@@ -171,38 +171,26 @@ def record_attendance():
     if not student_id:
         return {'error': 'student_id or nfc_tag_id is required'}, 400
     
-    student = Student.query.get(student_id)
-    if not student:
-        return {'error': 'Student not found'}, 404
-    
-    one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-    recent = Attendance.query.filter(
-        Attendance.student_id == student_id,
-        Attendance.timestamp >= one_hour_ago
-    ).first()
-    
-    if recent:
-        return {'error': f"Attendance already recorded for {student.name} at {recent.timestamp.strftime('%H:%M:%S')}"}, 400
-    
-    attendance = Attendance(
-        student_id=student_id,
-        recorded_by=faculty_name
+    # Same path as /api/attendance/record in src/api, so rollups, counters,
+    # table versions, the scan index and the live feed stay in step
+    success, result = AttendanceService.record_attendance(
+        student_id,
+        faculty_name,
+        student=student
     )
     
-    db.session.add(attendance)
-    db.session.commit()
+    if not success:
+        status = 404 if result == 'Student not found' else 400
+        return {'error': result}, status
     
-    return {'message': 'Attendance recorded successfully', 'attendance': attendance.to_dict()}, 201
+    return {'message': 'Attendance recorded successfully', 'attendance': result.to_dict()}, 201
 
 @app.route('/api/attendance/student/<int:student_id>', methods=['GET'])
 def get_student_attendance(student_id):
-    limit = request.args.get('limit', type=int)
-    query = Attendance.query.filter_by(student_id=student_id).order_by(Attendance.timestamp.desc())
-    
-    if limit:
-        query = query.limit(limit)
+    from src.services.attendance_service import AttendanceService
     
-    records = query.all()
+    limit = request.args.get('limit', type=int)
+    records = AttendanceService.get_attendance_by_student(student_id, limit)
     
     return {
         'count': len(records),
@@ -211,8 +199,10 @@ def get_student_attendance(student_id):
 
 @app.route('/api/attendance/recent', methods=['GET'])
 def get_recent_attendance():
+    from src.services.attendance_service import AttendanceService
+    
     limit = request.args.get('limit', 50, type=int)
-    records = Attendance.query.order_by(Attendance.timestamp.desc()).limit(limit).all()
+    records = AttendanceService.get_recent_attendance(limit)
     
     return {
         'count': len(records),
@@ -221,27 +211,9 @@ def get_recent_attendance():
 
 @app.route('/api/attendance/stats', methods=['GET'])
 def get_stats():
-    from datetime import datetime
+    from src.services.attendance_service import AttendanceService
     
-    total_students = Student.query.count()
-    total_records = Attendance.query.count()
-    
-    today = datetime.utcnow().date()
-    from datetime import datetime as dt
-    start_of_day = dt.combine(today, dt.min.time())
-    today_count = Attendance.query.filter(Attendance.timestamp >= start_of_day).count()
-    
-    today_students = db.session.query(Attendance.student_id).filter(
-        Attendance.timestamp >= start_of_day
-    ).distinct().count()
-    
-    return {
-        'total_students': total_students,
-        'total_attendance_records': total_records,
-        'today_attendance_count': today_count,
-        'today_unique_students': today_students,
-        'today_percentage': round((today_students / total_students * 100) if total_students > 0 else 0, 2)
-    }, 200
+    return AttendanceService.get_attendance_stats(), 200
 
 # Error handlers
 @app.errorhandler(404)
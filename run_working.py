@@ -30,6 +30,9 @@ db.init_app(app)
 with app.app_context():
     db.create_all()
     print("✅ Database tables created successfully")
+    
+    from src.services.search_index import search_index
+    search_index.install()
 
 # ========== FRONTEND ROUTES ==========
 
@@ -90,24 +93,16 @@ def students():
         section = request.args.get('section')
         has_nfc = request.args.get('has_nfc')
         
-        query = Student.query
-        
-        if search:
-            query = query.filter(db.or_(
-                Student.name.ilike(f'%{search}%'),
-                Student.register_number.ilike(f'%{search}%')
-            ))
-        
-        if section:
-            query = query.filter_by(section=section)
+        from src.services.student_service import StudentService
         
+        filters = {'section': section}
         if has_nfc:
-            if has_nfc.lower() == 'true':
-                query = query.filter(Student.nfc_tag_id.isnot(None))
-            else:
-                query = query.filter(Student.nfc_tag_id.is_(None))
+            filters['has_nfc'] = has_nfc.lower() == 'true'
         
-        students = query.order_by(Student.register_number).all()
+        if search:
+            students = StudentService.search_students(search, filters, limit=request.args.get('limit', type=int))
+        else:
+            students = StudentService.get_all_students(filters)
         
         return {
             'count': len(students),
@@ -121,10 +116,13 @@ def get_student(student_id):
         return {'error': 'Student not found'}, 404
     
     if request.method == 'DELETE':
-        # Delete student and all their attendance records (cascade)
-        db.session.delete(student)
-        db.session.commit()
-        return {'message': 'Student deleted successfully'}, 200
+        # Delete student and all their attendance records, keeping rollups,
+        # counters and caches consistent
+        from src.services.student_service import StudentService
+        success, message = StudentService.delete_student(student_id)
+        if not success:
+            return {'error': message}, 500
+        return {'message': message}, 200
     
     return {'student': student.to_dict()}, 200
 
@@ -187,66 +185,8 @@ def upload_students():
         if missing_columns:
             return {'error': f'Missing required columns: {", ".join(missing_columns)}'}, 400
         
-        success_count = 0
-        failed_count = 0
-        errors = []
-        
-        for index, row in enumerate(rows):
-            try:
-                # Get values with proper None handling
-                name = row.get('name')
-                register_num = row.get('register_number')
-                section = row.get('section')
-                department = row.get('department')
-                duration = row.get('duration')
-                
-                # Validate required fields
-                if not name or not register_num:
-                    errors.append({
-                        'row': index + 2,
-                        'register_number': str(register_num) if register_num else 'N/A',
-                        'error': 'Missing name or register number'
-                    })
-                    failed_count += 1
-                    continue
-                
-                # Convert to string and strip
-                register_num = str(register_num).strip()
-                
-                # Check if student already exists
-                existing = Student.query.filter_by(register_number=register_num).first()
-                if existing:
-                    errors.append({
-                        'row': index + 2,
-                        'register_number': register_num,
-                        'error': 'Student already exists'
-                    })
-                    failed_count += 1
-                    continue
-                
-                # Create student with exact fields from model
-                student = Student(
-                    name=str(name).strip(),
-                    register_number=register_num,
-                    section=str(section).strip() if section else '',
-                    department=str(department).strip() if department else '',
-                    duration=str(duration).strip() if duration else ''
-                )
-                
-                db.session.add(student)
-                success_count += 1
-                
-            except Exception as e:
-                errors.append({
-                    'row': index + 2,
-                    'register_number': str(row.get('register_number', 'N/A')),
-                    'error': str(e)
-                })
-                failed_count += 1
-        
-        # Commit all successful students
-        if success_count > 0:
-            db.session.commit()
+        from src.services.student_service import StudentService
+        success_count, failed_count, errors = StudentService.bulk_create_students(rows)
         
         return {
             'message': f'Upload complete: {success_count} students added, {failed_count} failed',
@@ -264,6 +204,8 @@ def upload_students():
 
 @app.route('/api/nfc/register', methods=['POST'])
 def register_nfc():
+    from src.services.nfc_service import NFCService
+    
     data = request.get_json()
     
     student_id = data.get('student_id')
@@ -272,19 +214,13 @@ def register_nfc():
     if not student_id or not nfc_tag_id:
         return {'error': 'student_id and nfc_tag_id are required'}, 400
     
-    student = Student.query.get(student_id)
-    if not student:
-        return {'error': 'Student not found'}, 404
-    
-    # Check if tag already registered to another student
-    existing = Student.query.filter_by(nfc_tag_id=nfc_tag_id.strip()).first()
-    if existing and existing.id != student_id:
-        return {'error': f'NFC tag already registered to {existing.name}'}, 400
+    # Invalidates the tag cache that /api/attendance/record resolves through
+    success, result = NFCService.register_tag(student_id, nfc_tag_id)
+    if not success:
+        status = 404 if result == 'Student not found' else 400
+        return {'error': result}, status
     
-    student.nfc_tag_id = nfc_tag_id.strip()
-    db.session.commit()
-    
-    return {'message': 'NFC tag registered successfully', 'student': student.to_dict()}, 200
+    return {'message': 'NFC tag registered successfully', 'student': result.to_dict()}, 200
 
 @app.route('/api/nfc/student/<nfc_tag_id>', methods=['GET'])
 def get_student_by_tag(nfc_tag_id):
@@ -477,7 +413,8 @@ def get_faculty_profile():
 
 @app.route('/api/attendance/record', methods=['POST'])
 def record_attendance():
-    from datetime import datetime, timedelta
+    from src.services.attendance_service import AttendanceService
+    from src.services.nfc_service import NFCService
     
     data = request.get_json()
     
@@ -490,8 +427,9 @@ def record_attendance():
     class_time = data.get('time')  # Class time slot
     
     # Get student by NFC tag if provided
+    student = None
     if nfc_tag_id and not student_id:
-        student = Student.query.filter_by(nfc_tag_id=nfc_tag_id).first()
+        student = NFCService.resolve_tag(nfc_tag_id)
         if not student:
             return {'error': 'No student found with this NFC tag'}, 404
         student_id = student.id
@@ -499,44 +437,30 @@ def record_attendance():
     if not student_id:
         return {'error': 'student_id or nfc_tag_id is required'}, 400
     
-    student = Student.query.get(student_id)
-    if not student:
-        return {'error': 'Student not found'}, 404
-    
-    # Check for duplicate within 1 hour
-    one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-    recent = Attendance.query.filter(
-        Attendance.student_id == student_id,
-        Attendance.timestamp >= one_hour_ago
-    ).first()
-    
-    if recent:
-        return {'error': f"Attendance already recorded for {student.name} at {recent.timestamp.strftime('%H:%M:%S')}"}, 400
-    
-    # Create attendance record
-    attendance = Attendance(
-        student_id=student_id,
-        recorded_by=faculty_name,
+    # Same path as /api/attendance/record in src/api, so rollups, counters,
+    # table versions, the scan index and the live feed stay in step
+    success, result = AttendanceService.record_attendance(
+        student_id,
+        faculty_name,
         section=section,
         subject=subject,
         date=date,
-        class_time=class_time
+        class_time=class_time,
+        student=student
     )
     
-    db.session.add(attendance)
-    db.session.commit()
+    if not success:
+        status = 404 if result == 'Student not found' else 400
+        return {'error': result}, status
     
-    return {'message': 'Attendance recorded successfully', 'attendance': attendance.to_dict()}, 201
+    return {'message': 'Attendance recorded successfully', 'attendance': result.to_dict()}, 201
 
 @app.route('/api/attendance/student/<int:student_id>', methods=['GET'])
 def get_student_attendance(student_id):
-    limit = request.args.get('limit', type=int)
-    query = Attendance.query.filter_by(student_id=student_id).order_by(Attendance.timestamp.desc())
+    from src.services.attendance_service import AttendanceService
     
-    if limit:
-        query = query.limit(limit)
-    
-    records = query.all()
+    limit = request.args.get('limit', type=int)
+    records = AttendanceService.get_attendance_by_student(student_id, limit)
     
     return {
         'count': len(records),
@@ -545,8 +469,10 @@ def get_student_attendance(student_id):
 
 @app.route('/api/attendance/recent', methods=['GET'])
 def get_recent_attendance():
+    from src.services.attendance_service import AttendanceService
+    
     limit = request.args.get('limit', 50, type=int)
-    records = Attendance.query.order_by(Attendance.timestamp.desc()).limit(limit).all()
+    records = AttendanceService.get_recent_attendance(limit)
     
     return {
         'count': len(records),
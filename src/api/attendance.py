@@ -2,15 +2,76 @@
 Attendance Management API
 REST endpoints for attendance operations
 """
-from flask import Blueprint, request, jsonify
+import csv
+import io
+import json
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from src.services.attendance_service import AttendanceService
+from src.services.attendance_queue import attendance_queue, QueueFullError
+from src.services.counter_service import CounterService
+from src.services.scan_feed import scan_feed, TooManySubscribersError
 from src.services.nfc_service import NFCService
+from src.services.version_service import STUDENTS, ATTENDANCE
+from src.utils.conditional import conditional_get
+from src.utils.db_profiles import without_request_settings
+from src.utils.pagination import InvalidCursorError
+from src.utils.rate_limit import rate_limited, concurrency_limited, rate_limiter, expensive_requests
 from datetime import datetime
 
 attendance_bp = Blueprint('attendance', __name__)
 
+# Upper bound on scans accepted by a single batch request
+MAX_BATCH_SCANS = 1000
+
+# Rows serialized per chunk of a streamed export
+EXPORT_CHUNK_ROWS = 500
+
+# Seconds a roster response may be reused while scans are still coming in
+ROSTER_MAX_AGE = 5
+
+# Seconds between keep-alive comments on an idle live feed
+STREAM_KEEPALIVE_SECONDS = 15
+
+
+def _sse(event, data, event_id=None):
+    """Format one Server-Sent Events message"""
+    message = f'event: {event}\n'
+    if event_id is not None:
+        message += f'id: {event_id}\n'
+    return message + f'data: {json.dumps(data)}\n\n'
+
+
+def _export_chunks(rows, export_format):
+    """Serialize export rows into CSV or NDJSON text chunks"""
+    columns = AttendanceService.EXPORT_COLUMNS
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    
+    if export_format == 'csv':
+        writer.writerow(columns)
+    
+    pending = 0
+    for row in rows:
+        row = [value.isoformat() if isinstance(value, datetime) else value for value in row]
+        if export_format == 'csv':
+            writer.writerow(row)
+        else:
+            buffer.write(json.dumps(dict(zip(columns, row))))
+            buffer.write('\n')
+        
+        pending += 1
+        if pending >= EXPORT_CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    
+    if buffer.tell():
+        yield buffer.getvalue()
+
 
 @attendance_bp.route('/record', methods=['POST'])
+@rate_limited('scan')
 def record_attendance():
     """Record attendance for a student"""
     try:
@@ -25,10 +86,13 @@ def record_attendance():
         faculty_name = data.get('faculty_name', 'Unknown Faculty')
         section = data.get('section')  # Section like S-01, S-02
         subject = data.get('subject')  # Subject name
+        date = data.get('date')  # Date of class
+        class_time = data.get('time')  # Class time slot
         
-        # If NFC tag provided, get student ID
+        # If NFC tag provided, get student ID (served from the tag cache)
+        student = None
         if nfc_tag_id and not student_id:
-            student = NFCService.get_student_by_tag(nfc_tag_id)
+            student = NFCService.resolve_tag(nfc_tag_id)
             if not student:
                 return jsonify({'error': 'No student found with this NFC tag'}), 404
             student_id = student.id
@@ -36,11 +100,39 @@ def record_attendance():
         if not student_id:
             return jsonify({'error': 'student_id or nfc_tag_id is required'}), 400
         
+        # Write-behind mode: acknowledge once validated and queued
+        if attendance_queue.enabled:
+            try:
+                success, result = AttendanceService.enqueue_attendance(
+                    student_id,
+                    faculty_name,
+                    section=section,
+                    subject=subject,
+                    date=date,
+                    class_time=class_time,
+                    student=student
+                )
+            except QueueFullError as e:
+                response = jsonify({'error': str(e)})
+                response.headers['Retry-After'] = '1'
+                return response, 503
+            
+            if success:
+                return jsonify({
+                    'message': 'Attendance accepted',
+                    'queued': True,
+                    'attendance': result
+                }), 202
+            return jsonify({'error': result}), 400
+        
         success, result = AttendanceService.record_attendance(
             student_id, 
             faculty_name, 
             section=section, 
-            subject=subject
+            subject=subject,
+            date=date,
+            class_time=class_time,
+            student=student
         )
         
         if success:
@@ -55,6 +147,156 @@ def record_attendance():
         return jsonify({'error': str(e)}), 500
 
 
+@attendance_bp.route('/record-batch', methods=['POST'])
+@rate_limited('scan')
+def record_attendance_batch():
+    """Record attendance for many scans in one request"""
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        scans = data.get('scans')
+        if not isinstance(scans, list) or not scans:
+            return jsonify({'error': 'scans must be a non-empty list'}), 400
+        
+        if len(scans) > MAX_BATCH_SCANS:
+            return jsonify({'error': f'A batch may contain at most {MAX_BATCH_SCANS} scans'}), 400
+        
+        results = AttendanceService.record_attendance_batch(
+            scans,
+            data.get('faculty_name', 'Unknown Faculty'),
+            section=data.get('section'),
+            subject=data.get('subject'),
+            date=data.get('date'),
+            class_time=data.get('time')
+        )
+        
+        success_count = sum(1 for r in results if r['success'])
+        
+        return jsonify({
+            'message': f'Batch processed: {success_count} recorded, {len(results) - success_count} failed',
+            'success_count': success_count,
+            'failed_count': len(results) - success_count,
+            'results': results
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@attendance_bp.route('/sync', methods=['POST'])
+@rate_limited('scan')
+def sync_scans():
+    """Ingest an offline scan journal; safe to retry"""
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        scans = data.get('scans')
+        if not isinstance(scans, list) or not scans:
+            return jsonify({'error': 'scans must be a non-empty list'}), 400
+        
+        if len(scans) > MAX_BATCH_SCANS:
+            return jsonify({'error': f'A sync may contain at most {MAX_BATCH_SCANS} scans'}), 400
+        
+        results = AttendanceService.sync_scans(
+            scans,
+            data.get('faculty_name', 'Unknown Faculty'),
+            section=data.get('section'),
+            subject=data.get('subject'),
+            date=data.get('date'),
+            class_time=data.get('time')
+        )
+        
+        counts = {'recorded': 0, 'duplicate': 0, 'rejected': 0}
+        for r in results:
+            counts[r['status']] += 1
+        
+        return jsonify({
+            'message': f"Sync completed: {counts['recorded']} recorded, {counts['duplicate']} already synced, {counts['rejected']} rejected",
+            'recorded_count': counts['recorded'],
+            'duplicate_count': counts['duplicate'],
+            'rejected_count': counts['rejected'],
+            'results': results
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@attendance_bp.route('/queue/stats', methods=['GET'])
+def queue_stats():
+    """Get write-behind queue depth, throughput and lag"""
+    try:
+        return jsonify(attendance_queue.stats()), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@attendance_bp.route('/limits/stats', methods=['GET'])
+def limits_stats():
+    """Get rate limiter and concurrency cap counters"""
+    try:
+        return jsonify({
+            'rate_limits': rate_limiter.stats(),
+            'expensive_requests': expensive_requests.stats()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@attendance_bp.route('/stream', methods=['GET'])
+def stream_attendance():
+    """Push each newly recorded scan to the client as a Server-Sent Event"""
+    try:
+        subscription = scan_feed.subscribe(
+            section=request.args.get('section'),
+            subject=request.args.get('subject')
+        )
+    except TooManySubscribersError:
+        response = jsonify({'error': 'Too many live feed clients, try again later'})
+        response.headers['Retry-After'] = str(STREAM_KEEPALIVE_SECONDS)
+        return response, 503
+    
+    def events():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                record = subscription.get(timeout=STREAM_KEEPALIVE_SECONDS)
+                dropped = subscription.take_dropped()
+                if dropped:
+                    yield _sse('dropped', {'count': dropped})
+                if record is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield _sse('scan', record, record.get('id'))
+        finally:
+            scan_feed.unsubscribe(subscription)
+    
+    # No stream_with_context: the generator never touches the database, so
+    # it must not pin a request context and session for the connection's life
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+@attendance_bp.route('/stream/stats', methods=['GET'])
+def stream_stats():
+    """Get live feed subscriber counts"""
+    try:
+        return jsonify(scan_feed.stats()), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @attendance_bp.route('/student/<int:student_id>', methods=['GET'])
 def get_student_attendance(student_id):
     """Get attendance history for a student"""
@@ -98,6 +340,21 @@ def get_attendance_by_date():
         else:
             date = None  # Defaults to today
         
+        # Keyset pagination when a cursor or limit is requested
+        if 'cursor' in request.args or 'limit' in request.args:
+            records, next_cursor = AttendanceService.get_attendance_by_date_page(
+                date,
+                request.args.get('cursor'),
+                request.args.get('limit', type=int)
+            )
+            
+            return jsonify({
+                'date': date.isoformat() if date else datetime.utcnow().date().isoformat(),
+                'count': len(records),
+                'attendance': [r.to_dict() for r in records],
+                'next_cursor': next_cursor
+            }), 200
+        
         records = AttendanceService.get_attendance_by_date(date)
         
         return jsonify({
@@ -106,6 +363,131 @@ def get_attendance_by_date():
             'attendance': [r.to_dict() for r in records]
         }), 200
         
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@attendance_bp.route('/roster', methods=['GET'])
+def get_section_roster():
+    """Get a section's students marked present or absent for one class"""
+    try:
+        section = request.args.get('section')
+        if not section:
+            return jsonify({'error': 'section is required'}), 400
+        
+        date_str = request.args.get('date')
+        date = datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else datetime.utcnow().date()
+        subject = request.args.get('subject')
+        class_time = request.args.get('class_time')
+        
+        roster = AttendanceService.get_section_roster(section, date, subject, class_time)
+        present = sum(1 for student in roster if student['present'])
+        
+        response = jsonify({
+            'section': section,
+            'date': date.isoformat(),
+            'subject': subject,
+            'class_time': class_time,
+            'total': len(roster),
+            'present': present,
+            'absent': len(roster) - present,
+            'students': roster
+        })
+        response.headers['Cache-Control'] = f'private, max-age={ROSTER_MAX_AGE}'
+        return response, 200
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@attendance_bp.route('/export', methods=['GET'])
+@concurrency_limited
+@without_request_settings
+def export_attendance():
+    """Stream attendance for a date range as CSV or NDJSON"""
+    try:
+        start = request.args.get('from')
+        end = request.args.get('to')
+        export_format = request.args.get('format', 'csv').lower()
+        
+        if export_format not in ('csv', 'ndjson'):
+            return jsonify({'error': 'format must be csv or ndjson'}), 400
+        
+        start = datetime.strptime(start, '%Y-%m-%d').date() if start else None
+        end = datetime.strptime(end, '%Y-%m-%d').date() if end else None
+        
+        rows = AttendanceService.iter_export_rows(
+            start, end,
+            section=request.args.get('section'),
+            subject=request.args.get('subject')
+        )
+        
+        filename = f"attendance_{start or 'all'}_{end or 'all'}.{'csv' if export_format == 'csv' else 'ndjson'}"
+        mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+        
+        return Response(
+            stream_with_context(_export_chunks(rows, export_format)),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@attendance_bp.route('/summary', methods=['GET'])
+def get_attendance_summary():
+    """Get attendance percentages for a student or a class section"""
+    try:
+        student_id = request.args.get('student_id', type=int)
+        section = request.args.get('section')
+        
+        if student_id:
+            return jsonify(CounterService.get_student_summary(student_id)), 200
+        
+        if section:
+            subject = request.args.get('subject')
+            students = CounterService.get_section_summary(section, subject)
+            return jsonify({
+                'section': section,
+                'subject': subject,
+                'count': len(students),
+                'students': students
+            }), 200
+        
+        return jsonify({'error': 'student_id or section is required'}), 400
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@attendance_bp.route('/daily', methods=['GET'])
+def get_daily_summary():
+    """Get per-day attendance counts, optionally per section/subject"""
+    try:
+        start = request.args.get('from')
+        end = request.args.get('to')
+        
+        summary = AttendanceService.get_daily_summary(
+            datetime.strptime(start, '%Y-%m-%d').date() if start else None,
+            datetime.strptime(end, '%Y-%m-%d').date() if end else None,
+            section=request.args.get('section'),
+            subject=request.args.get('subject')
+        )
+        
+        return jsonify({
+            'count': len(summary),
+            'days': summary
+        }), 200
+        
     except ValueError:
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
     except Exception as e:
@@ -113,6 +495,7 @@ def get_attendance_by_date():
 
 
 @attendance_bp.route('/stats', methods=['GET'])
+@conditional_get(STUDENTS, ATTENDANCE, per_day=True)
 def get_stats():
     """Get attendance statistics"""
     try:
@@ -4,12 +4,14 @@ REST endpoints for faculty login, OTP generation, and session management
 """
 from flask import Blueprint, request, jsonify, session
 from src.services.faculty_service import FacultyService
+from src.utils.rate_limit import rate_limited
 import secrets
 
 faculty_bp = Blueprint('faculty', __name__)
 
 
 @faculty_bp.route('/login', methods=['POST'])
+@rate_limited('login', email_field='email', ip_class='login_ip')
 def login():
     """Initiate login by sending OTP to email"""
     try:
@@ -41,6 +43,7 @@ def login():
 
 
 @faculty_bp.route('/verify-otp', methods=['POST'])
+@rate_limited('login', email_field='email', ip_class='login_ip')
 def verify_otp():
     """Verify OTP and create session"""
     try:
@@ -98,7 +101,7 @@ def verify_token():
         if success:
             return jsonify({
                 'message': 'Token valid',
-                'faculty': result.to_dict()
+                'faculty': result
             }), 200
         else:
             return jsonify({'error': result}), 400
@@ -121,7 +124,7 @@ def logout():
         if not email:
             return jsonify({'error': 'Email is required'}), 400
         
-        FacultyService.logout(email)
+        FacultyService.logout(email, data.get('token'))
         
         return jsonify({'message': 'Logged out successfully'}), 200
             
@@ -0,0 +1,78 @@
+"""
+Metrics API
+Prometheus text exposition of request histograms and in-process counters,
+and the slow query log
+"""
+from flask import Blueprint, Response, current_app, jsonify, request
+from src.services.nfc_service import tag_cache
+from src.services.scan_feed import scan_feed
+from src.utils.metrics import request_metrics, CONTENT_TYPE
+from src.utils.rate_limit import rate_limiter, expensive_requests
+from src.utils.slow_queries import slow_query_log
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+def _sample(name, metric_type, help_text, samples):
+    """Lines for one counter/gauge family; samples are (labels dict, value)"""
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}']
+    for labels, value in samples:
+        label_text = ','.join(f'{key}="{val}"' for key, val in labels.items())
+        lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+    return lines
+
+
+def _component_lines():
+    """Counters and gauges of the caches, limiters and scan feed"""
+    cache = tag_cache.stats()
+    limits = rate_limiter.stats()['classes']
+    expensive = expensive_requests.stats()
+    feed = scan_feed.stats()
+
+    lines = []
+    lines += _sample('nfc_tag_cache_lookups_total', 'counter', 'NFC tag cache lookups.',
+                     [({'result': 'hit'}, cache['hits']), ({'result': 'miss'}, cache['misses'])])
+    lines += _sample('nfc_tag_cache_entries', 'gauge', 'Entries in the NFC tag cache.', [({}, cache['size'])])
+    lines += _sample('rate_limit_requests_total', 'counter', 'Requests seen by the rate limiter.', [
+        ({'class': name, 'result': result}, stats[result])
+        for name, stats in sorted(limits.items()) for result in ('allowed', 'rejected')
+    ])
+    lines += _sample('expensive_requests_in_flight', 'gauge', 'Uploads and exports in progress.',
+                     [({}, expensive['in_flight'])])
+    lines += _sample('expensive_requests_total', 'counter', 'Uploads and exports admitted or rejected.', [
+        ({'result': 'admitted'}, expensive['admitted']), ({'result': 'rejected'}, expensive['rejected'])
+    ])
+    lines += _sample('scan_feed_subscribers', 'gauge', 'Connected live scan feed clients.',
+                     [({}, feed['subscribers'])])
+    return lines
+
+
+@metrics_bp.route('', methods=['GET'])
+def get_metrics():
+    """Get all metrics in Prometheus text format"""
+    try:
+        return Response(request_metrics.render(_component_lines()), content_type=CONTENT_TYPE)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@metrics_bp.route('/slow-queries', methods=['GET'])
+def get_slow_queries():
+    """
+    Get the most recent slow statements, newest first
+    
+    Exposes SQL text and query plans, so it only exists when the
+    SLOW_QUERY_ENDPOINT admin setting is on.
+    """
+    if not current_app.config.get('SLOW_QUERY_ENDPOINT'):
+        return jsonify({'error': 'Resource not found'}), 404
+    try:
+        limit = request.args.get('limit', type=int)
+        return jsonify({
+            'stats': slow_query_log.stats(),
+            'queries': slow_query_log.recent(limit)
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -4,6 +4,8 @@ REST endpoints for NFC operations
 """
 from flask import Blueprint, request, jsonify
 from src.services.nfc_service import NFCService
+from src.services.version_service import STUDENTS
+from src.utils.conditional import conditional_get
 
 nfc_bp = Blueprint('nfc', __name__)
 
@@ -53,6 +55,7 @@ def unregister_tag(student_id):
 
 
 @nfc_bp.route('/student/<nfc_tag_id>', methods=['GET'])
+@conditional_get(STUDENTS)
 def get_student_by_tag(nfc_tag_id):
     """Get student information by NFC tag ID"""
     try:
@@ -80,3 +83,13 @@ def check_tag(nfc_tag_id):
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+
+@nfc_bp.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Get NFC tag cache hit/miss statistics"""
+    try:
+        return jsonify(NFCService.get_cache_stats()), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -2,20 +2,19 @@
 Student Management API
 REST endpoints for student operations
 """
-from flask import Blueprint, request, jsonify
-from src.services.student_service import StudentService
-from src.utils.excel_parser import parse_student_file
-import os
+from flask import Blueprint, current_app, request, jsonify
+from src.services.student_service import StudentService, BULK_INSERT_CHUNK
+from src.services.version_service import STUDENTS
+from src.utils.conditional import conditional_get
+from src.utils.excel_parser import parse_student_file, FileParseError
+from src.utils.pagination import InvalidCursorError
+from src.utils.rate_limit import rate_limited, concurrency_limited
 from werkzeug.utils import secure_filename
 
 students_bp = Blueprint('students', __name__)
 
-UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'xlsx', 'xls', 'csv'}
 
-# Ensure upload folder exists
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
@@ -46,6 +45,8 @@ def create_student():
 
 
 @students_bp.route('/upload', methods=['POST'])
+@rate_limited('upload')
+@concurrency_limited
 def upload_students():
     """Upload students from Excel/CSV file"""
     try:
@@ -61,25 +62,23 @@ def upload_students():
         if not allowed_file(file.filename):
             return jsonify({'error': 'Invalid file type. Please upload .xlsx, .xls, or .csv'}), 400
         
-        # Save file temporarily
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
-        
         # Determine file type
+        filename = secure_filename(file.filename)
         file_type = 'excel' if filename.endswith(('.xlsx', '.xls')) else 'csv'
         
-        # Parse file
-        success, result = parse_student_file(filepath, file_type)
-        
-        # Clean up
-        os.remove(filepath)
+        # Parse rows straight from the upload stream
+        success, result = parse_student_file(file.stream, file_type)
         
         if not success:
             return jsonify({'error': result}), 400
         
         # Bulk create students
-        success_count, failed_count, errors = StudentService.bulk_create_students(result)
+        success_count, failed_count, errors = StudentService.bulk_create_students(
+            result, chunk_size=current_app.config.get('STUDENT_IMPORT_CHUNK_SIZE', BULK_INSERT_CHUNK)
+        )
+        
+        if success_count == 0 and failed_count == 0:
+            return jsonify({'error': 'No valid student data found in file'}), 400
         
         return jsonify({
             'message': f'Upload completed: {success_count} students added, {failed_count} failed',
@@ -88,11 +87,15 @@ def upload_students():
             'errors': errors
         }), 201 if success_count > 0 else 400
         
+    except FileParseError as e:
+        # All rows are read before any is written, so nothing was imported
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @students_bp.route('', methods=['GET'])
+@conditional_get(STUDENTS)
 def get_students():
     """Get all students with optional filters"""
     try:
@@ -109,21 +112,44 @@ def get_students():
         
         # Search functionality
         search = request.args.get('search')
+        
+        # Ranked search results, best matches first
         if search:
-            students = StudentService.search_students(search)
-        else:
-            students = StudentService.get_all_students(filters)
+            students = StudentService.search_students(
+                search, filters, limit=request.args.get('limit', type=int)
+            )
+            return jsonify({
+                'count': len(students),
+                'students': [s.to_dict() for s in students]
+            }), 200
+        
+        # Keyset pagination when a cursor or limit is requested
+        if 'cursor' in request.args or 'limit' in request.args:
+            cursor = request.args.get('cursor')
+            limit = request.args.get('limit', type=int)
+            students, next_cursor = StudentService.get_students_page(filters, cursor, limit)
+            
+            return jsonify({
+                'count': len(students),
+                'students': [s.to_dict() for s in students],
+                'next_cursor': next_cursor
+            }), 200
+        
+        students = StudentService.get_all_students(filters)
         
         return jsonify({
             'count': len(students),
             'students': [s.to_dict() for s in students]
         }), 200
         
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @students_bp.route('/<int:student_id>', methods=['GET'])
+@conditional_get(STUDENTS)
 def get_student(student_id):
     """Get a specific student by ID"""
     try:
@@ -3,9 +3,15 @@ Flask Application Factory
 Configures database, CORS, and registers API blueprints
 """
 import os
+import click
 from flask import Flask, send_from_directory
 from flask_cors import CORS
-from src.models import db
+from src.models import db, ensure_schema
+from src.utils.db_profiles import get_profile, register_pragmas, register_request_settings
+from src.utils.json_provider import get_provider_class, register_compression
+from src.utils.rate_limit import DEFAULT_LIMITS, rate_limiter, expensive_requests
+from src.utils.metrics import init_metrics, register_query_hooks
+from src.utils.slow_queries import slow_query_log
 
 
 def create_app():
@@ -29,20 +35,93 @@ def create_app():
     
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
+    # Engine tuning profile: dev-sqlite, single-node-sqlite-wal or postgres-pooled
+    # (defaults to WAL for SQLite and the pooled profile for PostgreSQL)
+    db_profile, profile = get_profile(os.getenv('DB_PROFILE'), app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['DB_PROFILE'] = db_profile
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(profile['engine_options'])
+    app.config['DB_REQUEST_SETTINGS'] = dict(profile['request_settings'])
+    
+    # The recent-scan index may decide duplicates on its own only when this
+    # process is the sole writer; single-process deployments opt in (several
+    # gunicorn workers on one SQLite file would each trust a partial index)
+    app.config['SCAN_INDEX_AUTHORITATIVE'] = os.getenv('SCAN_INDEX_AUTHORITATIVE', 'false').lower() == 'true'
+    
+    # Write-behind mode: /api/attendance/record acknowledges after validation
+    # and a background writer group-commits queued scans
+    app.config['ATTENDANCE_WRITE_BEHIND'] = os.getenv('ATTENDANCE_WRITE_BEHIND', 'false').lower() == 'true'
+    app.config['ATTENDANCE_QUEUE_MAXSIZE'] = int(os.getenv('ATTENDANCE_QUEUE_MAXSIZE', 5000))
+    app.config['ATTENDANCE_QUEUE_BATCH_SIZE'] = int(os.getenv('ATTENDANCE_QUEUE_BATCH_SIZE', 200))
+    app.config['ATTENDANCE_QUEUE_FLUSH_MS'] = int(os.getenv('ATTENDANCE_QUEUE_FLUSH_MS', 50))
+    
+    # Failed batches are retried with backoff, then written row by row; rows
+    # that still fail are journaled for `flask replay-dead-letters`
+    app.config['ATTENDANCE_QUEUE_MAX_RETRIES'] = int(os.getenv('ATTENDANCE_QUEUE_MAX_RETRIES', 3))
+    app.config['ATTENDANCE_QUEUE_RETRY_MS'] = int(os.getenv('ATTENDANCE_QUEUE_RETRY_MS', 100))
+    app.config['ATTENDANCE_DEAD_LETTER_PATH'] = os.getenv(
+        'ATTENDANCE_DEAD_LETTER_PATH', os.path.join(app.instance_path, 'attendance_dead_letter.jsonl')
+    )
+    
+    # Rows per multi-row INSERT for student uploads
+    app.config['STUDENT_IMPORT_CHUNK_SIZE'] = int(os.getenv('STUDENT_IMPORT_CHUNK_SIZE', 500))
+    
+    # JSON encoder: auto (orjson when installed), orjson or stdlib
+    json_provider, provider_class = get_provider_class(os.getenv('JSON_PROVIDER'))
+    app.config['JSON_PROVIDER'] = json_provider
+    app.json = provider_class(app)
+    
+    # Opt-in gzip of JSON responses at least JSON_GZIP_MIN_BYTES long
+    app.config['JSON_GZIP'] = os.getenv('JSON_GZIP', 'false').lower() == 'true'
+    app.config['JSON_GZIP_MIN_BYTES'] = int(os.getenv('JSON_GZIP_MIN_BYTES', 1024))
+    app.config['JSON_GZIP_LEVEL'] = int(os.getenv('JSON_GZIP_LEVEL', 6))
+    register_compression(app)
+    
+    # Admission control: token buckets per client and endpoint class
+    # ("<count>/<second|minute|hour>") and a cap on concurrent uploads/exports
+    app.config['RATE_LIMIT_ENABLED'] = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    app.config['RATE_LIMITS'] = {
+        name: os.getenv(f'RATE_LIMIT_{name.upper()}', spec) for name, spec in DEFAULT_LIMITS.items()
+    }
+    app.config['EXPENSIVE_CONCURRENCY'] = int(os.getenv('EXPENSIVE_CONCURRENCY', 4))
+    rate_limiter.configure(app.config['RATE_LIMITS'], enabled=app.config['RATE_LIMIT_ENABLED'])
+    expensive_requests.configure(app.config['EXPENSIVE_CONCURRENCY'])
+    
+    # Per-request metrics at /api/metrics; METRICS_HEADERS adds X-Query-Count
+    # and Server-Timing to every response
+    app.config['METRICS_HEADERS'] = os.getenv('METRICS_HEADERS', 'false').lower() == 'true'
+    init_metrics(app)
+    
+    # Statements slower than SLOW_QUERY_MS are logged with their query plan;
+    # SLOW_QUERY_MS=off disables. The log is browsable at
+    # /api/metrics/slow-queries only with SLOW_QUERY_ENDPOINT=true (admin use:
+    # it exposes SQL text and plans)
+    slow_query_ms = os.getenv('SLOW_QUERY_MS', '250')
+    app.config['SLOW_QUERY_MS'] = None if slow_query_ms.lower() == 'off' else float(slow_query_ms)
+    app.config['SLOW_QUERY_LOG_SIZE'] = int(os.getenv('SLOW_QUERY_LOG_SIZE', 100))
+    app.config['SLOW_QUERY_ENDPOINT'] = os.getenv('SLOW_QUERY_ENDPOINT', 'false').lower() == 'true'
+    slow_query_log.configure(app.config['SLOW_QUERY_MS'], app.config['SLOW_QUERY_LOG_SIZE'])
+    
     # Initialize extensions
     db.init_app(app)
     CORS(app)
     
+    with app.app_context():
+        register_pragmas(db.engine, profile['pragmas'])
+        register_query_hooks(db.engine)
+    register_request_settings(db.session)
+    
     # Register blueprints
     from src.api.students import students_bp
     from src.api.nfc import nfc_bp
     from src.api.attendance import attendance_bp
     from src.api.faculty import faculty_bp
+    from src.api.metrics import metrics_bp
     
     app.register_blueprint(students_bp, url_prefix='/api/students')
     app.register_blueprint(nfc_bp, url_prefix='/api/nfc')
     app.register_blueprint(attendance_bp, url_prefix='/api/attendance')
     app.register_blueprint(faculty_bp, url_prefix='/api/faculty')
+    app.register_blueprint(metrics_bp, url_prefix='/api/metrics')
     
     # Serve frontend
     @app.route('/')
@@ -61,6 +140,53 @@ def create_app():
         template_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'sample_students_template.xlsx')
         return send_file(template_path, as_attachment=True, download_name='sample_students_template.xlsx')
     
+    # CLI: flask --app run rebuild-rollups
+    @app.cli.command('rebuild-rollups')
+    def rebuild_rollups():
+        """Recompute daily rollups and attendance counters from the attendance table"""
+        from src.services.rollup_service import RollupService
+        from src.services.counter_service import CounterService
+        count = RollupService.rebuild()
+        print(f"✅ Rebuilt {count} daily rollup rows")
+        student_rows, class_rows = CounterService.rebuild()
+        print(f"✅ Rebuilt {student_rows} student counters and {class_rows} session counters")
+    
+    # CLI: flask --app run replay-dead-letters
+    @app.cli.command('replay-dead-letters')
+    def replay_dead_letters():
+        """Write queued scans the background writer had to dead-letter"""
+        from src.services.attendance_queue import attendance_queue
+        from src.services.attendance_service import AttendanceService
+        attendance_queue.configure(dead_letter_path=app.config['ATTENDANCE_DEAD_LETTER_PATH'])
+        replayed, remaining = attendance_queue.replay_dead_letters(AttendanceService.write_queued)
+        print(f"✅ Replayed {replayed} dead-lettered scans" + (f", {remaining} still failing" if remaining else ''))
+    
+    # CLI: flask --app run create-semester 2024-odd 2024-07-01 2024-11-30
+    @app.cli.command('create-semester')
+    @click.argument('name')
+    @click.argument('start_date')
+    @click.argument('end_date')
+    def create_semester(name, start_date, end_date):
+        """Define a semester (dates are YYYY-MM-DD, end inclusive)"""
+        from src.services.archive_service import ArchiveService
+        success, result = ArchiveService.create_semester(name, start_date, end_date)
+        print(f"✅ Created semester {result.name}" if success else f"❌ {result}")
+    
+    # CLI: flask --app run archive-semester 2024-odd [--chunk-size 1000] [--max-chunks N]
+    @app.cli.command('archive-semester')
+    @click.argument('name')
+    @click.option('--chunk-size', default=1000, show_default=True, help='Rows moved per transaction')
+    @click.option('--max-chunks', type=int, default=None, help='Stop after N chunks; rerun to resume')
+    def archive_semester(name, chunk_size, max_chunks):
+        """Move a closed semester's attendance into the archive table"""
+        from src.services.archive_service import ArchiveService
+        success, result = ArchiveService.archive_semester(name, chunk_size, max_chunks)
+        if success:
+            print(f"✅ Moved {result['moved']} rows; semester {name} is {result['status']} "
+                  f"({result['archived_rows']} rows archived in total)")
+        else:
+            print(f"❌ {result}")
+    
     # Error handlers
     @app.errorhandler(404)
     def not_found(e):
@@ -70,9 +196,39 @@ def create_app():
     def server_error(e):
         return {'error': 'Internal server error'}, 500
     
-    # Create database tables
+    # Create database tables unless the stored schema version matches
+    with app.app_context():
+        if ensure_schema():
+            print("✅ Database tables created successfully")
+        
+        from src.services.search_index import search_index
+        search_index.install()
+        
+        from src.services.archive_service import archived_ranges
+        archived_ranges.load()
+    
+    # In-process caches belong to the previous database, if any
+    from src.services.nfc_service import tag_cache
+    from src.services.scan_index import scan_index
+    from src.services.faculty_service import profile_cache, revoked_tokens
+    tag_cache.clear()
+    profile_cache.clear()
+    revoked_tokens.clear()
+    scan_index.authoritative = app.config['SCAN_INDEX_AUTHORITATIVE']
     with app.app_context():
-        db.create_all()
-        print("✅ Database tables created successfully")
+        scan_index.rebuild()
+    
+    if app.config['ATTENDANCE_WRITE_BEHIND']:
+        from src.services.attendance_queue import attendance_queue
+        from src.services.attendance_service import AttendanceService
+        attendance_queue.configure(
+            maxsize=app.config['ATTENDANCE_QUEUE_MAXSIZE'],
+            batch_size=app.config['ATTENDANCE_QUEUE_BATCH_SIZE'],
+            flush_interval_ms=app.config['ATTENDANCE_QUEUE_FLUSH_MS'],
+            max_retries=app.config['ATTENDANCE_QUEUE_MAX_RETRIES'],
+            retry_backoff_ms=app.config['ATTENDANCE_QUEUE_RETRY_MS'],
+            dead_letter_path=app.config['ATTENDANCE_DEAD_LETTER_PATH']
+        )
+        attendance_queue.start(app, AttendanceService.write_queued)
     
     return app
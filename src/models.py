@@ -2,8 +2,11 @@
 Database Models for NFC Attendance System
 Uses SQLAlchemy ORM for database abstraction
 """
+import hashlib
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect
+from sqlalchemy.exc import SQLAlchemyError
 
 db = SQLAlchemy()
 
@@ -72,9 +75,26 @@ class Faculty(db.Model):
         return f'<Faculty {self.email}: {self.name}>'
 
 
+class RevokedToken(db.Model):
+    """Remember token logged out before its expiry"""
+    __tablename__ = 'revoked_tokens'
+    
+    token_id = db.Column(db.String(32), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<RevokedToken {self.token_id}>'
+
+
 class Attendance(db.Model):
     """Attendance record model"""
     __tablename__ = 'attendance'
+    __table_args__ = (
+        # Serves the per-student duplicate-window probe and history queries
+        db.Index('ix_attendance_student_timestamp', 'student_id', 'timestamp'),
+        # Makes offline journal sync idempotent
+        db.Index('ix_attendance_scan_uuid', 'scan_uuid', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False, index=True)
@@ -84,14 +104,34 @@ class Attendance(db.Model):
     subject = db.Column(db.String(100), nullable=True, index=True)  # Subject name
     date = db.Column(db.String(20), nullable=True, index=True)  # Date of class (YYYY-MM-DD)
     class_time = db.Column(db.String(20), nullable=True)  # Class time slot (e.g., 09:00-09:50)
+    scan_uuid = db.Column(db.String(36), nullable=True)  # Client-generated ID of an offline scan
+    
+    # Student columns loaded in the same SELECT by list queries (with_expression),
+    # so serializing a list never lazy-loads the student relationship
+    student_name = db.query_expression()
+    student_register_number = db.query_expression()
+    
+    def attach_student(self, student):
+        """Set the student columns from an already loaded student"""
+        self.student_name = student.name
+        self.student_register_number = student.register_number
+        return self
+    
+    def _load_student_columns(self):
+        """Fill the student columns for records loaded without them (one lookup)"""
+        if self.student_name is None and self.student_id is not None:
+            student = db.session.get(Student, self.student_id)
+            if student is not None:
+                self.attach_student(student)
     
     def to_dict(self):
         """Convert attendance object to dictionary"""
+        self._load_student_columns()
         return {
             'id': self.id,
             'student_id': self.student_id,
-            'student_name': self.student.name if self.student else None,
-            'register_number': self.student.register_number if self.student else None,
+            'student_name': self.student_name,
+            'register_number': self.student_register_number,
             'timestamp': self.timestamp.isoformat() if self.timestamp else None,
             'recorded_by': self.recorded_by,
             'section': self.section,
@@ -102,3 +142,242 @@ class Attendance(db.Model):
     
     def __repr__(self):
         return f'<Attendance {self.student_id} at {self.timestamp}>'
+
+
+class Semester(db.Model):
+    """Academic term whose attendance can be moved to the archive once closed"""
+    __tablename__ = 'semesters'
+    
+    # Lifecycle: open -> archiving (chunks being moved) -> archived
+    OPEN = 'open'
+    ARCHIVING = 'archiving'
+    ARCHIVED = 'archived'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)  # inclusive
+    status = db.Column(db.String(20), nullable=False, default=OPEN)
+    archived_rows = db.Column(db.Integer, nullable=False, default=0)
+    archiving_started_at = db.Column(db.DateTime, nullable=True)
+    archived_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert semester object to dictionary"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'start_date': self.start_date.isoformat(),
+            'end_date': self.end_date.isoformat(),
+            'status': self.status,
+            'archived_rows': self.archived_rows,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
+    
+    def __repr__(self):
+        return f'<Semester {self.name}: {self.status}>'
+
+
+class ArchivedAttendance(db.Model):
+    """
+    Attendance record moved out of the hot table with its closed semester
+    
+    Keeps the original attendance id in ``id`` and serializes exactly like
+    Attendance, so history queries can mix both.
+    """
+    __tablename__ = 'attendance_archive'
+    __table_args__ = (
+        db.Index('ix_attendance_archive_student_timestamp', 'student_id', 'timestamp'),
+    )
+    
+    archive_id = db.Column(db.Integer, primary_key=True)
+    id = db.Column(db.Integer, nullable=False, index=True)  # Original attendance id
+    semester_id = db.Column(db.Integer, db.ForeignKey('semesters.id'), nullable=False, index=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False, index=True)
+    recorded_by = db.Column(db.String(100), nullable=False)
+    section = db.Column(db.String(20), nullable=True)
+    subject = db.Column(db.String(100), nullable=True)
+    date = db.Column(db.String(20), nullable=True, index=True)
+    class_time = db.Column(db.String(20), nullable=True)
+    scan_uuid = db.Column(db.String(36), nullable=True, index=True)
+    
+    student_name = db.query_expression()
+    student_register_number = db.query_expression()
+    
+    attach_student = Attendance.attach_student
+    _load_student_columns = Attendance._load_student_columns
+    to_dict = Attendance.to_dict
+    
+    def __repr__(self):
+        return f'<ArchivedAttendance {self.student_id} at {self.timestamp}>'
+
+
+class DailyAttendanceRollup(db.Model):
+    """Per-day attendance counters, maintained in the same transaction as each insert"""
+    __tablename__ = 'daily_attendance_rollup'
+    __table_args__ = (
+        db.UniqueConstraint('date', 'section', 'subject', name='uq_daily_rollup_key'),
+    )
+    
+    # Section/subject value of the row holding whole-day totals
+    ALL = '*'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False, index=True)
+    section = db.Column(db.String(20), nullable=False, default='')  # '' when not recorded
+    subject = db.Column(db.String(100), nullable=False, default='')  # '' when not recorded
+    scans = db.Column(db.Integer, nullable=False, default=0)
+    unique_students = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        """Convert rollup row to dictionary"""
+        return {
+            'date': self.date.isoformat(),
+            'section': self.section or None,
+            'subject': self.subject or None,
+            'scans': self.scans,
+            'unique_students': self.unique_students
+        }
+    
+    def __repr__(self):
+        return f'<DailyAttendanceRollup {self.date} {self.section}/{self.subject}: {self.scans}>'
+
+
+class StudentAttendanceCounter(db.Model):
+    """Classes attended per student and (section, subject), maintained on every insert"""
+    __tablename__ = 'student_attendance_counters'
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'section', 'subject', name='uq_student_counter_key'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
+    section = db.Column(db.String(20), nullable=False, default='')  # '' when not recorded
+    subject = db.Column(db.String(100), nullable=False, default='')  # '' when not recorded
+    attended = db.Column(db.Integer, nullable=False, default=0)
+    last_seen = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<StudentAttendanceCounter {self.student_id} {self.section}/{self.subject}: {self.attended}>'
+
+
+class ClassSessionCounter(db.Model):
+    """Distinct class sessions (date, time slot) held per (section, subject)"""
+    __tablename__ = 'class_session_counters'
+    __table_args__ = (
+        db.UniqueConstraint('section', 'subject', name='uq_class_session_key'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    section = db.Column(db.String(20), nullable=False, default='')  # '' when not recorded
+    subject = db.Column(db.String(100), nullable=False, default='')  # '' when not recorded
+    sessions = db.Column(db.Integer, nullable=False, default=0)
+    last_held = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<ClassSessionCounter {self.section}/{self.subject}: {self.sessions}>'
+
+
+class TableVersion(db.Model):
+    """Write counter per entity, bumped in the same transaction as each write it tracks"""
+    __tablename__ = 'table_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<TableVersion {self.name}: {self.version}>'
+
+
+class SchemaVersion(db.Model):
+    """Fingerprint of the model metadata the database was last created from"""
+    __tablename__ = 'schema_version'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.String(64), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+def schema_fingerprint():
+    """
+    Hash the table, column and index definitions of all models
+    
+    Returns:
+        str: Hex digest that changes whenever a model changes
+    """
+    parts = []
+    for table in db.metadata.sorted_tables:
+        parts.append(table.name)
+        parts.extend(f'{c.name}:{c.type}:{c.nullable}' for c in table.columns)
+        parts.extend(sorted(index.name for index in table.indexes))
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+
+class SchemaMismatchError(RuntimeError):
+    """Existing tables lack columns the models need"""
+
+
+def missing_columns():
+    """
+    Model columns absent from tables that already exist
+    
+    db.create_all() only creates missing tables; it never adds columns to
+    an existing one (on any database).
+    
+    Returns:
+        list: (table name, Column) pairs
+    """
+    inspector = inspect(db.engine)
+    missing = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        missing.extend((table.name, column) for column in table.columns if column.name not in existing)
+    return missing
+
+
+def ensure_schema():
+    """
+    Create missing tables unless the stored schema version already matches
+    
+    Skips the per-table inspection of db.create_all() on warm databases,
+    which dominates cold start on serverless deployments.
+    
+    Returns:
+        bool: True if create_all ran
+        
+    Raises:
+        SchemaMismatchError: If existing tables lack model columns; the
+            message lists the ALTER TABLE statements to run
+    """
+    version = schema_fingerprint()
+    try:
+        stored = db.session.query(SchemaVersion.version).filter_by(id=1).scalar()
+    except SQLAlchemyError:
+        db.session.rollback()
+        stored = None
+    
+    if stored == version:
+        return False
+    
+    db.create_all()
+    missing = missing_columns()
+    if missing:
+        dialect = db.engine.dialect
+        statements = '; '.join(
+            f'ALTER TABLE {table} ADD COLUMN {column.name} {column.type.compile(dialect=dialect)}'
+            for table, column in missing
+        )
+        raise SchemaMismatchError(
+            f'Database schema is out of date. Run migrate_database.py (SQLite) or apply: {statements}'
+        )
+    
+    row = db.session.get(SchemaVersion, 1) or SchemaVersion(id=1)
+    row.version = version
+    db.session.add(row)
+    db.session.commit()
+    return True
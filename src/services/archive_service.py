@@ -0,0 +1,236 @@
+"""
+Attendance Archive Service
+Moves the attendance of closed semesters out of the hot table in chunked,
+resumable jobs, and tells the query paths when archived history is involved
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert, literal, select, union_all
+from src.models import db, Attendance, ArchivedAttendance, Semester
+
+# Rows moved per transaction
+ARCHIVE_CHUNK = 1000
+
+# Columns copied from the hot table into the archive
+ARCHIVED_COLUMNS = (
+    'id', 'student_id', 'timestamp', 'recorded_by', 'section', 'subject', 'date', 'class_time', 'scan_uuid'
+)
+
+
+def _day_start(day):
+    return datetime.combine(day, datetime.min.time())
+
+
+class ArchivedRanges:
+    """
+    Timestamp ranges of semesters that have (or are getting) archived rows
+
+    Cached per process and reloaded after ``ttl`` seconds; archive jobs in
+    this process refresh it directly. A range is listed from the moment a
+    job starts, and the job waits out the TTL before moving rows, so every
+    process reads a half-moved semester from both tables.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._ranges = []
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Read the ranges from the semesters table (needs an app context)"""
+        rows = db.session.query(Semester.start_date, Semester.end_date).filter(
+            Semester.status.in_([Semester.ARCHIVING, Semester.ARCHIVED])
+        ).all()
+        ranges = sorted((_day_start(start), _day_start(end + timedelta(days=1))) for start, end in rows)
+        with self._lock:
+            self._ranges = ranges
+            self._loaded_at = time.monotonic()
+
+    def clear(self):
+        """Forget the cached ranges; the next lookup reloads them"""
+        with self._lock:
+            self._ranges = []
+            self._loaded_at = None
+
+    def _current(self):
+        with self._lock:
+            fresh = self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+            if fresh:
+                return self._ranges
+        self.load()
+        with self._lock:
+            return self._ranges
+
+    def any(self):
+        """Whether any attendance may live in the archive"""
+        return bool(self._current())
+
+    def overlaps(self, start=None, end=None):
+        """Whether [start, end) touches an archived range (None = unbounded)"""
+        return any(
+            (end is None or range_start < end) and (start is None or range_end > start)
+            for range_start, range_end in self._current()
+        )
+
+    def latest_end(self):
+        """End of the newest archived range; every archived row is older"""
+        ranges = self._current()
+        return max(range_end for _, range_end in ranges) if ranges else None
+
+
+# Process-wide cache consulted by AttendanceService
+archived_ranges = ArchivedRanges()
+
+
+def attendance_history(student_id=None):
+    """
+    Hot and archived attendance as one subquery
+
+    For backfills that must see every record ever taken, such as rebuilding
+    rollups and counters.
+
+    Args:
+        student_id: Restrict both sides to one student, optional
+
+    Returns:
+        Subquery with id, student_id, timestamp, section, subject, date and
+        class_time columns
+    """
+    selects = []
+    for model in (Attendance, ArchivedAttendance):
+        query = select(
+            model.id, model.student_id, model.timestamp, model.section, model.subject, model.date, model.class_time
+        )
+        if student_id is not None:
+            query = query.where(model.student_id == student_id)
+        selects.append(query)
+    return union_all(*selects).subquery('attendance_history')
+
+
+class ArchiveService:
+    """Service class for semesters and attendance archival"""
+
+    @staticmethod
+    def create_semester(name, start_date, end_date):
+        """
+        Define a semester
+
+        Args:
+            name: Unique semester name, e.g. "2024-odd"
+            start_date: First day (date or YYYY-MM-DD)
+            end_date: Last day, inclusive (date or YYYY-MM-DD)
+
+        Returns:
+            tuple: (success, semester_or_error)
+        """
+        try:
+            if isinstance(start_date, str):
+                start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+            if isinstance(end_date, str):
+                end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+        except ValueError:
+            return False, "Invalid date format. Use YYYY-MM-DD"
+
+        if not name or not name.strip():
+            return False, "Semester name is required"
+        if end_date < start_date:
+            return False, "Semester cannot end before it starts"
+
+        try:
+            if Semester.query.filter_by(name=name.strip()).first():
+                return False, f"Semester {name.strip()} already exists"
+
+            overlapping = Semester.query.filter(
+                Semester.start_date <= end_date, Semester.end_date >= start_date
+            ).first()
+            if overlapping:
+                return False, f"Dates overlap semester {overlapping.name}"
+
+            semester = Semester(name=name.strip(), start_date=start_date, end_date=end_date)
+            db.session.add(semester)
+            db.session.commit()
+            return True, semester
+
+        except Exception as e:
+            db.session.rollback()
+            return False, f"Error creating semester: {str(e)}"
+
+    @staticmethod
+    def get_semesters():
+        """Get all semesters, oldest first"""
+        return Semester.query.order_by(Semester.start_date).all()
+
+    @staticmethod
+    def archive_semester(name, chunk_size=ARCHIVE_CHUNK, max_chunks=None):
+        """
+        Move a closed semester's attendance into the archive table
+
+        Each chunk is copied and deleted in one transaction, so the job can
+        be interrupted at any point and simply run again to resume. The
+        first chunk is held back until archived_ranges.ttl has passed since
+        the semester entered ARCHIVING, so other processes' cached ranges
+        include it before any row leaves the hot table.
+
+        Args:
+            name: Semester name
+            chunk_size: Rows moved per transaction
+            max_chunks: Stop after this many chunks (resume later), optional
+
+        Returns:
+            tuple: (success, summary_dict_or_error)
+        """
+        semester = Semester.query.filter_by(name=name).first()
+        if not semester:
+            return False, "Semester not found"
+        if semester.status == Semester.ARCHIVED:
+            return True, dict(semester.to_dict(), moved=0)
+        if semester.end_date >= datetime.utcnow().date():
+            return False, f"Semester {name} has not ended yet"
+
+        start = _day_start(semester.start_date)
+        end = _day_start(semester.end_date + timedelta(days=1))
+        columns = [getattr(Attendance, column) for column in ARCHIVED_COLUMNS]
+        target = [ArchivedAttendance.__table__.c[column] for column in ARCHIVED_COLUMNS]
+
+        moved = 0
+        chunks = 0
+        try:
+            if semester.status != Semester.ARCHIVING or semester.archiving_started_at is None:
+                semester.status = Semester.ARCHIVING
+                semester.archiving_started_at = datetime.utcnow()
+                db.session.commit()
+            archived_ranges.load()
+            
+            settle = archived_ranges.ttl - (datetime.utcnow() - semester.archiving_started_at).total_seconds()
+            if settle > 0:
+                time.sleep(settle)
+
+            while max_chunks is None or chunks < max_chunks:
+                ids = [row_id for (row_id,) in db.session.query(Attendance.id).filter(
+                    Attendance.timestamp >= start, Attendance.timestamp < end
+                ).order_by(Attendance.id).limit(chunk_size)]
+
+                if not ids:
+                    semester.status = Semester.ARCHIVED
+                    semester.archived_at = datetime.utcnow()
+                    db.session.commit()
+                    break
+
+                db.session.execute(insert(ArchivedAttendance).from_select(
+                    target + [ArchivedAttendance.__table__.c.semester_id],
+                    select(*columns, literal(semester.id)).where(Attendance.id.in_(ids))
+                ))
+                db.session.query(Attendance).filter(Attendance.id.in_(ids)).delete(synchronize_session=False)
+                semester.archived_rows += len(ids)
+                db.session.commit()
+
+                moved += len(ids)
+                chunks += 1
+
+            return True, dict(semester.to_dict(), moved=moved)
+
+        except Exception as e:
+            db.session.rollback()
+            return False, f"Error archiving semester: {str(e)}"
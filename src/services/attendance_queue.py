@@ -0,0 +1,333 @@
+"""
+Write-Behind Attendance Queue
+Buffers validated scans in memory and writes them with group commits
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+
+class QueueFullError(Exception):
+    """Raised when the write-behind queue is at capacity"""
+
+
+class DeadLetterJournal:
+    """
+    Queued scans the writer could not commit, kept for replay
+
+    Stored as JSON lines at ``path`` so they survive a restart; without a
+    path they are only kept in memory.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._items = []
+        self._lock = threading.Lock()
+        # Kept up to date by append and replace, so stats never re-read the file
+        self._count = 0
+        if path is not None and os.path.exists(path):
+            with open(path, encoding='utf-8') as journal:
+                self._count = sum(1 for line in journal if line.strip())
+
+    def append(self, items):
+        """Record (timestamp, serialized_attendance) items"""
+        with self._lock:
+            self._count += len(items)
+            if self.path is None:
+                self._items.extend(items)
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as journal:
+                for timestamp, record in items:
+                    journal.write(json.dumps({'timestamp': timestamp.isoformat(), 'record': record}) + '\n')
+                journal.flush()
+                os.fsync(journal.fileno())
+
+    def read(self):
+        """All recorded items, oldest first"""
+        with self._lock:
+            if self.path is None:
+                return list(self._items)
+            if not os.path.exists(self.path):
+                return []
+            with open(self.path, encoding='utf-8') as journal:
+                entries = [json.loads(line) for line in journal if line.strip()]
+        return [(datetime.fromisoformat(entry['timestamp']), entry['record']) for entry in entries]
+
+    def replace(self, items):
+        """Swap the journal contents for ``items`` (after a replay)"""
+        with self._lock:
+            self._count = len(items)
+            if self.path is None:
+                self._items = list(items)
+                return
+            if not items:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+                return
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as journal:
+                for timestamp, record in items:
+                    journal.write(json.dumps({'timestamp': timestamp.isoformat(), 'record': record}) + '\n')
+            os.replace(temp_path, self.path)
+
+    def __len__(self):
+        with self._lock:
+            return self._count
+
+
+class AttendanceWriteQueue:
+    """
+    Bounded in-process queue drained by a background writer thread
+
+    The writer commits once every ``batch_size`` records or every
+    ``flush_interval_ms`` milliseconds, whichever comes first, instead of
+    once per scan. Records still queued at interpreter exit are flushed.
+
+    Scans in the queue have already been acknowledged, so a failed batch is
+    retried with exponential backoff, then written row by row; rows that
+    still fail go to the dead-letter journal for replay_dead_letters.
+    """
+
+    def __init__(self, maxsize=5000, batch_size=200, flush_interval_ms=50, max_retries=3,
+                 retry_backoff_ms=100, dead_letter=None):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval_ms = flush_interval_ms
+        self.max_retries = max_retries
+        self.retry_backoff_ms = retry_backoff_ms
+        self.dead_letter = dead_letter if dead_letter is not None else DeadLetterJournal()
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._stop = threading.Event()
+        self._thread = None
+        self._app = None
+        self._writer = None
+        self._stats_lock = threading.Lock()
+        self._reset_stats()
+
+    @property
+    def enabled(self):
+        """Whether a writer thread is running"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def configure(self, maxsize=None, batch_size=None, flush_interval_ms=None, max_retries=None,
+                  retry_backoff_ms=None, dead_letter_path=None):
+        """Change limits; the queue is recreated if empty and stopped"""
+        if maxsize is not None and maxsize != self.maxsize and not self.enabled and self._queue.empty():
+            self.maxsize = maxsize
+            self._queue = queue.Queue(maxsize=maxsize)
+        if batch_size is not None:
+            self.batch_size = batch_size
+        if flush_interval_ms is not None:
+            self.flush_interval_ms = flush_interval_ms
+        if max_retries is not None:
+            self.max_retries = max_retries
+        if retry_backoff_ms is not None:
+            self.retry_backoff_ms = retry_backoff_ms
+        if dead_letter_path is not None:
+            self.dead_letter = DeadLetterJournal(dead_letter_path)
+
+    def start(self, app, writer):
+        """
+        Start the background writer
+        
+        Args:
+            app: Flask app whose context the writer runs in
+            writer: Callable taking a list of queued items and committing them
+        """
+        if self.enabled:
+            self.stop()
+        self._app = app
+        self._writer = writer
+        self._stop.clear()
+        self._reset_stats()
+        self._thread = threading.Thread(target=self._run, name='attendance-writer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10):
+        """
+        Stop the writer once it has drained everything still queued
+
+        The writer thread does the final drain itself. The queue is only
+        flushed from this thread after the writer has exited, so the two
+        never write batches at the same time. A writer still busy after
+        ``timeout`` seconds is left to finish on its own.
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"⚠️ Attendance writer still draining after {timeout}s; leaving it to finish")
+            return
+        self._thread = None
+        # Whatever a crashed writer left behind
+        self.flush()
+
+    def submit(self, item):
+        """
+        Enqueue a validated scan without blocking
+        
+        Raises:
+            QueueFullError: If the queue is at capacity
+        """
+        try:
+            self._queue.put_nowait((time.monotonic(), item))
+        except queue.Full:
+            with self._stats_lock:
+                self._stats['rejected'] += 1
+            raise QueueFullError("Attendance queue is full, please retry")
+        with self._stats_lock:
+            self._stats['enqueued'] += 1
+
+    def flush(self):
+        """Synchronously write everything currently queued"""
+        while True:
+            batch = self._drain(block=False)
+            if not batch:
+                return
+            self._write(batch)
+
+    def replay_dead_letters(self, writer=None):
+        """
+        Write dead-lettered scans again, one at a time (needs an app context)
+
+        Args:
+            writer: Callable like the one given to start, defaults to it
+
+        Returns:
+            tuple: (replayed_count, still_failing_count)
+        """
+        writer = writer or self._writer
+        remaining = []
+        replayed = 0
+        for item in self.dead_letter.read():
+            try:
+                writer([item])
+                replayed += 1
+            except Exception as e:
+                print(f"❌ Dead-lettered attendance for student {item[1].get('student_id')} failed again: {e}")
+                remaining.append(item)
+        self.dead_letter.replace(remaining)
+        with self._stats_lock:
+            self._stats['written'] += replayed
+        return replayed, len(remaining)
+
+    def stats(self):
+        """
+        Get queue depth, throughput counters and lag
+        
+        Returns:
+            Dictionary of metrics; lag values are in milliseconds
+        """
+        with self._queue.mutex:
+            depth = len(self._queue.queue)
+            oldest = self._queue.queue[0][0] if depth else None
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update({
+            'enabled': self.enabled,
+            'depth': depth,
+            'maxsize': self.maxsize,
+            'batch_size': self.batch_size,
+            'flush_interval_ms': self.flush_interval_ms,
+            'dead_letter_pending': len(self.dead_letter),
+            'oldest_pending_ms': round((time.monotonic() - oldest) * 1000, 1) if oldest else 0.0
+        })
+        return stats
+
+    def _reset_stats(self):
+        with self._stats_lock:
+            self._stats = {
+                'enqueued': 0,
+                'written': 0,
+                'retries': 0,
+                'dead_lettered': 0,
+                'rejected': 0,
+                'batches': 0,
+                'last_commit_lag_ms': 0.0,
+                'max_commit_lag_ms': 0.0
+            }
+
+    def _drain(self, block=True):
+        """Collect up to batch_size items, waiting at most flush_interval_ms"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval_ms / 1000
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if block and remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        """Hand a batch to the writer, retrying and dead-lettering on failure"""
+        items = [item for _, item in batch]
+        written = self._write_with_retry(items)
+        if written is None:
+            written = self._write_each(items)
+        if not written:
+            return
+        
+        lag_ms = round((time.monotonic() - batch[0][0]) * 1000, 1)
+        with self._stats_lock:
+            self._stats['written'] += written
+            self._stats['batches'] += 1
+            self._stats['last_commit_lag_ms'] = lag_ms
+            self._stats['max_commit_lag_ms'] = max(self._stats['max_commit_lag_ms'], lag_ms)
+
+    def _write_with_retry(self, items):
+        """Group-commit the batch; None if every attempt failed"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self._app.app_context():
+                    self._writer(items)
+                return len(items)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"❌ Failed to write {len(items)} queued attendance records "
+                          f"after {attempt + 1} attempts: {e}")
+                    return None
+                with self._stats_lock:
+                    self._stats['retries'] += 1
+                time.sleep(self.retry_backoff_ms / 1000 * 2 ** attempt)
+
+    def _write_each(self, items):
+        """Write rows one at a time so one bad row cannot sink the rest"""
+        written = 0
+        failed = []
+        for item in items:
+            try:
+                with self._app.app_context():
+                    self._writer([item])
+                written += 1
+            except Exception as e:
+                print(f"❌ Dead-lettering attendance for student {item[1].get('student_id')}: {e}")
+                failed.append(item)
+        
+        if failed:
+            self.dead_letter.append(failed)
+            with self._stats_lock:
+                self._stats['dead_lettered'] += len(failed)
+        return written
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._drain()
+            if batch:
+                self._write(batch)
+        self.flush()
+
+
+attendance_queue = AttendanceWriteQueue()
+atexit.register(attendance_queue.stop)
@@ -2,16 +2,36 @@
 Attendance Management Service
 Business logic for attendance operations
 """
+import heapq
 from datetime import datetime, timedelta
-from src.models import db, Attendance, Student
+from src.models import db, Attendance, ArchivedAttendance, Student
+from src.services.archive_service import archived_ranges
+from src.services.nfc_service import tag_cache, CachedStudent
+from src.services.scan_index import scan_index, DUPLICATE_WINDOW
+from src.services.attendance_queue import attendance_queue, QueueFullError
+from src.services.rollup_service import RollupService
+from src.services.scan_feed import scan_feed
+from src.services.counter_service import CounterService
+from src.utils.batching import chunked, IN_CLAUSE_CHUNK
+from src.utils.pagination import encode_cursor, decode_cursor, parse_limit, InvalidCursorError
+from src.utils.validators import validate_scan_uuid, parse_device_timestamp
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import with_expression
 
 
 class AttendanceService:
     """Service class for attendance management"""
     
+    # Column order of iter_export_rows
+    EXPORT_COLUMNS = [
+        'id', 'timestamp', 'register_number', 'student_name', 'section',
+        'subject', 'date', 'class_time', 'recorded_by'
+    ]
+    
     @staticmethod
-    def record_attendance(student_id, faculty_name, section=None, subject=None):
+    def record_attendance(student_id, faculty_name, section=None, subject=None, date=None, class_time=None,
+                          student=None):
         """
         Record attendance for a student
         
@@ -20,47 +40,627 @@ class AttendanceService:
             faculty_name: Name of the faculty recording attendance
             section: Section (e.g., S-01, S-02)
             subject: Subject name
+            date: Date of class (YYYY-MM-DD)
+            class_time: Class time slot (e.g., 09:00-09:50)
+            student: Already resolved student (e.g., from NFCService.resolve_tag),
+                     skips the lookup by ID
             
         Returns:
             tuple: (success, message_or_attendance)
         """
         try:
             # Verify student exists
-            student = Student.query.get(student_id)
-            if not student:
-                return False, "Student not found"
+            if student is None:
+                student = Student.query.get(student_id)
+                if not student:
+                    return False, "Student not found"
             
-            # Check if already marked today (prevent duplicates within 1 hour)
-            one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-            recent_attendance = Attendance.query.filter(
-                Attendance.student_id == student_id,
-                Attendance.timestamp >= one_hour_ago
-            ).first()
-            
-            if recent_attendance:
-                return False, f"Attendance already recorded for {student.name} at {recent_attendance.timestamp.strftime('%H:%M:%S')}"
+            # Check if already marked recently (prevent duplicates within 1 hour)
+            now = datetime.utcnow()
+            recent = AttendanceService._claim_scan(student_id, now)
+            if recent:
+                return False, f"Attendance already recorded for {student.name} at {recent.strftime('%H:%M:%S')}"
             
             # Create attendance record
             attendance = Attendance(
                 student_id=student_id,
+                timestamp=now,
                 recorded_by=faculty_name,
                 section=section,
-                subject=subject
+                subject=subject,
+                date=date,
+                class_time=class_time
             )
             
-            db.session.add(attendance)
-            db.session.commit()
+            try:
+                AttendanceService._insert([attendance])
+                db.session.flush()
+                record = AttendanceService._serialize_new(attendance, student)
+                db.session.commit()
+            except Exception:
+                scan_index.release(student_id, now)
+                raise
             
-            return True, attendance
+            scan_feed.publish([record])
+            return True, attendance.attach_student(student)
             
         except Exception as e:
             db.session.rollback()
             return False, f"Error recording attendance: {str(e)}"
     
+    @staticmethod
+    def enqueue_attendance(student_id, faculty_name, section=None, subject=None, date=None, class_time=None,
+                           student=None):
+        """
+        Validate a scan and hand it to the write-behind queue
+        
+        The scan is checked against the duplicate window immediately, so the
+        caller can acknowledge it before the background writer commits it.
+        
+        Args:
+            Same as record_attendance
+            
+        Returns:
+            tuple: (success, serialized_attendance_or_error)
+            
+        Raises:
+            QueueFullError: If the queue is at capacity
+        """
+        if student is None:
+            student = Student.query.get(student_id)
+            if not student:
+                return False, "Student not found"
+        
+        now = datetime.utcnow()
+        recent = AttendanceService._claim_scan(student_id, now)
+        if recent:
+            return False, f"Attendance already recorded for {student.name} at {recent.strftime('%H:%M:%S')}"
+        
+        record = {
+            'id': None,
+            'student_id': student_id,
+            'student_name': student.name,
+            'register_number': student.register_number,
+            'timestamp': now.isoformat(),
+            'recorded_by': faculty_name,
+            'section': section,
+            'subject': subject,
+            'date': date,
+            'class_time': class_time
+        }
+        
+        try:
+            attendance_queue.submit((now, record))
+        except QueueFullError:
+            scan_index.release(student_id, now)
+            raise
+        
+        return True, record
+    
+    @staticmethod
+    def write_queued(items):
+        """
+        Commit a batch of queued scans in one transaction (writer thread)
+        
+        The scans were already acknowledged, so their duplicate-window claims
+        are kept on failure; the queue retries or dead-letters them.
+        
+        Args:
+            items: List of (timestamp, serialized_attendance) tuples
+        """
+        try:
+            attendances = [
+                Attendance(
+                    student_id=record['student_id'],
+                    timestamp=timestamp,
+                    recorded_by=record['recorded_by'],
+                    section=record['section'],
+                    subject=record['subject'],
+                    date=record['date'],
+                    class_time=record['class_time']
+                )
+                for timestamp, record in items
+            ]
+            AttendanceService._insert(attendances)
+            db.session.flush()
+            records = [
+                dict(record, id=attendance.id)
+                for attendance, (_, record) in zip(attendances, items)
+            ]
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        scan_feed.publish(records)
+    
+    @staticmethod
+    def _claim_scan(student_id, now):
+        """
+        Reserve the duplicate window for a new scan
+        
+        The recent-scan index answers this in memory; the database is only
+        probed when the index is not authoritative.
+        
+        Returns:
+            None if the scan may be recorded, otherwise the earlier scan time
+        """
+        recent = scan_index.claim(student_id, now)
+        if recent is None and not scan_index.authoritative:
+            recent = db.session.query(func.max(Attendance.timestamp)).filter(
+                Attendance.student_id == student_id,
+                Attendance.timestamp >= now - DUPLICATE_WINDOW
+            ).scalar()
+            if recent:
+                scan_index.release(student_id, now, previous=recent)
+        return recent
+    
+    @staticmethod
+    def record_attendance_batch(scans, faculty_name, section=None, subject=None, date=None, class_time=None):
+        """
+        Record attendance for many scans in one transaction
+        
+        Every scan is resolved with a single IN query, duplicates are checked
+        for the whole set against the recent-scan index (confirmed with a
+        single grouped query when the index is not authoritative), and all
+        new records are committed together.
+        
+        Args:
+            scans: List of dictionaries with 'nfc_tag_id' or 'student_id'.
+                   A scan may override faculty_name, section, subject,
+                   date and time.
+            faculty_name: Default faculty name
+            section: Default section
+            subject: Default subject
+            date: Default date of class (YYYY-MM-DD)
+            class_time: Default class time slot
+            
+        Returns:
+            List of per-scan result dictionaries, in input order. Each has
+            'index' and 'success', plus 'attendance' (serialized record)
+            on success or 'error' on failure.
+        """
+        results = [None] * len(scans)
+        claimed = []
+        
+        for idx, scan in enumerate(scans):
+            error = AttendanceService._check_scan_shape(scan)
+            if error:
+                results[idx] = {'index': idx, 'success': False, 'error': error}
+        
+        try:
+            by_id, by_tag = AttendanceService._resolve_students(
+                [scan for idx, scan in enumerate(scans) if results[idx] is None]
+            )
+            
+            # Confirm the duplicate window for the whole set at once when
+            # the recent-scan index cannot be trusted on its own
+            now = datetime.utcnow()
+            last_seen = {}
+            if not scan_index.authoritative:
+                for chunk in chunked(list(by_id), IN_CLAUSE_CHUNK):
+                    rows = db.session.query(
+                        Attendance.student_id, func.max(Attendance.timestamp)
+                    ).filter(
+                        Attendance.student_id.in_(chunk),
+                        Attendance.timestamp >= now - DUPLICATE_WINDOW
+                    ).group_by(Attendance.student_id).all()
+                    last_seen.update(rows)
+            
+            pending = []
+            for idx, scan in enumerate(scans):
+                if results[idx] is not None:
+                    continue
+                
+                student, error = AttendanceService._match_student(scan, by_id, by_tag)
+                if error:
+                    results[idx] = {'index': idx, 'success': False, 'error': error}
+                    continue
+                
+                recent = last_seen.get(student.id)
+                if recent:
+                    scan_index.record(student.id, recent)
+                else:
+                    # Later scans of the same student in this batch hit the claim
+                    recent = scan_index.claim(student.id, now)
+                if recent:
+                    results[idx] = {
+                        'index': idx,
+                        'success': False,
+                        'error': f"Attendance already recorded for {student.name} at {recent.strftime('%H:%M:%S')}"
+                    }
+                    continue
+                claimed.append(student.id)
+                
+                attendance = AttendanceService._build_attendance(
+                    scan, student, now, faculty_name, section, subject, date, class_time
+                )
+                pending.append((idx, attendance, student))
+            
+            if pending:
+                AttendanceService._insert([attendance for _, attendance, _ in pending])
+                db.session.flush()
+                
+                # Serialize before commit so the committed rows are not reloaded one by one
+                for idx, attendance, student in pending:
+                    record = AttendanceService._serialize_new(attendance, student)
+                    results[idx] = {'index': idx, 'success': True, 'attendance': record}
+                
+                db.session.commit()
+                scan_feed.publish([results[idx]['attendance'] for idx, _, _ in pending])
+            
+            return results
+            
+        except Exception as e:
+            db.session.rollback()
+            for student_id in claimed:
+                scan_index.release(student_id, now)
+            error = f"Error recording attendance: {str(e)}"
+            return [
+                {'index': idx, 'success': False, 'error': result['error'] if result and not result['success'] else error}
+                for idx, result in enumerate(results)
+            ]
+    
+    @staticmethod
+    def sync_scans(scans, faculty_name, section=None, subject=None, date=None, class_time=None):
+        """
+        Ingest an offline scan journal idempotently
+        
+        Each scan carries a client-generated 'scan_uuid' and the device
+        'scanned_at' time. Scans whose UUID is already stored are reported
+        as duplicates without being written again, so a client can retry a
+        sync any number of times. Records keep the device timestamp, and
+        the duplicate window is applied around it rather than around now.
+        
+        Args:
+            scans: List of dictionaries with 'scan_uuid', 'scanned_at' and
+                   'nfc_tag_id' or 'student_id'. A scan may override
+                   faculty_name, section, subject, date and time.
+            faculty_name: Default faculty name
+            section: Default section
+            subject: Default subject
+            date: Default date of class (YYYY-MM-DD)
+            class_time: Default class time slot
+            
+        Returns:
+            List of per-scan result dictionaries, in input order. Each has
+            'scan_uuid', 'success' and 'status' ('recorded', 'duplicate' or
+            'rejected'), plus 'attendance' or 'error'.
+        """
+        # A concurrent sync of the same journal can win the unique index
+        # race; the retry then reports those scans as duplicates.
+        for attempt in range(2):
+            try:
+                return AttendanceService._sync_scans_once(
+                    scans, faculty_name, section, subject, date, class_time
+                )
+            except IntegrityError:
+                db.session.rollback()
+                if attempt:
+                    raise
+    
+    @staticmethod
+    def _sync_scans_once(scans, faculty_name, section, subject, date, class_time):
+        """Single attempt of sync_scans; raises IntegrityError on a UUID race"""
+        results = [None] * len(scans)
+        timestamps = {}
+        
+        def reject(idx, scan_uuid, error):
+            results[idx] = {'scan_uuid': scan_uuid, 'success': False, 'status': 'rejected', 'error': error}
+        
+        for idx, scan in enumerate(scans):
+            error = AttendanceService._check_scan_shape(scan)
+            if error:
+                reject(idx, scan.get('scan_uuid') if isinstance(scan, dict) else None, error)
+                continue
+            
+            is_valid, error = validate_scan_uuid(scan.get('scan_uuid'))
+            if not is_valid:
+                reject(idx, scan.get('scan_uuid'), error)
+                continue
+            
+            timestamp, error = parse_device_timestamp(scan.get('scanned_at'))
+            if error:
+                reject(idx, scan['scan_uuid'], error)
+                continue
+            timestamps[idx] = timestamp
+        
+        # Scans already stored by an earlier sync (old journals may already be archived)
+        uuids = [scans[idx]['scan_uuid'] for idx in timestamps]
+        sources = AttendanceService._sources(
+            min(timestamps.values()) - DUPLICATE_WINDOW, max(timestamps.values()) + DUPLICATE_WINDOW
+        ) if timestamps else (Attendance,)
+        stored = {}
+        for model in sources:
+            for chunk in chunked(uuids, IN_CLAUSE_CHUNK):
+                rows = db.session.query(model.scan_uuid, model.id).filter(
+                    model.scan_uuid.in_(chunk)
+                ).all()
+                stored.update(rows)
+        
+        candidates = []
+        seen_uuids = set()
+        for idx, timestamp in timestamps.items():
+            scan_uuid = scans[idx]['scan_uuid']
+            if scan_uuid in stored or scan_uuid in seen_uuids:
+                results[idx] = {
+                    'scan_uuid': scan_uuid,
+                    'success': True,
+                    'status': 'duplicate',
+                    'attendance_id': stored.get(scan_uuid)
+                }
+                continue
+            seen_uuids.add(scan_uuid)
+            candidates.append(idx)
+        
+        by_id, by_tag = AttendanceService._resolve_students([scans[idx] for idx in candidates])
+        
+        matched = []
+        for idx in candidates:
+            student, error = AttendanceService._match_student(scans[idx], by_id, by_tag)
+            if error:
+                reject(idx, scans[idx]['scan_uuid'], error)
+                continue
+            matched.append((idx, student))
+        
+        # Existing scans around the device timestamps, in one query per chunk
+        history = {}
+        if matched:
+            earliest = min(timestamps[idx] for idx, _ in matched) - DUPLICATE_WINDOW
+            latest = max(timestamps[idx] for idx, _ in matched) + DUPLICATE_WINDOW
+            for model in sources:
+                for chunk in chunked({student.id for _, student in matched}, IN_CLAUSE_CHUNK):
+                    rows = db.session.query(model.student_id, model.timestamp).filter(
+                        model.student_id.in_(chunk),
+                        model.timestamp >= earliest,
+                        model.timestamp <= latest
+                    ).all()
+                    for student_id, timestamp in rows:
+                        history.setdefault(student_id, []).append(timestamp)
+        
+        # Scans this recent can collide with a live /record still in flight,
+        # so they reserve the duplicate window like record_attendance does
+        claim_after = datetime.utcnow() - DUPLICATE_WINDOW
+        claimed = []
+        pending = []
+        try:
+            for idx, student in sorted(matched, key=lambda item: timestamps[item[0]]):
+                timestamp = timestamps[idx]
+                recent = next(
+                    (t for t in history.get(student.id, []) if abs(t - timestamp) < DUPLICATE_WINDOW),
+                    None
+                )
+                if recent is None and timestamp >= claim_after:
+                    recent = scan_index.claim(student.id, timestamp)
+                    if recent is None:
+                        claimed.append((student.id, timestamp))
+                if recent:
+                    reject(
+                        idx,
+                        scans[idx]['scan_uuid'],
+                        f"Attendance already recorded for {student.name} at {recent.strftime('%H:%M:%S')}"
+                    )
+                    continue
+                history.setdefault(student.id, []).append(timestamp)
+                
+                attendance = AttendanceService._build_attendance(
+                    scans[idx], student, timestamp, faculty_name, section, subject, date, class_time
+                )
+                attendance.scan_uuid = scans[idx]['scan_uuid']
+                pending.append((idx, attendance, student))
+            
+            if pending:
+                AttendanceService._insert([attendance for _, attendance, _ in pending])
+                db.session.flush()
+                
+                for idx, attendance, student in pending:
+                    results[idx] = {
+                        'scan_uuid': attendance.scan_uuid,
+                        'success': True,
+                        'status': 'recorded',
+                        'attendance': AttendanceService._serialize_new(attendance, student)
+                    }
+                
+                db.session.commit()
+        except Exception:
+            for student_id, timestamp in claimed:
+                scan_index.release(student_id, timestamp)
+            raise
+        
+        if pending:
+            for _, attendance, _ in pending:
+                scan_index.record(attendance.student_id, attendance.timestamp)
+            scan_feed.publish([results[idx]['attendance'] for idx, _, _ in pending])
+        
+        return results
+    
+    @staticmethod
+    def _insert(attendances):
+        """
+        Add new attendance rows to the session with their derived data
+        
+        Every insert path goes through here so that the daily rollups and
+        attendance counters are updated in the same transaction as the
+        records themselves.
+        """
+        RollupService.apply(attendances)
+        CounterService.apply(attendances)
+        db.session.add_all(attendances)
+    
+    @staticmethod
+    def _check_scan_shape(scan):
+        """Return an error message if a scan entry cannot identify a student"""
+        if not isinstance(scan, dict):
+            return 'Invalid scan entry'
+        try:
+            student_id = AttendanceService._scan_student_id(scan)
+        except ValueError:
+            return 'student_id must be an integer'
+        if student_id is None and not scan.get('nfc_tag_id'):
+            return 'student_id or nfc_tag_id is required'
+        return None
+    
+    @staticmethod
+    def _scan_student_id(scan):
+        """
+        A scan's student_id as an int ("5" is how JSON clients often send it)
+        
+        Returns:
+            int, or None when the scan has no student_id
+            
+        Raises:
+            ValueError: If student_id is not an integer
+        """
+        value = scan.get('student_id')
+        if value is None or value == '':
+            return None
+        if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+            raise ValueError('student_id must be an integer')
+        try:
+            return int(value)
+        except TypeError:
+            raise ValueError('student_id must be an integer')
+    
+    @staticmethod
+    def _resolve_students(scans):
+        """
+        Resolve the students referenced by a set of scans
+        
+        Tags are served from the tag cache where possible; everything else
+        is fetched with one IN query per chunk.
+        
+        Returns:
+            tuple: (students_by_id, students_by_tag) of CachedStudent
+        """
+        by_id = {}
+        by_tag = {}
+        student_ids = set()
+        tag_ids = set()
+        
+        for scan in scans:
+            student_id = AttendanceService._scan_student_id(scan)
+            if student_id is not None:
+                student_ids.add(student_id)
+            else:
+                tag = str(scan['nfc_tag_id']).strip()
+                cached = tag_cache.get(tag)
+                if cached is not None:
+                    by_tag[tag] = cached
+                    by_id[cached.id] = cached
+                else:
+                    tag_ids.add(tag)
+        student_ids -= set(by_id)
+        
+        lookups = [('id', i) for i in student_ids] + [('tag', t) for t in tag_ids]
+        for chunk in chunked(lookups, IN_CLAUSE_CHUNK):
+            ids = [value for kind, value in chunk if kind == 'id']
+            tags = [value for kind, value in chunk if kind == 'tag']
+            rows = db.session.query(
+                Student.id, Student.name, Student.register_number, Student.nfc_tag_id
+            ).filter(db.or_(Student.id.in_(ids), Student.nfc_tag_id.in_(tags))).all()
+            for row in rows:
+                student = CachedStudent(row.id, row.name, row.register_number)
+                by_id[row.id] = student
+                if row.nfc_tag_id:
+                    by_tag[row.nfc_tag_id] = student
+                    tag_cache.set(row.nfc_tag_id, student)
+        
+        return by_id, by_tag
+    
+    @staticmethod
+    def _match_student(scan, by_id, by_tag):
+        """
+        Find the resolved student for one scan
+        
+        Returns:
+            tuple: (student_or_None, error_or_None)
+        """
+        student_id = AttendanceService._scan_student_id(scan)
+        if student_id is not None:
+            student = by_id.get(student_id)
+            return (student, None) if student else (None, 'Student not found')
+        student = by_tag.get(str(scan['nfc_tag_id']).strip())
+        return (student, None) if student else (None, 'No student found with this NFC tag')
+    
+    @staticmethod
+    def _build_attendance(scan, student, timestamp, faculty_name, section, subject, date, class_time):
+        """Create an Attendance row, letting the scan override batch defaults"""
+        return Attendance(
+            student_id=student.id,
+            timestamp=timestamp,
+            recorded_by=scan.get('faculty_name') or faculty_name,
+            section=scan.get('section', section),
+            subject=scan.get('subject', subject),
+            date=scan.get('date', date),
+            class_time=scan.get('time', class_time)
+        )
+    
+    @staticmethod
+    def _serialize_new(attendance, student):
+        """Serialize a flushed record without reloading it or its student"""
+        return {
+            'id': attendance.id,
+            'student_id': student.id,
+            'student_name': student.name,
+            'register_number': student.register_number,
+            'timestamp': attendance.timestamp.isoformat(),
+            'recorded_by': attendance.recorded_by,
+            'section': attendance.section,
+            'subject': attendance.subject,
+            'date': attendance.date,
+            'class_time': attendance.class_time
+        }
+    
+    @staticmethod
+    def _with_student(query, model=Attendance):
+        """Load the student's name and register number in the same SELECT"""
+        return query.join(Student, model.student_id == Student.id).options(
+            with_expression(model.student_name, Student.name),
+            with_expression(model.student_register_number, Student.register_number)
+        )
+    
+    @staticmethod
+    def _sources(start=None, end=None):
+        """
+        Models to read for records in [start, end): the hot table, plus the
+        archive when the range touches an archived semester
+        """
+        if archived_ranges.overlaps(start, end):
+            return (Attendance, ArchivedAttendance)
+        return (Attendance,)
+    
+    @staticmethod
+    def _newest_first(build_query, limit=None):
+        """
+        Newest records from the hot table, topped up from the archive
+        
+        The archive is only read when the hot rows found could be older
+        than archived ones, i.e. never for a full page of current-term scans.
+        
+        Args:
+            build_query: Callable returning the filtered query for a model
+            limit: Maximum number of records, optional
+        """
+        def fetch(model):
+            query = AttendanceService._with_student(build_query(model), model).order_by(
+                model.timestamp.desc(), model.id.desc()
+            )
+            return (query.limit(limit) if limit else query).all()
+        
+        records = fetch(Attendance)
+        archived_before = archived_ranges.latest_end()
+        if archived_before is None:
+            return records
+        if limit and len(records) >= limit and records[-1].timestamp >= archived_before:
+            return records
+        
+        records = sorted(records + fetch(ArchivedAttendance), key=lambda r: (r.timestamp, r.id), reverse=True)
+        return records[:limit] if limit else records
+    
     @staticmethod
     def get_attendance_by_student(student_id, limit=None):
         """
-        Get attendance records for a student
+        Get attendance records for a student, including archived semesters
         
         Args:
             student_id: ID of the student
@@ -69,12 +669,9 @@ class AttendanceService:
         Returns:
             List of attendance records
         """
-        query = Attendance.query.filter_by(student_id=student_id).order_by(Attendance.timestamp.desc())
-        
-        if limit:
-            query = query.limit(limit)
-        
-        return query.all()
+        return AttendanceService._newest_first(
+            lambda model: model.query.filter(model.student_id == student_id), limit
+        )
     
     @staticmethod
     def get_recent_attendance(limit=50):
@@ -87,7 +684,7 @@ class AttendanceService:
         Returns:
             List of attendance records
         """
-        return Attendance.query.order_by(Attendance.timestamp.desc()).limit(limit).all()
+        return AttendanceService._newest_first(lambda model: model.query, limit)
     
     @staticmethod
     def get_attendance_by_date(date=None):
@@ -100,37 +697,215 @@ class AttendanceService:
         Returns:
             List of attendance records
         """
+        records = []
+        for model in AttendanceService._sources(*AttendanceService._day_range(date)):
+            records += AttendanceService._with_student(
+                AttendanceService._by_date_query(date, model), model
+            ).order_by(model.timestamp.desc()).all()
+        
+        if len(records) > 1:
+            records.sort(key=lambda r: (r.timestamp, r.id), reverse=True)
+        return records
+    
+    @staticmethod
+    def get_section_roster(section, date=None, subject=None, class_time=None):
+        """
+        Get every student in a section with their attendance for one class
+        
+        Computed with a single outer join from students to the matching
+        attendance rows, grouped per student (one more for an archived day).
+        
+        Args:
+            section: Student section
+            date: Class date (defaults to today); scans without a recorded
+                class date are matched on their timestamp instead
+            subject: Subject filter, optional
+            class_time: Class time slot filter, optional
+            
+        Returns:
+            List of dicts with id, name, register_number, present and scanned_at
+        """
+        if date is None:
+            date = datetime.utcnow().date()
+        
+        start_of_day = datetime.combine(date, datetime.min.time())
+        rows = None
+        for model in AttendanceService._sources(*AttendanceService._day_range(date)):
+            conditions = [
+                model.student_id == Student.id,
+                db.or_(
+                    model.date == date.isoformat(),
+                    db.and_(
+                        model.date.is_(None),
+                        model.timestamp >= start_of_day,
+                        model.timestamp < start_of_day + timedelta(days=1)
+                    )
+                )
+            ]
+            if subject:
+                conditions.append(model.subject == subject)
+            if class_time:
+                conditions.append(model.class_time == class_time)
+            
+            source_rows = db.session.query(
+                Student.id,
+                Student.name,
+                Student.register_number,
+                func.min(model.timestamp)
+            ).outerjoin(model, db.and_(*conditions)).filter(
+                Student.section == section
+            ).group_by(
+                Student.id, Student.name, Student.register_number
+            ).order_by(Student.register_number).all()
+            
+            if rows is None:
+                rows = source_rows
+            else:
+                # Same students in the same order; keep the earliest scan of either table
+                rows = [
+                    (sid, name, number, min((t for t in (first, second) if t is not None), default=None))
+                    for (sid, name, number, first), (_, _, _, second) in zip(rows, source_rows)
+                ]
+        
+        return [{
+            'id': student_id,
+            'name': name,
+            'register_number': register_number,
+            'present': scanned_at is not None,
+            'scanned_at': scanned_at.isoformat() if scanned_at else None
+        } for student_id, name, register_number, scanned_at in rows]
+    
+    @staticmethod
+    def get_attendance_by_date_page(date=None, cursor=None, limit=None):
+        """
+        Get one page of a day's attendance ordered by (timestamp, id) descending
+        
+        Args:
+            date: Date object (defaults to today)
+            cursor: Cursor returned with the previous page (optional)
+            limit: Page size, capped at MAX_PAGE_LIMIT
+            
+        Returns:
+            tuple: (records, next_cursor_or_None)
+            
+        Raises:
+            InvalidCursorError: If the cursor is malformed
+        """
+        limit = parse_limit(limit)
+        if cursor:
+            timestamp, attendance_id = decode_cursor(cursor, (str, int))
+            try:
+                after = (datetime.fromisoformat(timestamp), attendance_id)
+            except ValueError:
+                raise InvalidCursorError("Invalid cursor")
+        
+        records = []
+        sources = AttendanceService._sources(*AttendanceService._day_range(date))
+        for model in sources:
+            query = AttendanceService._with_student(AttendanceService._by_date_query(date, model), model)
+            if cursor:
+                query = query.filter(db.tuple_(model.timestamp, model.id) < after)
+            records += query.order_by(model.timestamp.desc(), model.id.desc()).limit(limit + 1).all()
+        
+        # Rows of a half-archived day interleave across both tables
+        if len(sources) > 1:
+            records = sorted(records, key=lambda r: (r.timestamp, r.id), reverse=True)[:limit + 1]
+        
+        next_cursor = None
+        if len(records) > limit:
+            records = records[:limit]
+            next_cursor = encode_cursor([records[-1].timestamp.isoformat(), records[-1].id])
+        
+        return records, next_cursor
+    
+    @staticmethod
+    def iter_export_rows(start=None, end=None, section=None, subject=None, batch_size=1000):
+        """
+        Stream attendance rows for an export without building ORM objects
+        
+        Rows are fetched with a column projection through a server-side
+        cursor (yield_per), so memory stays flat regardless of the range.
+        Ranges reaching into archived semesters merge both tables in order.
+        
+        Args:
+            start: First date (inclusive), optional
+            end: Last date (inclusive), optional
+            section: Section filter, optional
+            subject: Subject filter, optional
+            batch_size: Rows fetched per round trip
+            
+        Yields:
+            Tuples in EXPORT_COLUMNS order
+        """
+        start = datetime.combine(start, datetime.min.time()) if start else None
+        end = datetime.combine(end + timedelta(days=1), datetime.min.time()) if end else None
+        
+        def rows(model):
+            query = db.session.query(
+                model.id,
+                model.timestamp,
+                Student.register_number,
+                Student.name,
+                model.section,
+                model.subject,
+                model.date,
+                model.class_time,
+                model.recorded_by
+            ).join(Student, model.student_id == Student.id)
+            
+            if start:
+                query = query.filter(model.timestamp >= start)
+            if end:
+                query = query.filter(model.timestamp < end)
+            if section:
+                query = query.filter(model.section == section)
+            if subject:
+                query = query.filter(model.subject == subject)
+            
+            for row in query.order_by(model.timestamp, model.id).yield_per(batch_size):
+                yield tuple(row)
+        
+        sources = AttendanceService._sources(start, end)
+        if len(sources) == 1:
+            yield from rows(sources[0])
+        else:
+            yield from heapq.merge(*(rows(model) for model in sources), key=lambda row: (row[1], row[0]))
+    
+    @staticmethod
+    def _day_range(date):
+        """[start, end) datetimes of one day (defaults to today)"""
+        if date is None:
+            date = datetime.utcnow().date()
+        start_of_day = datetime.combine(date, datetime.min.time())
+        return start_of_day, start_of_day + timedelta(days=1)
+    
+    @staticmethod
+    def _by_date_query(date, model=Attendance):
+        """Build the query for one day's attendance (defaults to today)"""
         if date is None:
             date = datetime.utcnow().date()
         
         start_of_day = datetime.combine(date, datetime.min.time())
         end_of_day = datetime.combine(date, datetime.max.time())
         
-        return Attendance.query.filter(
-            Attendance.timestamp >= start_of_day,
-            Attendance.timestamp <= end_of_day
-        ).order_by(Attendance.timestamp.desc()).all()
+        return model.query.filter(
+            model.timestamp >= start_of_day,
+            model.timestamp <= end_of_day
+        )
     
     @staticmethod
     def get_attendance_stats():
         """
         Get attendance statistics
         
+        Attendance counts are read from the daily rollups instead of
+        scanning the attendance table.
+        
         Returns:
             Dictionary with statistics
         """
         total_students = Student.query.count()
-        total_records = Attendance.query.count()
-        
-        # Today's attendance
-        today = datetime.utcnow().date()
-        start_of_day = datetime.combine(today, datetime.min.time())
-        today_count = Attendance.query.filter(Attendance.timestamp >= start_of_day).count()
-        
-        # Unique students who attended today
-        today_students = db.session.query(Attendance.student_id).filter(
-            Attendance.timestamp >= start_of_day
-        ).distinct().count()
+        total_records, today_count, today_students = RollupService.get_totals(datetime.utcnow().date())
         
         return {
             'total_students': total_students,
@@ -139,3 +914,19 @@ class AttendanceService:
             'today_unique_students': today_students,
             'today_percentage': round((today_students / total_students * 100) if total_students > 0 else 0, 2)
         }
+    
+    @staticmethod
+    def get_daily_summary(start=None, end=None, section=None, subject=None):
+        """
+        Get per-day attendance counts from the daily rollups
+        
+        Args:
+            start: First date (inclusive), optional
+            end: Last date (inclusive), optional
+            section: Section filter, optional
+            subject: Subject filter, optional
+            
+        Returns:
+            List of rollup dictionaries (date, section, subject, scans, unique_students)
+        """
+        return [row.to_dict() for row in RollupService.get_daily(start, end, section, subject)]
@@ -0,0 +1,255 @@
+"""
+Attendance Counter Service
+Maintains per-student, per-subject attendance counts and the number of
+class sessions held, so percentages never aggregate raw attendance rows
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import String, cast, func
+from src.models import db, Attendance, Student, StudentAttendanceCounter, ClassSessionCounter
+from src.services.archive_service import attendance_history
+from src.utils.batching import chunked, IN_CLAUSE_CHUNK
+from src.utils.upsert import key_values, upsert_increment
+
+
+def _session_key(section, subject, date, class_time, timestamp):
+    """(section, subject, class date, time slot) identifying one class session"""
+    return (*key_values(section, subject), date or timestamp.date().isoformat(), class_time or '')
+
+
+def _matches(column, value):
+    """Filter a key column that may be stored as NULL or '' when not recorded"""
+    if value:
+        return column == value
+    return db.or_(column.is_(None), column == '')
+
+
+def _in_session(key):
+    """Filter attendance rows belonging to one class session key"""
+    section, subject, day, class_time = key
+    same_day = Attendance.date == day
+    try:
+        start = datetime.strptime(day, '%Y-%m-%d')
+    except ValueError:
+        pass
+    else:
+        # Rows without a class date belong to the day they were scanned
+        same_day = db.or_(same_day, db.and_(
+            Attendance.date.is_(None), Attendance.timestamp >= start, Attendance.timestamp < start + timedelta(days=1)
+        ))
+    return db.and_(
+        _matches(Attendance.section, section),
+        _matches(Attendance.subject, subject),
+        _matches(Attendance.class_time, class_time),
+        same_day
+    )
+
+
+def _any(*criteria):
+    """EXISTS probe on the attendance table"""
+    return db.session.query(db.session.query(Attendance.id).filter(*criteria).exists()).scalar()
+
+
+def _percentage(attended, sessions):
+    """Attendance percentage rounded to one decimal, None before any session"""
+    if not sessions:
+        return None
+    return round(100.0 * attended / sessions, 1)
+
+
+class CounterService:
+    """
+    Service class for attendance counters
+
+    A session is one (section, subject, class date, time slot); a student
+    attends it at most once however many times they are scanned.
+    """
+
+    @staticmethod
+    def apply(attendances):
+        """
+        Add new attendance records to the counters
+
+        Must be called in the transaction that inserts the records, before
+        they are flushed.
+
+        Args:
+            attendances: Attendance objects about to be inserted
+        """
+        if not attendances:
+            return
+
+        with db.session.no_autoflush:
+            # Session key -> already has scans; (session key, student) -> already attended.
+            # Probed once each with EXISTS, then tracked across the batch
+            held = {}
+            attended = {}
+            sessions = {}
+            students = {}
+            for a in attendances:
+                key = _session_key(a.section, a.subject, a.date, a.class_time, a.timestamp)
+                visit = (key, a.student_id)
+                if key not in held:
+                    held[key] = _any(_in_session(key))
+                if visit not in attended:
+                    attended[visit] = held[key] and _any(_in_session(key), Attendance.student_id == a.student_id)
+
+                class_key = key[:2]
+                student_key = (a.student_id, *class_key)
+
+                count, latest = sessions.get(class_key, (0, a.timestamp))
+                sessions[class_key] = (count + (0 if held[key] else 1), max(latest, a.timestamp))
+                held[key] = True
+
+                count, latest = students.get(student_key, (0, a.timestamp))
+                students[student_key] = (count + (0 if attended[visit] else 1), max(latest, a.timestamp))
+                attended[visit] = True
+
+        CounterService._upsert(ClassSessionCounter, ('section', 'subject'), 'sessions', 'last_held', sessions)
+        CounterService._upsert(
+            StudentAttendanceCounter, ('student_id', 'section', 'subject'), 'attended', 'last_seen', students
+        )
+
+    @staticmethod
+    def remove_student(student_id):
+        """
+        Drop a student's counters before the student is deleted
+
+        Sessions held are left as they are.
+
+        Args:
+            student_id: ID of the student being deleted
+        """
+        StudentAttendanceCounter.query.filter_by(student_id=student_id).delete()
+
+    @staticmethod
+    def rebuild():
+        """
+        Recompute all counters from the attendance and archive tables (backfill)
+
+        Returns:
+            tuple: (student counter rows, session counter rows) written
+        """
+        history = attendance_history()
+        section = func.coalesce(history.c.section, '')
+        subject = func.coalesce(history.c.subject, '')
+        session = (
+            func.coalesce(history.c.date, cast(func.date(history.c.timestamp), String))
+            + '|' + func.coalesce(history.c.class_time, '')
+        )
+
+        per_student = db.session.query(
+            history.c.student_id, section, subject,
+            func.count(func.distinct(session)), func.max(history.c.timestamp)
+        ).group_by(history.c.student_id, section, subject).all()
+        per_class = db.session.query(
+            section, subject, func.count(func.distinct(session)), func.max(history.c.timestamp)
+        ).group_by(section, subject).all()
+
+        try:
+            StudentAttendanceCounter.query.delete()
+            ClassSessionCounter.query.delete()
+            student_rows = [
+                {'student_id': sid, 'section': sec, 'subject': subj, 'attended': count, 'last_seen': last}
+                for sid, sec, subj, count, last in per_student
+            ]
+            class_rows = [
+                {'section': sec, 'subject': subj, 'sessions': count, 'last_held': last}
+                for sec, subj, count, last in per_class
+            ]
+            for chunk in chunked(student_rows, IN_CLAUSE_CHUNK):
+                db.session.execute(db.insert(StudentAttendanceCounter), chunk)
+            for chunk in chunked(class_rows, IN_CLAUSE_CHUNK):
+                db.session.execute(db.insert(ClassSessionCounter), chunk)
+            db.session.commit()
+            return len(student_rows), len(class_rows)
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @staticmethod
+    def get_student_summary(student_id):
+        """
+        Get a student's attendance percentage per (section, subject)
+
+        Args:
+            student_id: ID of the student
+
+        Returns:
+            dict: subjects list plus overall attended/sessions/percentage
+        """
+        rows = db.session.query(
+            StudentAttendanceCounter, ClassSessionCounter.sessions
+        ).outerjoin(
+            ClassSessionCounter, db.and_(
+                ClassSessionCounter.section == StudentAttendanceCounter.section,
+                ClassSessionCounter.subject == StudentAttendanceCounter.subject
+            )
+        ).filter(
+            StudentAttendanceCounter.student_id == student_id
+        ).order_by(StudentAttendanceCounter.subject, StudentAttendanceCounter.section).all()
+
+        subjects = [CounterService._summary_row(counter, sessions) for counter, sessions in rows]
+        attended = sum(row['attended'] for row in subjects)
+        held = sum(row['sessions'] for row in subjects)
+
+        return {
+            'student_id': student_id,
+            'subjects': subjects,
+            'overall': {'attended': attended, 'sessions': held, 'percentage': _percentage(attended, held)}
+        }
+
+    @staticmethod
+    def get_section_summary(section, subject=None):
+        """
+        Get attendance percentages for every student seen in a class section
+
+        Args:
+            section: Class section recorded with the scans
+            subject: Subject filter, optional
+
+        Returns:
+            List of per-student, per-subject summary dicts
+        """
+        query = db.session.query(
+            StudentAttendanceCounter, Student.name, Student.register_number, ClassSessionCounter.sessions
+        ).join(
+            Student, Student.id == StudentAttendanceCounter.student_id
+        ).outerjoin(
+            ClassSessionCounter, db.and_(
+                ClassSessionCounter.section == StudentAttendanceCounter.section,
+                ClassSessionCounter.subject == StudentAttendanceCounter.subject
+            )
+        ).filter(StudentAttendanceCounter.section == section)
+
+        if subject:
+            query = query.filter(StudentAttendanceCounter.subject == subject)
+
+        rows = query.order_by(Student.register_number, StudentAttendanceCounter.subject).all()
+
+        return [
+            dict(CounterService._summary_row(counter, sessions), name=name, register_number=register_number)
+            for counter, name, register_number, sessions in rows
+        ]
+
+    @staticmethod
+    def _summary_row(counter, sessions):
+        """Serialize one counter with its session total"""
+        sessions = sessions or 0
+        return {
+            'student_id': counter.student_id,
+            'section': counter.section or None,
+            'subject': counter.subject or None,
+            'attended': counter.attended,
+            'sessions': sessions,
+            'percentage': _percentage(counter.attended, sessions),
+            'last_seen': counter.last_seen.isoformat() if counter.last_seen else None
+        }
+
+    @staticmethod
+    def _upsert(model, key_columns, count_column, time_column, increments):
+        """Atomically add count deltas and advance the latest timestamp"""
+        upsert_increment(
+            model.__table__, key_columns,
+            {key: {count_column: delta, time_column: timestamp} for key, (delta, timestamp) in increments.items()},
+            latest=(time_column,)
+        )
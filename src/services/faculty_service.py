@@ -2,10 +2,68 @@
 Faculty Service
 Business logic for faculty authentication and management
 """
-from src.models import db, Faculty
-from datetime import datetime, timedelta
-import secrets
+from flask import current_app
+from src.models import db, Faculty, RevokedToken
+from src.utils.lru_cache import LRUCache
+from src.utils.tokens import sign_token, verify_token, InvalidTokenError
+from datetime import datetime, timedelta, timezone
 import random
+import threading
+import time
+
+REMEMBER_DURATION = timedelta(days=30)
+
+
+class RevokedTokens:
+    """
+    IDs of remember tokens logged out before their expiry
+
+    Shared between workers through the revoked_tokens table. Each process
+    caches the live IDs and reloads them after ``ttl`` seconds, so a logout
+    handled by another worker takes effect within ttl without a query per
+    verification; logouts in this process apply at once.
+    """
+
+    def __init__(self, ttl=5):
+        self.ttl = ttl
+        self._ids = frozenset()
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Read the unexpired revocations (needs an app context)"""
+        rows = db.session.query(RevokedToken.token_id).filter(RevokedToken.expires_at > datetime.utcnow()).all()
+        with self._lock:
+            self._ids = frozenset(token_id for token_id, in rows)
+            self._loaded_at = time.monotonic()
+
+    def add(self, token_id):
+        """Reject a token ID in this process without waiting for a reload"""
+        with self._lock:
+            self._ids = self._ids | {token_id}
+
+    def clear(self):
+        """Forget the cached IDs; the next lookup reloads them"""
+        with self._lock:
+            self._ids = frozenset()
+            self._loaded_at = None
+
+    def is_revoked(self, token_id):
+        """Whether a token ID has been logged out"""
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return token_id in self._ids
+        self.load()
+        with self._lock:
+            return token_id in self._ids
+
+
+# Process-wide revocations consulted by verify_remember_token
+revoked_tokens = RevokedTokens()
+
+# Faculty ID -> profile dict; update_sections invalidates entries in this
+# process and the TTL bounds staleness in other workers
+profile_cache = LRUCache(maxsize=1000, ttl=300)
 
 
 class FacultyService:
@@ -76,9 +134,12 @@ class FacultyService:
             # Generate remember token if requested
             token = None
             if remember_me:
-                token = secrets.token_urlsafe(32)
+                expires = datetime.utcnow() + REMEMBER_DURATION
+                token = sign_token(
+                    current_app.config['SECRET_KEY'], faculty.id, expires.replace(tzinfo=timezone.utc).timestamp()
+                )
                 faculty.remember_token = token
-                faculty.remember_expires = datetime.utcnow() + timedelta(days=30)
+                faculty.remember_expires = expires
             
             db.session.commit()
             
@@ -90,35 +151,84 @@ class FacultyService:
     
     @staticmethod
     def verify_remember_token(email, token):
-        """Verify remember me token"""
+        """
+        Verify remember me token
+        
+        Signature, expiry and revocation are checked in memory, and the
+        profile comes from a per-process cache, so the database is only
+        read on a profile cache miss or a revocation reload. Tokens issued
+        before signed tokens existed are still checked against the
+        remember_token column until they expire.
+        
+        Returns:
+            tuple: (success, faculty profile dict or error message)
+        """
         try:
-            faculty = Faculty.query.filter_by(email=email).first()
+            if isinstance(token, str) and '.' not in token:
+                return FacultyService._verify_legacy_token(email, token)
             
-            if not faculty:
-                return False, "Faculty not found"
+            try:
+                faculty_id, _, token_id = verify_token(current_app.config['SECRET_KEY'], token)
+            except InvalidTokenError as e:
+                return False, str(e)
             
-            if not faculty.remember_token or faculty.remember_token != token:
+            if revoked_tokens.is_revoked(token_id):
                 return False, "Invalid token"
             
-            # Check if token is expired
-            if faculty.remember_expires and faculty.remember_expires < datetime.utcnow():
-                return False, "Token expired. Please login again"
+            profile = profile_cache.get(faculty_id)
+            if profile is None:
+                faculty = db.session.get(Faculty, faculty_id)
+                if not faculty:
+                    return False, "Invalid token"
+                profile = faculty.to_dict()
+                profile_cache.set(faculty_id, profile)
             
-            return True, faculty
+            if profile['email'] != email:
+                return False, "Invalid token"
+            
+            return True, profile
             
         except Exception as e:
             return False, str(e)
     
     @staticmethod
-    def logout(email):
-        """Logout faculty and clear remember token"""
+    def logout(email, token=None):
+        """
+        Logout faculty and revoke remember tokens
+        
+        The token held by the client and the one stored on the account are
+        recorded in revoked_tokens, which every worker reloads.
+        
+        Args:
+            email: Faculty email
+            token: Remember token held by the client, optional
+        """
         try:
             faculty = Faculty.query.filter_by(email=email).first()
             
+            tokens = {token}
             if faculty:
+                tokens.add(faculty.remember_token)
                 faculty.remember_token = None
                 faculty.remember_expires = None
-                db.session.commit()
+            
+            revoked = []
+            for value in tokens - {None}:
+                try:
+                    _, expires_at, token_id = verify_token(current_app.config['SECRET_KEY'], value)
+                except InvalidTokenError:
+                    continue
+                db.session.merge(RevokedToken(token_id=token_id, expires_at=datetime.utcfromtimestamp(expires_at)))
+                revoked.append(token_id)
+            
+            # Revocations are only needed until the token would have expired
+            RevokedToken.query.filter(RevokedToken.expires_at <= datetime.utcnow()).delete()
+            db.session.commit()
+            
+            for token_id in revoked:
+                revoked_tokens.add(token_id)
+            if faculty:
+                profile_cache.invalidate(faculty.id)
             
             return True
             
@@ -126,6 +236,19 @@ class FacultyService:
             db.session.rollback()
             return False
     
+    @staticmethod
+    def _verify_legacy_token(email, token):
+        """Check an unsigned token from before signed tokens against the database"""
+        faculty = Faculty.query.filter_by(email=email).first()
+        
+        if not faculty or not faculty.remember_token or faculty.remember_token != token:
+            return False, "Invalid token"
+        
+        if faculty.remember_expires and faculty.remember_expires < datetime.utcnow():
+            return False, "Token expired. Please login again"
+        
+        return True, faculty.to_dict()
+    
     @staticmethod
     def get_faculty_by_email(email):
         """Get faculty by email"""
@@ -147,6 +270,8 @@ class FacultyService:
             faculty.sections = sections
             db.session.commit()
             
+            profile_cache.invalidate(faculty.id)
+            
             return True, faculty
             
         except Exception as e:
@@ -2,10 +2,20 @@
 NFC Tag Management Service
 Business logic for NFC tag operations
 """
+from collections import namedtuple
 from src.models import db, Student
+from src.services.version_service import TableVersionService, STUDENTS
 from src.utils.validators import validate_nfc_tag
+from src.utils.lru_cache import LRUCache
 from sqlalchemy.exc import IntegrityError
 
+# Minimal student identity needed on the scan path
+CachedStudent = namedtuple('CachedStudent', ['id', 'name', 'register_number'])
+
+# Tag -> CachedStudent. Writes in this process invalidate entries directly;
+# the TTL bounds staleness after writes made by other worker processes.
+tag_cache = LRUCache(maxsize=20000, ttl=300)
+
 
 class NFCService:
     """Service class for NFC tag management"""
@@ -39,9 +49,15 @@ class NFCService:
                 return False, f"NFC tag already registered to {existing.name} ({existing.register_number})"
             
             # Register tag
+            old_tag_id = student.nfc_tag_id
             student.nfc_tag_id = nfc_tag_id.strip()
+            TableVersionService.bump(STUDENTS)
             db.session.commit()
             
+            if old_tag_id:
+                tag_cache.invalidate(old_tag_id)
+            tag_cache.invalidate(student.nfc_tag_id)
+            
             return True, student
             
         except IntegrityError:
@@ -70,9 +86,13 @@ class NFCService:
             if not student.nfc_tag_id:
                 return False, "Student does not have an NFC tag registered"
             
+            old_tag_id = student.nfc_tag_id
             student.nfc_tag_id = None
+            TableVersionService.bump(STUDENTS)
             db.session.commit()
             
+            tag_cache.invalidate(old_tag_id)
+            
             return True, "NFC tag unregistered successfully"
             
         except Exception as e:
@@ -90,7 +110,37 @@ class NFCService:
         Returns:
             Student object or None
         """
-        return Student.query.filter_by(nfc_tag_id=nfc_tag_id.strip()).first()
+        student = Student.query.filter_by(nfc_tag_id=nfc_tag_id.strip()).first()
+        if student:
+            tag_cache.set(student.nfc_tag_id, CachedStudent(student.id, student.name, student.register_number))
+        return student
+    
+    @staticmethod
+    def resolve_tag(nfc_tag_id):
+        """
+        Resolve an NFC tag to the scanning student, using the tag cache
+        
+        Args:
+            nfc_tag_id: NFC tag identifier
+            
+        Returns:
+            CachedStudent (id, name, register_number) or None
+        """
+        nfc_tag_id = nfc_tag_id.strip()
+        cached = tag_cache.get(nfc_tag_id)
+        if cached is not None:
+            return cached
+        
+        row = db.session.query(
+            Student.id, Student.name, Student.register_number
+        ).filter_by(nfc_tag_id=nfc_tag_id).first()
+        
+        if not row:
+            return None
+        
+        cached = CachedStudent(row.id, row.name, row.register_number)
+        tag_cache.set(nfc_tag_id, cached)
+        return cached
     
     @staticmethod
     def is_tag_registered(nfc_tag_id):
@@ -103,4 +153,9 @@ class NFCService:
         Returns:
             bool: True if registered, False otherwise
         """
-        return Student.query.filter_by(nfc_tag_id=nfc_tag_id.strip()).first() is not None
+        return NFCService.resolve_tag(nfc_tag_id) is not None
+    
+    @staticmethod
+    def get_cache_stats():
+        """Get tag cache hit/miss statistics"""
+        return tag_cache.stats()
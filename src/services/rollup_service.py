@@ -0,0 +1,221 @@
+"""
+Daily Attendance Rollup Service
+Maintains per-day, per-section/subject attendance counters
+"""
+from datetime import datetime, date as date_type, timedelta
+from sqlalchemy import func
+from src.models import db, Attendance, ArchivedAttendance, DailyAttendanceRollup
+from src.services.archive_service import archived_ranges, attendance_history
+from src.utils.batching import chunked, IN_CLAUSE_CHUNK
+from src.utils.upsert import key_values, upsert_increment
+
+ALL = DailyAttendanceRollup.ALL
+
+
+def _as_date(value):
+    """Normalize date(...) results, which SQLite returns as strings"""
+    if isinstance(value, date_type):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+class RollupService:
+    """
+    Service class for daily attendance rollups
+    
+    Each day has one row per (section, subject) plus a row with
+    section = subject = '*' holding whole-day totals, so a student counts
+    once per day even when attending several subjects.
+    """
+    
+    @staticmethod
+    def apply(attendances):
+        """
+        Add new attendance records to the rollups
+        
+        Must be called in the transaction that inserts the records, before
+        they are flushed.
+        
+        Args:
+            attendances: Attendance objects about to be inserted
+        """
+        if not attendances:
+            return
+        
+        with db.session.no_autoflush:
+            # (date, section, subject, student) -> already has a stored scan.
+            # Probed once each with EXISTS, then tracked across the batch
+            seen = {}
+            increments = {}
+            for a in attendances:
+                day = a.timestamp.date()
+                class_key = (day, *key_values(a.section, a.subject))
+                day_visit = (day, ALL, ALL, a.student_id)
+                class_visit = (*class_key, a.student_id)
+                if day_visit not in seen:
+                    seen[day_visit] = RollupService._seen(a.student_id, day)
+                if class_visit not in seen:
+                    seen[class_visit] = seen[day_visit] and RollupService._seen(a.student_id, day, class_key[1:])
+                
+                for key, visit in ((class_key, class_visit), ((day, ALL, ALL), day_visit)):
+                    scans, unique = increments.get(key, (0, 0))
+                    increments[key] = (scans + 1, unique + (0 if seen[visit] else 1))
+                    seen[visit] = True
+        
+        RollupService._upsert(increments)
+    
+    @staticmethod
+    def remove_student(student_id):
+        """
+        Take a student's records out of the rollups before they are deleted
+        
+        Args:
+            student_id: ID of the student being deleted
+        """
+        history = attendance_history(student_id)
+        rows = db.session.query(
+            func.date(history.c.timestamp), history.c.section, history.c.subject, func.count(history.c.id)
+        ).group_by(
+            func.date(history.c.timestamp), history.c.section, history.c.subject
+        ).all()
+        
+        decrements = {}
+        for day, section, subject, count in rows:
+            day = _as_date(day)
+            key = (day, *key_values(section, subject))
+            scans, _ = decrements.get(key, (0, 0))
+            decrements[key] = (scans - count, -1)
+            total_scans, _ = decrements.get((day, ALL, ALL), (0, 0))
+            decrements[(day, ALL, ALL)] = (total_scans - count, -1)
+        
+        RollupService._upsert(decrements)
+    
+    @staticmethod
+    def rebuild():
+        """
+        Recompute all rollups from the attendance and archive tables (backfill)
+        
+        Returns:
+            Number of rollup rows written
+        """
+        history = attendance_history()
+        day = func.date(history.c.timestamp)
+        section = func.coalesce(history.c.section, '')
+        subject = func.coalesce(history.c.subject, '')
+        per_key = db.session.query(
+            day, section, subject,
+            func.count(history.c.id), func.count(func.distinct(history.c.student_id))
+        ).group_by(day, section, subject).all()
+        per_day = db.session.query(
+            day, func.count(history.c.id), func.count(func.distinct(history.c.student_id))
+        ).group_by(day).all()
+        
+        merged = {}
+        for d, sec, subj, scans, unique in per_key:
+            merged[(_as_date(d), sec, subj)] = (scans, unique)
+        for d, scans, unique in per_day:
+            merged[(_as_date(d), ALL, ALL)] = (scans, unique)
+        
+        try:
+            DailyAttendanceRollup.query.delete()
+            rows = [
+                {'date': d, 'section': section, 'subject': subject, 'scans': scans, 'unique_students': unique}
+                for (d, section, subject), (scans, unique) in merged.items()
+            ]
+            for chunk in chunked(rows, IN_CLAUSE_CHUNK):
+                db.session.execute(db.insert(DailyAttendanceRollup), chunk)
+            db.session.commit()
+            return len(rows)
+        except Exception:
+            db.session.rollback()
+            raise
+    
+    @staticmethod
+    def get_totals(today):
+        """
+        Get all-time and per-day totals from the whole-day rows
+        
+        Returns:
+            tuple: (total_scans, today_scans, today_unique_students)
+        """
+        is_today = DailyAttendanceRollup.date == today
+        row = db.session.query(
+            func.coalesce(func.sum(DailyAttendanceRollup.scans), 0),
+            func.coalesce(func.sum(db.case((is_today, DailyAttendanceRollup.scans), else_=0)), 0),
+            func.coalesce(func.sum(db.case((is_today, DailyAttendanceRollup.unique_students), else_=0)), 0)
+        ).filter(
+            DailyAttendanceRollup.section == ALL,
+            DailyAttendanceRollup.subject == ALL
+        ).one()
+        return int(row[0]), int(row[1]), int(row[2])
+    
+    @staticmethod
+    def get_daily(start=None, end=None, section=None, subject=None):
+        """
+        Get rollup rows for a date range
+        
+        Without section/subject filters the whole-day rows are returned.
+        
+        Args:
+            start: First date (inclusive), optional
+            end: Last date (inclusive), optional
+            section: Section filter, optional
+            subject: Subject filter, optional
+            
+        Returns:
+            List of DailyAttendanceRollup rows ordered by date
+        """
+        query = DailyAttendanceRollup.query
+        
+        if start:
+            query = query.filter(DailyAttendanceRollup.date >= start)
+        if end:
+            query = query.filter(DailyAttendanceRollup.date <= end)
+        
+        if section or subject:
+            query = query.filter(DailyAttendanceRollup.section != ALL)
+            if section:
+                query = query.filter(DailyAttendanceRollup.section == section)
+            if subject:
+                query = query.filter(DailyAttendanceRollup.subject == subject)
+        else:
+            query = query.filter(DailyAttendanceRollup.section == ALL, DailyAttendanceRollup.subject == ALL)
+        
+        return query.order_by(DailyAttendanceRollup.date, DailyAttendanceRollup.section,
+                              DailyAttendanceRollup.subject).all()
+    
+    @staticmethod
+    def _seen(student_id, day, class_key=None):
+        """
+        Whether a student already has a stored scan on a day
+        
+        The archive is probed too when the day falls in an archived range,
+        so a late sync into an archived day is not counted twice.
+        
+        Args:
+            student_id: Student ID
+            day: Date
+            class_key: (section, subject) to match, optional
+        """
+        start = datetime.combine(day, datetime.min.time())
+        end = start + timedelta(days=1)
+        models = [Attendance]
+        if archived_ranges.overlaps(start, end):
+            models.append(ArchivedAttendance)
+        
+        for model in models:
+            criteria = [model.student_id == student_id, model.timestamp >= start, model.timestamp < end]
+            if class_key:
+                section, subject = class_key
+                criteria += [func.coalesce(model.section, '') == section, func.coalesce(model.subject, '') == subject]
+            if db.session.query(db.session.query(model.id).filter(*criteria).exists()).scalar():
+                return True
+        return False
+    
+    @staticmethod
+    def _upsert(increments):
+        """Atomically add {(date, section, subject): (scans, unique_students)} deltas"""
+        upsert_increment(
+            DailyAttendanceRollup.__table__, ('date', 'section', 'subject'),
+            {key: {'scans': scans, 'unique_students': unique} for key, (scans, unique) in increments.items()}
+        )
@@ -0,0 +1,132 @@
+"""
+Live Scan Feed
+In-process fan-out of newly committed scans to Server-Sent Events clients
+"""
+import queue
+import threading
+
+
+class TooManySubscribersError(Exception):
+    """Raised when the feed already serves its maximum number of clients"""
+
+
+class Subscription:
+    """
+    One client's bounded buffer of pending scan events
+
+    When the client falls behind, the oldest events are dropped and counted
+    instead of blocking the publisher.
+    """
+
+    def __init__(self, section=None, subject=None, maxsize=100):
+        self.section = section
+        self.subject = subject
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def matches(self, record):
+        """Whether a serialized attendance record passes this client's filters"""
+        if self.section and record.get('section') != self.section:
+            return False
+        if self.subject and record.get('subject') != self.subject:
+            return False
+        return True
+
+    def offer(self, record):
+        """Buffer a record, evicting the oldest one if the buffer is full"""
+        with self._lock:
+            while True:
+                try:
+                    self._queue.put_nowait(record)
+                    return
+                except queue.Full:
+                    try:
+                        self._queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def get(self, timeout):
+        """
+        Wait for the next record
+
+        Returns:
+            The record, or None if nothing arrived within the timeout
+        """
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def take_dropped(self):
+        """Return and reset the number of events dropped since the last call"""
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+            return dropped
+
+
+class ScanFeedHub:
+    """
+    Fan-out hub fed after each attendance commit
+
+    Publishing never waits on a client: it only appends to each matching
+    subscriber's bounded buffer.
+    """
+
+    def __init__(self, max_subscribers=100, buffer_size=100):
+        self.max_subscribers = max_subscribers
+        self.buffer_size = buffer_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, section=None, subject=None):
+        """
+        Register a client
+
+        Raises:
+            TooManySubscribersError: If the hub is at capacity
+        """
+        subscription = Subscription(section, subject, self.buffer_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise TooManySubscribersError()
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Remove a client"""
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, records):
+        """
+        Push committed, serialized attendance records to matching clients
+
+        Args:
+            records: List of attendance dictionaries
+        """
+        if not records or not self._subscribers:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self.published += len(records)
+        for record in records:
+            for subscription in subscribers:
+                if subscription.matches(record):
+                    subscription.offer(record)
+
+    def stats(self):
+        """Subscriber and delivery counters"""
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'max_subscribers': self.max_subscribers,
+                'buffer_size': self.buffer_size,
+                'published': self.published
+            }
+
+
+# Process-wide hub shared by the attendance service and the stream endpoint
+scan_feed = ScanFeedHub()
@@ -0,0 +1,128 @@
+"""
+Recent Scan Index
+In-memory last-scan time per student for the attendance duplicate window
+"""
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from src.models import db, Attendance
+
+# Scans of the same student inside this window are rejected as duplicates
+DUPLICATE_WINDOW = timedelta(hours=1)
+
+
+class RecentScanIndex:
+    """
+    Tracks the latest scan time of every student seen inside the window
+
+    The index is rebuilt from the last ``window`` of the attendance table at
+    startup and updated whenever attendance is committed. When it is
+    authoritative (this process is the only writer, e.g. single-node SQLite)
+    a miss is trusted and the duplicate decision never touches the database.
+    Otherwise misses are confirmed with an indexed (student_id, timestamp)
+    probe.
+    """
+
+    # Prune expired entries after this many updates
+    PRUNE_INTERVAL = 1000
+
+    def __init__(self, window=DUPLICATE_WINDOW):
+        self.window = window
+        self.authoritative = False
+        self._last_scan = {}
+        self._lock = threading.Lock()
+        self._updates = 0
+
+    def rebuild(self):
+        """Load the last scan of every student inside the window (needs app context)"""
+        window_start = datetime.utcnow() - self.window
+        rows = db.session.query(
+            Attendance.student_id, func.max(Attendance.timestamp)
+        ).filter(
+            Attendance.timestamp >= window_start
+        ).group_by(Attendance.student_id).all()
+        
+        with self._lock:
+            self._last_scan = dict(rows)
+            self._updates = 0
+        return len(rows)
+
+    def last_scan(self, student_id, now=None):
+        """
+        Get the student's last scan time if it falls inside the window
+        
+        Returns:
+            datetime or None
+        """
+        window_start = (now or datetime.utcnow()) - self.window
+        with self._lock:
+            last = self._last_scan.get(student_id)
+        if last is not None and last >= window_start:
+            return last
+        return None
+
+    def claim(self, student_id, timestamp):
+        """
+        Atomically check the window and reserve it for a new scan
+        
+        Returns:
+            None if the scan may be recorded, otherwise the earlier scan time
+        """
+        window_start = timestamp - self.window
+        with self._lock:
+            last = self._last_scan.get(student_id)
+            if last is not None and last >= window_start:
+                return last
+            self._last_scan[student_id] = timestamp
+            self._bump()
+            return None
+
+    def release(self, student_id, timestamp, previous=None):
+        """Undo a claim whose insert was not committed"""
+        with self._lock:
+            if self._last_scan.get(student_id) == timestamp:
+                if previous is None:
+                    self._last_scan.pop(student_id, None)
+                else:
+                    self._last_scan[student_id] = previous
+
+    def record(self, student_id, timestamp):
+        """Record a committed scan"""
+        with self._lock:
+            last = self._last_scan.get(student_id)
+            if last is None or timestamp > last:
+                self._last_scan[student_id] = timestamp
+            self._bump()
+
+    def discard(self, student_id):
+        """Forget a student (e.g. after deletion)"""
+        with self._lock:
+            self._last_scan.pop(student_id, None)
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._last_scan.clear()
+            self._updates = 0
+
+    def stats(self):
+        """Get index size and mode"""
+        with self._lock:
+            return {
+                'size': len(self._last_scan),
+                'authoritative': self.authoritative,
+                'window_seconds': int(self.window.total_seconds())
+            }
+
+    def _bump(self):
+        """Count an update and drop expired entries periodically (lock held)"""
+        self._updates += 1
+        if self._updates % self.PRUNE_INTERVAL == 0:
+            window_start = datetime.utcnow() - self.window
+            self._last_scan = {
+                student_id: last for student_id, last in self._last_scan.items()
+                if last >= window_start
+            }
+
+
+scan_index = RecentScanIndex()
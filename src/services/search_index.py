@@ -0,0 +1,118 @@
+"""
+Student Search Index
+Indexed name/register number search: an FTS5 trigram shadow table kept in
+sync by triggers on SQLite, pg_trgm GIN indexes on PostgreSQL
+"""
+from sqlalchemy import Float, Integer, func, text
+from sqlalchemy.exc import SQLAlchemyError
+from src.models import db, Student
+
+# Trigram indexes cannot match terms shorter than this
+MIN_INDEXED_TERM = 3
+
+SQLITE_DDL = {
+    'students_fts': """
+        CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(
+            name, register_number,
+            content='students', content_rowid='id', tokenize='trigram'
+        )
+    """,
+    'students_fts_ai': """
+        CREATE TRIGGER IF NOT EXISTS students_fts_ai AFTER INSERT ON students BEGIN
+            INSERT INTO students_fts(rowid, name, register_number)
+            VALUES (new.id, new.name, new.register_number);
+        END
+    """,
+    'students_fts_ad': """
+        CREATE TRIGGER IF NOT EXISTS students_fts_ad AFTER DELETE ON students BEGIN
+            INSERT INTO students_fts(students_fts, rowid, name, register_number)
+            VALUES ('delete', old.id, old.name, old.register_number);
+        END
+    """,
+    'students_fts_au': """
+        CREATE TRIGGER IF NOT EXISTS students_fts_au AFTER UPDATE OF name, register_number ON students BEGIN
+            INSERT INTO students_fts(students_fts, rowid, name, register_number)
+            VALUES ('delete', old.id, old.name, old.register_number);
+            INSERT INTO students_fts(rowid, name, register_number)
+            VALUES (new.id, new.name, new.register_number);
+        END
+    """
+}
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_students_name_trgm ON students USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_students_register_number_trgm ON students USING gin (register_number gin_trgm_ops)"
+]
+
+
+class StudentSearchIndex:
+    """Dialect-specific search index over students.name and register_number"""
+
+    def __init__(self):
+        # 'fts5', 'trigram', or None when searches fall back to ILIKE scans
+        self.backend = None
+
+    def install(self):
+        """
+        Create the index structures if missing
+
+        On SQLite the shadow table is rebuilt from the students table whenever
+        any of its parts had to be (re)created, e.g. after drop_all.
+
+        Returns:
+            str or None: The active backend
+        """
+        self.backend = None
+        dialect = db.engine.dialect.name
+
+        try:
+            if dialect == 'sqlite':
+                existing = {
+                    name for (name,) in db.session.execute(
+                        text("SELECT name FROM sqlite_master WHERE name LIKE 'students_fts%'")
+                    )
+                }
+                if not set(SQLITE_DDL) <= existing:
+                    for statement in SQLITE_DDL.values():
+                        db.session.execute(text(statement))
+                    db.session.execute(text("INSERT INTO students_fts(students_fts) VALUES ('rebuild')"))
+                    db.session.commit()
+                self.backend = 'fts5'
+            elif dialect == 'postgresql':
+                for statement in POSTGRES_DDL:
+                    db.session.execute(text(statement))
+                db.session.commit()
+                self.backend = 'trigram'
+        except SQLAlchemyError as e:
+            # FTS5 trigram needs SQLite 3.34+; pg_trgm needs CREATE privilege
+            db.session.rollback()
+            print(f"⚠️  Student search index unavailable, using ILIKE scans: {e}")
+
+        return self.backend
+
+    def usable(self, term):
+        """Whether a term can be answered from the index"""
+        return self.backend is not None and len(term) >= MIN_INDEXED_TERM
+
+    def fts_matches(self, term):
+        """
+        Subquery of (id, rank) for students matching a term on SQLite
+
+        Lower rank is a better match (FTS5 bm25).
+        """
+        phrase = '"' + term.replace('"', '""') + '"'
+        return text(
+            "SELECT rowid AS id, rank FROM students_fts WHERE students_fts MATCH :phrase"
+        ).bindparams(phrase=phrase).columns(id=Integer, rank=Float).subquery('fts')
+
+    def trigram_score(self, term):
+        """Similarity expression ordering PostgreSQL results, higher is better"""
+        return func.greatest(
+            func.similarity(Student.name, term),
+            func.similarity(Student.register_number, term)
+        )
+
+
+# Process-wide search index state, set up by create_app()
+search_index = StudentSearchIndex()
@@ -2,10 +2,26 @@
 Student Management Service
 Business logic for student operations
 """
-from src.models import db, Student
+from src.models import db, Student, ArchivedAttendance
+from src.services.nfc_service import tag_cache
+from src.services.rollup_service import RollupService
+from src.services.counter_service import CounterService
+from src.services.search_index import search_index
+from src.services.version_service import TableVersionService, STUDENTS, ATTENDANCE
 from src.utils.validators import validate_student_data
+from src.utils.batching import chunked, IN_CLAUSE_CHUNK
+from src.utils.pagination import encode_cursor, decode_cursor, parse_limit
+from sqlalchemy import insert
 from sqlalchemy.exc import IntegrityError
 
+STUDENT_FIELDS = ('name', 'register_number', 'section', 'department', 'duration')
+
+# Rows per multi-row INSERT during bulk imports
+BULK_INSERT_CHUNK = 500
+
+# Ranked search results returned when no limit is given
+SEARCH_RESULT_LIMIT = 50
+
 
 class StudentService:
     """Service class for student management"""
@@ -45,6 +61,7 @@ class StudentService:
             )
             
             db.session.add(student)
+            TableVersionService.bump(STUDENTS)
             db.session.commit()
             
             return True, student
@@ -57,33 +74,92 @@ class StudentService:
             return False, f"Error creating student: {str(e)}"
     
     @staticmethod
-    def bulk_create_students(students_data):
+    def bulk_create_students(students_data, chunk_size=BULK_INSERT_CHUNK):
         """
-        Create multiple students from list
+        Create multiple students from list using set-based statements
+        
+        All rows are validated up front, existing register numbers are found
+        with chunked IN queries and new students are written with one
+        multi-row INSERT per chunk. Invalid or duplicate rows are reported
+        without aborting the rest of the batch.
         
         Args:
             students_data: List of student dictionaries
+            chunk_size: Rows per INSERT statement
             
         Returns:
             tuple: (success_count, failed_count, errors)
         """
-        success_count = 0
-        failed_count = 0
         errors = []
+        candidates = []
+        seen = set()
+        
+        def fail(row, register_number, error):
+            errors.append({'row': row, 'register_number': register_number or 'N/A', 'error': error})
         
         for idx, data in enumerate(students_data):
-            success, result = StudentService.create_student(data)
-            if success:
-                success_count += 1
+            row = idx + 2  # +2 because row 1 is header, and 0-indexed
+            data = {
+                key: str(value) if value is not None and not isinstance(value, str) else value
+                for key, value in data.items()
+            }
+            
+            is_valid, error = validate_student_data(data)
+            if not is_valid:
+                fail(row, data.get('register_number'), error)
+                continue
+            
+            record = {field: data[field].strip() for field in STUDENT_FIELDS}
+            if record['register_number'] in seen:
+                fail(row, record['register_number'], f"Duplicate register number {record['register_number']} in file")
+                continue
+            
+            seen.add(record['register_number'])
+            candidates.append((row, record))
+        
+        try:
+            existing = set()
+            for chunk in chunked(seen, IN_CLAUSE_CHUNK):
+                existing.update(
+                    number for (number,) in db.session.query(Student.register_number)
+                    .filter(Student.register_number.in_(chunk))
+                )
+        except Exception as e:
+            db.session.rollback()
+            for row, record in candidates:
+                fail(row, record['register_number'], f"Error creating student: {str(e)}")
+            return 0, len(errors), sorted(errors, key=lambda e: e['row'])
+        
+        new_rows = []
+        for row, record in candidates:
+            if record['register_number'] in existing:
+                fail(row, record['register_number'], f"Student with register number {record['register_number']} already exists")
             else:
-                failed_count += 1
-                errors.append({
-                    'row': idx + 2,  # +2 because row 1 is header, and 0-indexed
-                    'register_number': data.get('register_number', 'N/A'),
-                    'error': result
-                })
-        
-        return success_count, failed_count, errors
+                new_rows.append((row, record))
+        
+        success_count = 0
+        for chunk in chunked(new_rows, chunk_size):
+            try:
+                db.session.execute(insert(Student), [record for _, record in chunk])
+                TableVersionService.bump(STUDENTS)
+                db.session.commit()
+                success_count += len(chunk)
+            except IntegrityError:
+                # Lost a race with a concurrent insert; settle this chunk row by row
+                db.session.rollback()
+                for row, record in chunk:
+                    success, result = StudentService.create_student(record)
+                    if success:
+                        success_count += 1
+                    else:
+                        fail(row, record['register_number'], result)
+            except Exception as e:
+                db.session.rollback()
+                for row, record in chunk:
+                    fail(row, record['register_number'], f"Error creating student: {str(e)}")
+        
+        errors.sort(key=lambda e: e['row'])
+        return success_count, len(errors), errors
     
     @staticmethod
     def get_student_by_id(student_id):
@@ -106,6 +182,61 @@ class StudentService:
         Returns:
             List of students
         """
+        return StudentService._filtered_query(filters).order_by(Student.register_number).all()
+    
+    @staticmethod
+    def get_students_page(filters=None, cursor=None, limit=None):
+        """
+        Get one page of students ordered by (register_number, id)
+        
+        Args:
+            filters: Dictionary with filter criteria (section, department, etc.)
+            cursor: Cursor returned with the previous page (optional)
+            limit: Page size, capped at MAX_PAGE_LIMIT
+            
+        Returns:
+            tuple: (students, next_cursor_or_None)
+            
+        Raises:
+            InvalidCursorError: If the cursor is malformed
+        """
+        return StudentService._page(StudentService._filtered_query(filters), cursor, limit)
+    
+    @staticmethod
+    def search_students(search_term, filters=None, limit=None):
+        """
+        Search students by name or register number, best matches first
+        
+        Uses the student search index when available; terms too short for
+        it fall back to an ILIKE scan that stops at the limit.
+        
+        Args:
+            search_term: Search string
+            filters: Optional section/department/duration/has_nfc filters
+            limit: Maximum results (default SEARCH_RESULT_LIMIT, capped at MAX_PAGE_LIMIT)
+            
+        Returns:
+            List of matching students
+        """
+        term = search_term.strip()
+        limit = parse_limit(limit, default=SEARCH_RESULT_LIMIT)
+        query = StudentService._filtered_query(filters)
+        
+        if not search_index.usable(term):
+            query = StudentService._ilike(query, term).order_by(Student.register_number)
+        elif search_index.backend == 'fts5':
+            fts = search_index.fts_matches(term)
+            query = query.join(fts, fts.c.id == Student.id).order_by(fts.c.rank, Student.register_number)
+        else:
+            query = StudentService._ilike(query, term).order_by(
+                search_index.trigram_score(term).desc(), Student.register_number
+            )
+        
+        return query.limit(limit).all()
+    
+    @staticmethod
+    def _filtered_query(filters):
+        """Build the student query for the given filters"""
         query = Student.query
         
         if filters:
@@ -121,26 +252,38 @@ class StudentService:
                 else:
                     query = query.filter(Student.nfc_tag_id.is_(None))
         
-        return query.order_by(Student.register_number).all()
+        return query
     
     @staticmethod
-    def search_students(search_term):
-        """
-        Search students by name or register number
-        
-        Args:
-            search_term: Search string
-            
-        Returns:
-            List of matching students
-        """
-        search = f"%{search_term}%"
-        return Student.query.filter(
+    def _ilike(query, term):
+        """Filter on a substring of name or register number (pg_trgm indexes serve this)"""
+        search = f"%{term}%"
+        return query.filter(
             db.or_(
                 Student.name.ilike(search),
                 Student.register_number.ilike(search)
             )
-        ).order_by(Student.register_number).all()
+        )
+    
+    @staticmethod
+    def _page(query, cursor, limit):
+        """Apply keyset pagination on (register_number, id)"""
+        limit = parse_limit(limit)
+        
+        if cursor:
+            register_number, student_id = decode_cursor(cursor, (str, int))
+            query = query.filter(
+                db.tuple_(Student.register_number, Student.id) > (register_number, student_id)
+            )
+        
+        students = query.order_by(Student.register_number, Student.id).limit(limit + 1).all()
+        
+        next_cursor = None
+        if len(students) > limit:
+            students = students[:limit]
+            next_cursor = encode_cursor([students[-1].register_number, students[-1].id])
+        
+        return students, next_cursor
     
     @staticmethod
     def delete_student(student_id):
@@ -158,8 +301,16 @@ class StudentService:
             if not student:
                 return False, "Student not found"
             
+            nfc_tag_id = student.nfc_tag_id
+            RollupService.remove_student(student.id)
+            CounterService.remove_student(student.id)
+            ArchivedAttendance.query.filter_by(student_id=student.id).delete()
             db.session.delete(student)
+            TableVersionService.bump(STUDENTS, ATTENDANCE)
             db.session.commit()
+            
+            if nfc_tag_id:
+                tag_cache.invalidate(nfc_tag_id)
             return True, "Student deleted successfully"
             
         except Exception as e:
@@ -0,0 +1,64 @@
+"""
+Table Version Service
+Per-entity write counters backing conditional GET (ETag / Last-Modified)
+"""
+from datetime import datetime
+from sqlalchemy import func
+from src.models import db, Attendance, TableVersion
+from src.utils.upsert import upsert_increment
+
+STUDENTS = 'students'
+ATTENDANCE = 'attendance'
+
+# Entities whose inserts are not counted: their version also carries the
+# newest row id, so concurrent inserts never write one shared counter row.
+# Only other changes (deletes) bump their stored counter.
+DERIVED = {ATTENDANCE: Attendance.id}
+
+
+class TableVersionService:
+    """Service class for entity version counters"""
+
+    @staticmethod
+    def bump(*names):
+        """
+        Mark entities as changed
+
+        Must be called in the transaction that performs the write, so the
+        new version becomes visible exactly when the write does. Inserts
+        into DERIVED entities need no bump.
+
+        Args:
+            names: Entity names (STUDENTS, ATTENDANCE)
+        """
+        upsert_increment(
+            TableVersion.__table__, ('name',), {(name,): {'version': 1} for name in names},
+            assign={'updated_at': datetime.utcnow()}
+        )
+
+    @staticmethod
+    def get(*names):
+        """
+        Read the current versions of some entities
+
+        Returns:
+            tuple: ({name: version}, last_modified datetime or None). Inserts
+                into DERIVED entities record no write time, so last_modified
+                is None when any of them is included.
+        """
+        rows = db.session.query(TableVersion.name, TableVersion.version, TableVersion.updated_at).filter(
+            TableVersion.name.in_(names)
+        ).all()
+        versions = {name: 0 for name in names}
+        last_modified = None
+        for name, version, updated_at in rows:
+            versions[name] = version
+            if last_modified is None or updated_at > last_modified:
+                last_modified = updated_at
+        
+        for name in names:
+            if name in DERIVED:
+                newest = db.session.query(func.max(DERIVED[name])).scalar() or 0
+                versions[name] = f'{versions[name]}.{newest}'
+                last_modified = None
+        return versions, last_modified
@@ -5,23 +5,36 @@
 const API_BASE_URL = window.location.origin;
 
 class APIClient {
+    // URL -> { etag, data } for conditional GETs
+    static etagCache = new Map();
+
     /**
      * Make API request
+     *
+     * GET responses carrying an ETag are remembered per URL; later GETs send
+     * If-None-Match and reuse the remembered body when the server answers 304.
      */
     static async request(endpoint, options = {}) {
         const url = `${API_BASE_URL}${endpoint}`;
+        const method = (options.method || 'GET').toUpperCase();
+        const cached = method === 'GET' ? this.etagCache.get(url) : undefined;
 
         const config = {
+            ...options,
             headers: {
                 'Content-Type': 'application/json',
+                ...(cached ? { 'If-None-Match': cached.etag } : {}),
                 ...options.headers
-            },
-            ...options
+            }
         };
 
         try {
             const response = await fetch(url, config);
 
+            if (response.status === 304 && cached) {
+                return cached.data;
+            }
+
             // Check content type before parsing
             const contentType = response.headers.get('content-type');
             let data;
@@ -39,6 +52,13 @@ class APIClient {
                 throw new Error(data.error || `Request failed with status ${response.status}`);
             }
 
+            const etag = response.headers.get('ETag');
+            if (method === 'GET' && etag) {
+                this.etagCache.set(url, { etag, data });
+            } else if (method === 'GET') {
+                this.etagCache.delete(url);
+            }
+
             return data;
         } catch (error) {
             console.error('API Error:', error);
@@ -52,6 +72,38 @@ class APIClient {
         return this.request(`/api/students?${params}`);
     }
 
+    /**
+     * Fetch one page of students; pass the previous page's next_cursor
+     */
+    static async getStudentsPage(filters = {}, cursor = null, limit = 200) {
+        const params = new URLSearchParams({ ...filters, limit });
+        if (cursor) {
+            params.set('cursor', cursor);
+        }
+        return this.request(`/api/students?${params}`);
+    }
+
+    /**
+     * Page through all matching students
+     */
+    static async getAllStudents(filters = {}, pageSize = 500) {
+        return this.collectPages(cursor => this.getStudentsPage(filters, cursor, pageSize), 'students');
+    }
+
+    /**
+     * Follow next_cursor until exhausted and concatenate the items
+     */
+    static async collectPages(fetchPage, key) {
+        const items = [];
+        let cursor = null;
+        do {
+            const page = await fetchPage(cursor);
+            items.push(...page[key]);
+            cursor = page.next_cursor;
+        } while (cursor);
+        return { count: items.length, [key]: items };
+    }
+
     static async getStudent(id) {
         return this.request(`/api/students/${id}`);
     }
@@ -111,18 +163,83 @@ class APIClient {
         });
     }
 
+    static async recordAttendanceBatch(scans, defaults = {}) {
+        return this.request('/api/attendance/record-batch', {
+            method: 'POST',
+            body: JSON.stringify({ ...defaults, scans })
+        });
+    }
+
+    static async syncScans(scans) {
+        return this.request('/api/attendance/sync', {
+            method: 'POST',
+            body: JSON.stringify({ scans })
+        });
+    }
+
     static async getStudentAttendance(studentId, limit = null) {
         const params = limit ? `?limit=${limit}` : '';
         return this.request(`/api/attendance/student/${studentId}${params}`);
     }
 
+    /**
+     * Fetch attendance percentages for a student ({ student_id }) or a class section ({ section, subject })
+     */
+    static async getAttendanceSummary(query) {
+        const params = new URLSearchParams(query);
+        return this.request(`/api/attendance/summary?${params}`);
+    }
+
     static async getRecentAttendance(limit = 50) {
         return this.request(`/api/attendance/recent?limit=${limit}`);
     }
 
+    static async getAttendanceByDatePage(date = null, cursor = null, limit = 200) {
+        const params = new URLSearchParams({ limit });
+        if (date) {
+            params.set('date', date);
+        }
+        if (cursor) {
+            params.set('cursor', cursor);
+        }
+        return this.request(`/api/attendance/date?${params}`);
+    }
+
+    static async getAllAttendanceByDate(date = null, pageSize = 500) {
+        return this.collectPages(cursor => this.getAttendanceByDatePage(date, cursor, pageSize), 'attendance');
+    }
+
     static async getAttendanceStats() {
         return this.request('/api/attendance/stats');
     }
+
+    /**
+     * Subscribe to newly recorded scans via Server-Sent Events.
+     * Returns the EventSource (call .close() to stop), or null if unsupported.
+     */
+    static streamScans(filters, onScan, onDropped = null) {
+        if (!('EventSource' in window)) {
+            return null;
+        }
+        const params = new URLSearchParams(filters);
+        const source = new EventSource(`${API_BASE_URL}/api/attendance/stream?${params}`);
+        source.addEventListener('scan', event => onScan(JSON.parse(event.data)));
+        if (onDropped) {
+            source.addEventListener('dropped', event => onDropped(JSON.parse(event.data).count));
+        }
+        return source;
+    }
+
+    /**
+     * Fetch a section's present/absent sheet for one class
+     */
+    static async getSectionRoster(section, { date = null, subject = null, classTime = null } = {}) {
+        const params = new URLSearchParams({ section });
+        if (date) params.set('date', date);
+        if (subject) params.set('subject', subject);
+        if (classTime) params.set('class_time', classTime);
+        return this.request(`/api/attendance/roster?${params}`);
+    }
 }
 
 /**
@@ -138,5 +138,119 @@ class NFCHandler {
     }
 }
 
+/**
+ * Offline scan journal
+ * Keeps scans in localStorage until the server acknowledges them, so
+ * attendance taken while Wi-Fi is down is synced once it comes back.
+ * Every scan has a client-generated UUID, which makes retries safe.
+ */
+class ScanJournal {
+    constructor(storageKey = 'scan_journal', chunkSize = 500) {
+        this.storageKey = storageKey;
+        this.chunkSize = chunkSize;
+        this.inFlight = null;
+        this.rerun = false;
+    }
+
+    get isSyncing() {
+        return this.inFlight !== null;
+    }
+
+    /**
+     * Generate a v4 UUID
+     */
+    static generateUUID() {
+        if (window.crypto && crypto.randomUUID) {
+            return crypto.randomUUID();
+        }
+        return 'xxxxxxxx-xxxx-4xxx-yxxx-xxxxxxxxxxxx'.replace(/[xy]/g, (c) => {
+            const r = Math.random() * 16 | 0;
+            return (c === 'x' ? r : (r & 0x3 | 0x8)).toString(16);
+        });
+    }
+
+    /**
+     * Get scans that have not been acknowledged yet
+     */
+    pending() {
+        try {
+            return JSON.parse(localStorage.getItem(this.storageKey)) || [];
+        } catch (error) {
+            return [];
+        }
+    }
+
+    save(scans) {
+        localStorage.setItem(this.storageKey, JSON.stringify(scans));
+    }
+
+    /**
+     * Journal a scan with its device timestamp
+     */
+    add(scan) {
+        const entry = {
+            ...scan,
+            scan_uuid: ScanJournal.generateUUID(),
+            scanned_at: new Date().toISOString()
+        };
+        const scans = this.pending();
+        scans.push(entry);
+        this.save(scans);
+        return entry;
+    }
+
+    /**
+     * Remove scans the server has acknowledged
+     */
+    acknowledge(scanUUIDs) {
+        const done = new Set(scanUUIDs);
+        this.save(this.pending().filter(scan => !done.has(scan.scan_uuid)));
+    }
+
+    /**
+     * Upload all pending scans in chunks
+     * Returns the server results. A call made while a sync is running waits
+     * for it (and for a follow-up pass that picks up scans journaled in the
+     * meantime) and resolves to [], so each result is reported only once.
+     * Network errors propagate and leave unsent scans in the journal.
+     */
+    sync() {
+        if (this.inFlight) {
+            this.rerun = true;
+            return this.inFlight.then(() => []);
+        }
+
+        this.inFlight = this.uploadPending().finally(() => {
+            this.inFlight = null;
+        });
+        return this.inFlight;
+    }
+
+    async uploadPending() {
+        const results = [];
+        do {
+            this.rerun = false;
+            let scans = this.pending();
+            while (scans.length > 0) {
+                const response = await APIClient.syncScans(scans.slice(0, this.chunkSize));
+                // Every result is final (recorded, duplicate or rejected)
+                this.acknowledge(response.results.map(result => result.scan_uuid));
+                results.push(...response.results);
+                scans = this.pending();
+            }
+        } while (this.rerun);
+        return results;
+    }
+
+    /**
+     * Whether a sync error means the device could not reach the server
+     * (fetch rejects with a TypeError) rather than an HTTP error response
+     */
+    static isNetworkError(error) {
+        return !navigator.onLine || error instanceof TypeError;
+    }
+}
+
 // Export for use in other scripts
 window.NFCHandler = NFCHandler;
+window.ScanJournal = ScanJournal;
@@ -10,7 +10,7 @@ class StudentManager {
         UI.showLoading(container);
 
         try {
-            const data = await APIClient.getStudents(filters);
+            const data = await APIClient.getAllStudents(filters);
             this.renderStudentList(container, data.students);
         } catch (error) {
             container.innerHTML = `
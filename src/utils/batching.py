@@ -0,0 +1,30 @@
+"""
+Batching utilities for set-based database operations
+"""
+
+# Maximum number of bound parameters per IN (...) clause
+IN_CLAUSE_CHUNK = 500
+
+
+def chunked(items, size):
+    """
+    Split a sequence into lists of at most ``size`` items
+
+    Used to keep ``IN (...)`` clauses and multi-row inserts under the
+    bound-parameter limits of SQLite and PostgreSQL.
+
+    Args:
+        items: Any iterable
+        size: Maximum chunk length
+
+    Yields:
+        Lists of items
+    """
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,63 @@
+"""
+Conditional GET support
+Weak ETags and Last-Modified derived from entity version counters, so
+unchanged resources are answered with 304 before the view runs. Last-Modified
+is only sent (and If-Modified-Since only honoured) once the second of the
+last write has passed.
+"""
+from datetime import datetime, timezone
+from functools import wraps
+from flask import make_response, request
+
+
+def conditional_get(*entities, per_day=False):
+    """
+    Decorate a GET view whose payload depends only on the given entities
+
+    Args:
+        entities: Entity names whose versions the payload depends on
+        per_day: Also vary on the current UTC date (for "today" figures)
+
+    Returns:
+        Decorator
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            from src.services.version_service import TableVersionService
+
+            versions, last_modified = TableVersionService.get(*entities)
+            etag = '-'.join(f'{name}.{versions[name]}' for name in entities)
+            if per_day:
+                etag += '-' + datetime.utcnow().date().isoformat()
+            if last_modified is not None:
+                last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+                # Truncated to the second, a Last-Modified from the current
+                # second would also cover a later write in that second
+                if last_modified >= datetime.now(timezone.utc).replace(microsecond=0):
+                    last_modified = None
+
+            if _not_modified(etag, last_modified, per_day):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Cache, but always revalidate
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+def _not_modified(etag, last_modified, per_day):
+    """Whether the request's validators match the current ones"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None and not per_day:
+        return last_modified <= request.if_modified_since
+    return False
@@ -0,0 +1,141 @@
+"""
+Database engine tuning profiles
+Named deployment profiles selecting SQLAlchemy engine options, the SQLite
+pragmas applied to every new connection and, for PostgreSQL, server limits
+applied to the transactions of web requests
+"""
+from functools import wraps
+from flask import current_app, g, has_request_context
+from sqlalchemy import event
+
+PROFILES = {
+    # Local development: SQLite defaults (rollback journal), single writer
+    'dev-sqlite': {
+        'dialect': 'sqlite',
+        'engine_options': {},
+        'pragmas': {'busy_timeout': 5000},
+        'request_settings': {}
+    },
+    # One server process owning a SQLite file: WAL lets readers run during
+    # writes, and synchronous=NORMAL only fsyncs at checkpoints
+    'single-node-sqlite-wal': {
+        'dialect': 'sqlite',
+        'engine_options': {},
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 5000,
+            'cache_size': -64000  # negative = KiB, i.e. 64 MB
+        },
+        'request_settings': {}
+    },
+    # PostgreSQL behind several workers: bounded pool, dead-connection
+    # detection and server-side limits on runaway request statements (CLI
+    # jobs such as rollup rebuilds and archiving run without them)
+    'postgres-pooled': {
+        'dialect': 'postgresql',
+        'engine_options': {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_timeout': 10,
+            'pool_recycle': 1800,
+            'pool_pre_ping': True,
+            'connect_args': {'application_name': 'nfc-attendance'}
+        },
+        'pragmas': {},
+        'request_settings': {
+            'statement_timeout': 5000,
+            'idle_in_transaction_session_timeout': 30000
+        }
+    }
+}
+
+
+def default_profile(database_url):
+    """
+    Pick the profile matching a database URL
+
+    Args:
+        database_url: SQLAlchemy database URL
+
+    Returns:
+        str: Profile name
+    """
+    if database_url.startswith('postgresql'):
+        return 'postgres-pooled'
+    return 'single-node-sqlite-wal'
+
+
+def get_profile(name, database_url):
+    """
+    Look up a profile and check it suits the database URL
+
+    Args:
+        name: Profile name, or None for the URL's default
+        database_url: SQLAlchemy database URL
+
+    Returns:
+        tuple: (name, profile dict)
+
+    Raises:
+        ValueError: Unknown profile or dialect mismatch
+    """
+    name = name or default_profile(database_url)
+    if name not in PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE '{name}'. Choose from: {', '.join(PROFILES)}")
+
+    profile = PROFILES[name]
+    if not database_url.startswith(profile['dialect']):
+        raise ValueError(f"DB_PROFILE '{name}' requires a {profile['dialect']} database")
+
+    return name, profile
+
+
+def register_pragmas(engine, pragmas):
+    """
+    Apply SQLite pragmas on every new DBAPI connection
+
+    Args:
+        engine: SQLAlchemy engine
+        pragmas: Mapping of pragma name to value
+    """
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, value in pragmas.items():
+            cursor.execute(f'PRAGMA {pragma}={value}')
+        cursor.close()
+
+
+def _apply_request_settings(session, transaction, connection):
+    if not has_request_context() or g.get('skip_request_settings'):
+        return
+    for name, value in current_app.config.get('DB_REQUEST_SETTINGS', {}).items():
+        connection.exec_driver_sql(f'SET LOCAL {name} = {int(value)}')
+
+
+def register_request_settings(session):
+    """
+    Apply the app's DB_REQUEST_SETTINGS to every transaction begun while
+    handling a request
+
+    SET LOCAL scopes each setting to its transaction, so pooled connections
+    reused by CLI commands and the background writer run without them.
+
+    Args:
+        session: Session or scoped session to listen on
+    """
+    if not event.contains(session, 'after_begin', _apply_request_settings):
+        event.listen(session, 'after_begin', _apply_request_settings)
+
+
+def without_request_settings(view):
+    """Exempt a view (e.g. a long streamed export) from DB_REQUEST_SETTINGS"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.skip_request_settings = True
+        return view(*args, **kwargs)
+    return wrapper
@@ -1,75 +1,97 @@
 """
 Excel/CSV file parsing utilities
 """
-import pandas as pd
-from openpyxl import load_workbook
+import csv
+import io
 
+# Column headers expected in uploaded files, matched case-insensitively
+REQUIRED_COLUMNS = ['Name', 'Register Number', 'Section', 'Department', 'Duration']
 
-def parse_student_file(file_path, file_type='excel'):
+STUDENT_KEYS = {
+    'Name': 'name',
+    'Register Number': 'register_number',
+    'Section': 'section',
+    'Department': 'department',
+    'Duration': 'duration'
+}
+
+
+class FileParseError(ValueError):
+    """Raised while reading data rows when the file turns out to be malformed"""
+
+
+def parse_student_file(stream, file_type='excel'):
     """
-    Parse Excel or CSV file containing student data
+    Parse Excel or CSV data containing student data
+    
+    The header row is checked immediately; data rows are read lazily so the
+    whole file is never held in memory.
     
     Args:
-        file_path: Path to the file
+        stream: Binary file object (e.g. the uploaded request stream)
         file_type: 'excel' or 'csv'
         
     Returns:
-        tuple: (success, data_or_error)
-            - If success: (True, list of student dictionaries)
+        tuple: (success, rows_or_error)
+            - If success: (True, iterator of student dictionaries); the
+              iterator raises FileParseError on a malformed row
             - If error: (False, error_message)
     """
     try:
-        # Read file based on type
         if file_type == 'excel':
-            df = pd.read_excel(file_path)
+            # Deferred so importing the API does not pay for openpyxl
+            from openpyxl import load_workbook
+            workbook = load_workbook(stream, read_only=True, data_only=True)
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None) or []
         else:
-            df = pd.read_csv(file_path)
+            reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+            header = reader.fieldnames or []
+            rows = ([record.get(name) for name in header] for record in reader)
         
-        # Expected columns
-        required_columns = ['Name', 'Register Number', 'Section', 'Department', 'Duration']
-        
-        # Check if all required columns exist (case-insensitive)
-        df.columns = df.columns.str.strip()
-        missing_columns = []
-        
-        for col in required_columns:
-            if col not in df.columns:
-                # Try case-insensitive match
-                found = False
-                for df_col in df.columns:
-                    if df_col.lower() == col.lower():
-                        df.rename(columns={df_col: col}, inplace=True)
-                        found = True
-                        break
-                if not found:
-                    missing_columns.append(col)
+        positions = _match_columns(header)
         
+        missing_columns = [col for col in REQUIRED_COLUMNS if col not in positions]
         if missing_columns:
             return False, f"Missing required columns: {', '.join(missing_columns)}"
         
-        # Convert to list of dictionaries
-        students = []
-        for idx, row in df.iterrows():
+        return True, _iter_students(rows, positions)
+        
+    except Exception as e:
+        return False, f"Error parsing file: {str(e)}"
+
+
+def _match_columns(header):
+    """Map each required column to its position in the header row"""
+    positions = {}
+    for idx, name in enumerate(header):
+        if name is None:
+            continue
+        name = str(name).strip()
+        for col in REQUIRED_COLUMNS:
+            if col not in positions and name.lower() == col.lower():
+                positions[col] = idx
+                break
+    return positions
+
+
+def _iter_students(rows, positions):
+    """Yield normalized student dictionaries, skipping empty rows"""
+    try:
+        for row in rows:
+            values = {}
+            for col, idx in positions.items():
+                value = row[idx] if idx < len(row) else None
+                values[col] = '' if value is None else str(value).strip()
+            
             # Skip empty rows
-            if pd.isna(row['Name']) or pd.isna(row['Register Number']):
+            if not values['Name'] or not values['Register Number']:
                 continue
             
-            student = {
-                'name': str(row['Name']).strip(),
-                'register_number': str(row['Register Number']).strip(),
-                'section': str(row['Section']).strip(),
-                'department': str(row['Department']).strip(),
-                'duration': str(row['Duration']).strip()
-            }
-            students.append(student)
-        
-        if not students:
-            return False, "No valid student data found in file"
-        
-        return True, students
-        
+            yield {STUDENT_KEYS[col]: value for col, value in values.items()}
     except Exception as e:
-        return False, f"Error parsing file: {str(e)}"
+        # Rows are read while the caller iterates, after parse_student_file returned
+        raise FileParseError(f"Error parsing file: {str(e)}") from e
 
 
 def create_sample_excel(output_path):
@@ -0,0 +1,110 @@
+"""
+JSON response encoding
+Pluggable Flask JSON provider (orjson when installed, stdlib otherwise)
+and opt-in gzip of large JSON responses
+"""
+import gzip
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(o):
+    """Encode types the encoders do not handle natively"""
+    if isinstance(o, (datetime, date, time)):
+        return o.isoformat()
+    if isinstance(o, (Decimal, UUID)):
+        return str(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """
+    Flask's provider with ISO 8601 datetimes
+
+    Flask's default renders dates as HTTP dates; this encodes them the same
+    way to_dict() and the orjson provider do.
+    """
+    default = staticmethod(_default)
+
+
+class OrjsonJSONProvider(DefaultJSONProvider):
+    """Provider encoding with orjson, which serializes datetimes natively"""
+
+    def dumps(self, obj, **kwargs):
+        # separators/ensure_ascii have no orjson equivalent: output is always compact UTF-8
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.pop('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.pop('indent', None):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+PROVIDERS = {
+    'stdlib': StdlibJSONProvider,
+    'orjson': OrjsonJSONProvider,
+}
+
+
+def get_provider_class(name=None):
+    """
+    Resolve a JSON provider by name
+
+    Args:
+        name: 'orjson', 'stdlib' or None/'auto' for the fastest installed
+
+    Returns:
+        tuple: (provider name, provider class)
+
+    Raises:
+        ValueError: If the name is unknown or its encoder is not installed
+    """
+    if not name or name == 'auto':
+        name = 'orjson' if orjson is not None else 'stdlib'
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown JSON provider '{name}'. Choose from: {', '.join(PROVIDERS)}")
+    if name == 'orjson' and orjson is None:
+        raise ValueError("JSON provider 'orjson' requires the orjson package")
+    return name, PROVIDERS[name]
+
+
+def register_compression(app):
+    """
+    Gzip JSON responses of at least JSON_GZIP_MIN_BYTES when JSON_GZIP is set
+
+    Streamed responses (exports, the scan feed) are left alone.
+    """
+    from flask import request
+
+    @app.after_request
+    def compress_json(response):
+        if not app.config.get('JSON_GZIP'):
+            return response
+        if (response.direct_passthrough or response.is_streamed or response.status_code != 200
+                or response.mimetype != 'application/json'
+                or 'Content-Encoding' in response.headers
+                or 'gzip' not in request.accept_encodings):
+            return response
+
+        body = response.get_data()
+        response.vary.add('Accept-Encoding')
+        if len(body) < app.config['JSON_GZIP_MIN_BYTES']:
+            return response
+
+        response.set_data(gzip.compress(body, compresslevel=app.config['JSON_GZIP_LEVEL']))
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
+
+    return compress_json
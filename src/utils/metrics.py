@@ -0,0 +1,173 @@
+"""
+Request metrics
+Wall time per endpoint and SQL query count / database time per request,
+kept as in-process histograms and rendered in Prometheus text format
+"""
+import threading
+import time
+from bisect import bisect_left
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from src.utils.slow_queries import slow_query_log
+
+# Upper bounds in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set"""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        """Record one observation for a label set"""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0, 0.0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def clear(self):
+        """Drop all observations"""
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        """Prometheus text exposition lines"""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted(self._series.items())
+            series = [(labels, list(counts), count, total) for labels, (counts, count, total) in series]
+        for label_values, counts, count, total in series:
+            labels = list(zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{_format_labels(labels + [("le", _format_value(bound))])} {cumulative}')
+            lines.append(f'{self.name}_bucket{_format_labels(labels + [("le", "+Inf")])} {count}')
+            lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(labels)} {count}')
+        return lines
+
+
+class RequestMetrics:
+    """Histograms fed by the request hooks in init_metrics"""
+
+    def __init__(self):
+        self.request_duration = Histogram(
+            'http_request_duration_seconds', 'Wall time per request.',
+            ('endpoint', 'method', 'status'), LATENCY_BUCKETS
+        )
+        self.request_queries = Histogram(
+            'http_request_db_queries', 'SQL statements executed per request.',
+            ('endpoint',), QUERY_COUNT_BUCKETS
+        )
+        self.request_db_time = Histogram(
+            'http_request_db_seconds', 'Time spent executing SQL per request.',
+            ('endpoint',), LATENCY_BUCKETS
+        )
+
+    def clear(self):
+        """Drop all observations"""
+        for histogram in (self.request_duration, self.request_queries, self.request_db_time):
+            histogram.clear()
+
+    def render(self, extra_lines=()):
+        """Full Prometheus text exposition"""
+        lines = []
+        for histogram in (self.request_duration, self.request_queries, self.request_db_time):
+            lines.extend(histogram.render())
+        lines.extend(extra_lines)
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide metrics shared by every request thread
+request_metrics = RequestMetrics()
+
+
+def register_query_hooks(engine):
+    """
+    Time every statement once for the request stats and the slow query log
+
+    The start time is kept on the statement's execution context, so a
+    statement that raises (and never reaches after_cursor_execute) leaves
+    nothing behind on the connection. Statements executed outside a request
+    (CLI, background writer) are not attributed to any endpoint.
+    """
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_started = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_query_started', None)
+        if started is None:
+            return
+        duration = time.perf_counter() - started
+        if has_request_context() and 'request_metrics' in g:
+            stats = g.request_metrics
+            stats['queries'] += 1
+            stats['db_time'] += duration
+        slow_query_log.observe(conn, cursor, statement, parameters, executemany, duration * 1000)
+
+
+def init_metrics(app):
+    """
+    Install the per-request timing hooks
+
+    With METRICS_HEADERS set, responses also carry X-Query-Count and a
+    Server-Timing header with database and total time.
+    """
+    @app.before_request
+    def start_request_metrics():
+        g.request_metrics = {'started': time.perf_counter(), 'queries': 0, 'db_time': 0.0}
+
+    @app.after_request
+    def record_request_metrics(response):
+        stats = g.pop('request_metrics', None)
+        if stats is None:
+            return response
+
+        elapsed = time.perf_counter() - stats['started']
+        endpoint = request.endpoint or 'unmatched'
+        request_metrics.request_duration.observe(elapsed, endpoint, request.method, str(response.status_code))
+        request_metrics.request_queries.observe(stats['queries'], endpoint)
+        request_metrics.request_db_time.observe(stats['db_time'], endpoint)
+
+        if app.config.get('METRICS_HEADERS'):
+            response.headers['X-Query-Count'] = str(stats['queries'])
+            response.headers['Server-Timing'] = (
+                f'db;dur={stats["db_time"] * 1000:.2f};desc="{stats["queries"]} queries", '
+                f'app;dur={elapsed * 1000:.2f}'
+            )
+        return response
@@ -0,0 +1,71 @@
+"""
+Keyset (cursor) pagination utilities
+"""
+import base64
+import json
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 500
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(values):
+    """
+    Encode the sort key of the last row of a page as an opaque cursor
+    
+    Args:
+        values: List of JSON-serializable key values
+        
+    Returns:
+        URL-safe cursor string
+    """
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, types):
+    """
+    Decode a cursor produced by encode_cursor
+    
+    Args:
+        cursor: Cursor string
+        types: Expected type of each key value, e.g. (str, int)
+        
+    Returns:
+        List of key values
+        
+    Raises:
+        InvalidCursorError: If the cursor is malformed or a value has the wrong type
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise InvalidCursorError("Invalid cursor")
+    
+    if not isinstance(values, list) or len(values) != len(types):
+        raise InvalidCursorError("Invalid cursor")
+    for value, expected in zip(values, types):
+        # bool is an int subclass but never a valid key value
+        if not isinstance(value, expected) or isinstance(value, bool):
+            raise InvalidCursorError("Invalid cursor")
+    return values
+
+
+def parse_limit(value, default=DEFAULT_PAGE_LIMIT):
+    """
+    Clamp a requested page size to [1, MAX_PAGE_LIMIT]
+    
+    Args:
+        value: Requested limit (int or None)
+        default: Page size used when no limit is requested
+        
+    Returns:
+        int: Page size
+    """
+    if not value:
+        return default
+    return max(1, min(int(value), MAX_PAGE_LIMIT))
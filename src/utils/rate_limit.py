@@ -0,0 +1,246 @@
+"""
+Admission control
+In-process token-bucket rate limiting per client and endpoint class, and a
+global concurrency cap for expensive endpoints. Rejections are immediate
+429 responses with Retry-After, so overload never queues on the database.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import jsonify, request
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600}
+
+# Endpoint class -> "<burst>/<period>": up to burst requests at once,
+# refilled at burst per period
+DEFAULT_LIMITS = {
+    'scan': '20/second',      # attendance record, batch and sync
+    'login': '5/minute',      # OTP generation and verification, per faculty email
+    'login_ip': '30/minute',  # the same, per client IP (shared by everyone behind a NAT)
+    'upload': '10/minute',    # student file uploads
+}
+
+
+def parse_limit(spec):
+    """
+    Parse a limit like "5/minute"
+
+    Returns:
+        tuple: (refill rate per second, burst)
+
+    Raises:
+        ValueError: If the spec is malformed
+    """
+    try:
+        count, period = spec.strip().split('/')
+        count = int(count)
+        seconds = PERIODS[period.strip().lower()]
+    except (AttributeError, ValueError, KeyError):
+        raise ValueError(f"Invalid rate limit '{spec}'. Use <count>/<second|minute|hour>")
+    if count <= 0:
+        raise ValueError(f"Invalid rate limit '{spec}'. Count must be positive")
+    return count / seconds, count
+
+
+class RateLimiter:
+    """
+    Token buckets keyed by (endpoint class, client identity)
+
+    Least recently used buckets are dropped beyond ``max_keys``; a dropped
+    bucket simply starts full again.
+    """
+
+    def __init__(self, limits=None, max_keys=10000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self.configure(limits)
+
+    def configure(self, limits=None, enabled=True):
+        """Set the per-class limits and reset all buckets and counters"""
+        with self._lock:
+            self.enabled = enabled
+            self.limits = {name: parse_limit(spec) for name, spec in (limits or DEFAULT_LIMITS).items()}
+            self._buckets = OrderedDict()
+            self.allowed = {name: 0 for name in self.limits}
+            self.rejected = {name: 0 for name in self.limits}
+
+    def acquire(self, endpoint_class, *identities):
+        """
+        Take one token from every identity's bucket for an endpoint class
+
+        Args:
+            endpoint_class: Key of the limits table
+            identities: Client keys (IP address, faculty email); None is skipped
+
+        Returns:
+            float: 0 if allowed, otherwise seconds until a retry can succeed
+        """
+        return self.acquire_all([(endpoint_class, identity) for identity in identities])
+
+    def acquire_all(self, checks):
+        """
+        Take one token from each (endpoint class, identity) bucket, or none
+        of them when any bucket is empty
+
+        Classes missing from the limits table and None identities are skipped.
+
+        Returns:
+            float: 0 if allowed, otherwise seconds until a retry can succeed
+        """
+        if not self.enabled:
+            return 0
+        now = time.monotonic()
+
+        with self._lock:
+            buckets = []
+            for endpoint_class, identity in checks:
+                if identity is None or endpoint_class not in self.limits:
+                    continue
+                rate, burst = self.limits[endpoint_class]
+                key = (endpoint_class, identity)
+                tokens, updated = self._buckets.get(key, (burst, now))
+                tokens = min(burst, tokens + (now - updated) * rate)
+                buckets.append((key, tokens, rate))
+
+            waits = {key[0]: (1 - tokens) / rate for key, tokens, rate in buckets if tokens < 1}
+            wait = max(waits.values(), default=0)
+            for key, tokens, _ in buckets:
+                self._buckets[key] = (tokens if wait else tokens - 1, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+            for endpoint_class in dict.fromkeys(key[0] for key, _, _ in buckets):
+                if endpoint_class in waits:
+                    self.rejected[endpoint_class] += 1
+                elif not wait:
+                    self.allowed[endpoint_class] += 1
+            return wait
+
+    def stats(self):
+        """Limits and allowed/rejected counts per endpoint class"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'tracked_clients': len(self._buckets),
+                'classes': {
+                    name: {
+                        'rate_per_second': round(rate, 4),
+                        'burst': burst,
+                        'allowed': self.allowed[name],
+                        'rejected': self.rejected[name]
+                    }
+                    for name, (rate, burst) in self.limits.items()
+                }
+            }
+
+
+class ConcurrencyLimiter:
+    """Cap on requests in flight across all expensive endpoints"""
+
+    def __init__(self, max_concurrent=4):
+        self._lock = threading.Lock()
+        self.configure(max_concurrent)
+
+    def configure(self, max_concurrent):
+        """Set the cap and reset counters"""
+        with self._lock:
+            self.max_concurrent = max_concurrent
+            self.in_flight = 0
+            self.admitted = 0
+            self.rejected = 0
+
+    def try_acquire(self):
+        """Claim a slot without waiting; False when all slots are taken"""
+        with self._lock:
+            if self.in_flight >= self.max_concurrent:
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+
+    def release(self):
+        """Return a slot"""
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+
+    def stats(self):
+        """Slots in use and admitted/rejected counts"""
+        with self._lock:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'in_flight': self.in_flight,
+                'admitted': self.admitted,
+                'rejected': self.rejected
+            }
+
+
+# Process-wide limiters, configured in create_app
+rate_limiter = RateLimiter()
+expensive_requests = ConcurrencyLimiter()
+
+
+def _too_many(message, retry_after):
+    response = jsonify({'error': message})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def rate_limited(endpoint_class, email_field=None, ip_class=None):
+    """
+    Limit a view per client IP and, when the JSON body carries one, per
+    faculty email
+
+    Args:
+        endpoint_class: Key of the limits table
+        email_field: JSON body field holding the faculty email, optional
+        ip_class: Separate (looser) limits key for the IP bucket, optional;
+            keeps one user from exhausting an IP shared behind a NAT
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            email = None
+            if email_field:
+                data = request.get_json(silent=True)
+                if isinstance(data, dict) and isinstance(data.get(email_field), str):
+                    email = 'email:' + data[email_field].strip().lower()
+
+            wait = rate_limiter.acquire_all([
+                (ip_class or endpoint_class, 'ip:' + (request.remote_addr or '')),
+                (endpoint_class, email)
+            ])
+            if wait:
+                return _too_many('Too many requests. Please slow down', wait)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def concurrency_limited(view):
+    """
+    Admit a view only while an expensive-request slot is free
+
+    Streamed responses hold their slot until the stream is closed.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not expensive_requests.try_acquire():
+            return _too_many('Server busy. Please retry shortly', 1)
+        try:
+            response = view(*args, **kwargs)
+        except Exception:
+            expensive_requests.release()
+            raise
+
+        body = response[0] if isinstance(response, tuple) else response
+        if getattr(body, 'is_streamed', False):
+            body.call_on_close(expensive_requests.release)
+        else:
+            expensive_requests.release()
+        return response
+    return wrapper
@@ -0,0 +1,199 @@
+"""
+Slow query log
+Statements slower than a threshold are recorded with normalized SQL, the
+shape of their parameters, the service method that issued them and the
+database's query plan (captured once per distinct statement)
+"""
+import logging
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from flask import has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_SPACE = re.compile(r'\s+')
+_PLACEHOLDER = re.compile(r'%\(\w+\)s|%s|:\w+|\$\d+')
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+_SAVEPOINT = 'slow_query_explain'
+
+# Frames from these packages are not reported as the caller
+_SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SKIPPED_DIRS = (os.path.join(_SRC_DIR, 'utils'),)
+
+
+def normalize_sql(statement):
+    """Collapse whitespace and replace literals and placeholder lists with ?"""
+    sql = _SPACE.sub(' ', statement).strip()
+    sql = _STRING.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _IN_LIST.sub('(?, ...)', sql)
+
+
+def parameter_shape(parameters, executemany):
+    """Types of the bound parameters without their values"""
+    def shape(params):
+        if isinstance(params, dict):
+            return {name: type(value).__name__ for name, value in params.items()}
+        if isinstance(params, (list, tuple)):
+            return [type(value).__name__ for value in params]
+        return type(params).__name__
+
+    if executemany:
+        rows = list(parameters or [])
+        return {'rows': len(rows), 'row': shape(rows[0]) if rows else None}
+    return shape(parameters)
+
+
+def find_caller():
+    """
+    The innermost application frame outside src/utils, as "Class.method"
+
+    Returns:
+        str or None
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(_SRC_DIR) and not filename.startswith(_SKIPPED_DIRS):
+            return getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)
+        frame = frame.f_back
+    return None
+
+
+class SlowQueryLog:
+    """
+    Bounded log of slow statements
+
+    Query plans are cached per normalized statement so each distinct query
+    is explained once, not on every slow execution.
+    """
+
+    def __init__(self, threshold_ms=None, max_entries=100, max_plans=500):
+        self._lock = threading.Lock()
+        self.max_plans = max_plans
+        self.configure(threshold_ms, max_entries)
+
+    def configure(self, threshold_ms=None, max_entries=100):
+        """Set the threshold (None disables the log) and clear all entries"""
+        with self._lock:
+            self.threshold_ms = threshold_ms
+            self.entries = deque(maxlen=max_entries)
+            self._plans = OrderedDict()
+            self.recorded = 0
+
+    @property
+    def enabled(self):
+        return self.threshold_ms is not None
+
+    def observe(self, conn, cursor, statement, parameters, executemany, duration_ms):
+        """Record a timed statement if the log is enabled and it crossed the threshold"""
+        if self.enabled and duration_ms >= self.threshold_ms:
+            self.record(conn, cursor, statement, parameters, executemany, duration_ms)
+
+    def record(self, conn, cursor, statement, parameters, executemany, duration_ms):
+        """Log one slow statement, explaining it the first time it is seen"""
+        sql = normalize_sql(statement)
+        with self._lock:
+            plan = self._plans.get(sql)
+        if plan is None:
+            plan = self._explain(conn, cursor, statement, parameters, executemany)
+            with self._lock:
+                self._plans[sql] = plan
+                while len(self._plans) > self.max_plans:
+                    self._plans.popitem(last=False)
+
+        entry = {
+            'at': datetime.utcnow().isoformat(),
+            'duration_ms': round(duration_ms, 2),
+            'statement': sql,
+            'parameters': parameter_shape(parameters, executemany),
+            'caller': find_caller(),
+            'endpoint': request.endpoint if has_request_context() else None,
+            'plan': plan
+        }
+        with self._lock:
+            self.entries.append(entry)
+            self.recorded += 1
+
+        logger.warning('Slow query (%.1f ms) from %s: %s%s', duration_ms, entry['caller'], sql,
+                       f" | plan: {' / '.join(plan)}" if plan else '')
+
+    def recent(self, limit=None):
+        """Logged entries, newest first"""
+        with self._lock:
+            entries = list(reversed(self.entries))
+        return entries[:limit] if limit else entries
+
+    def clear(self):
+        """Drop logged entries (captured plans are kept)"""
+        with self._lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'threshold_ms': self.threshold_ms,
+                'entries': len(self.entries),
+                'max_entries': self.entries.maxlen,
+                'recorded': self.recorded,
+                'plans_cached': len(self._plans)
+            }
+
+    @staticmethod
+    def _explain(conn, cursor, statement, parameters, executemany):
+        """
+        EXPLAIN QUERY PLAN (SQLite) or EXPLAIN (PostgreSQL) on a fresh DBAPI cursor
+
+        The plan runs on the caller's connection. On PostgreSQL a failed
+        statement aborts the open transaction, so EXPLAIN is wrapped in a
+        savepoint that is rolled back on error.
+        """
+        if executemany or not statement.lstrip().upper().startswith(_EXPLAINABLE):
+            return []
+
+        dialect = conn.dialect.name
+        if dialect == 'sqlite':
+            prefix = 'EXPLAIN QUERY PLAN '
+        elif dialect == 'postgresql':
+            prefix = 'EXPLAIN '
+        else:
+            return []
+
+        dbapi_connection = cursor.connection
+        isolate = dialect == 'postgresql' and not getattr(dbapi_connection, 'autocommit', False)
+        try:
+            explain = dbapi_connection.cursor()
+            try:
+                if isolate:
+                    explain.execute(f'SAVEPOINT {_SAVEPOINT}')
+                try:
+                    explain.execute(prefix + statement, parameters)
+                    rows = explain.fetchall()
+                except Exception:
+                    if isolate:
+                        explain.execute(f'ROLLBACK TO SAVEPOINT {_SAVEPOINT}')
+                    raise
+                if isolate:
+                    explain.execute(f'RELEASE SAVEPOINT {_SAVEPOINT}')
+            finally:
+                explain.close()
+        except Exception as e:
+            return [f'(plan unavailable: {e})']
+
+        if dialect == 'sqlite':
+            # (id, parent, notused, detail)
+            return [row[-1] for row in rows]
+        return [row[0] for row in rows]
+
+
+# Process-wide log, configured in create_app
+slow_query_log = SlowQueryLog()
+
@@ -0,0 +1,62 @@
+"""
+Signed expiring tokens
+HMAC-SHA256 tokens whose signature and expiry can be checked without a
+database lookup
+"""
+import base64
+import hashlib
+import hmac
+import secrets
+import time
+
+
+class InvalidTokenError(Exception):
+    """Raised when a token is malformed, forged or expired"""
+
+
+def _signature(secret, payload):
+    digest = hmac.new(secret.encode(), payload.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+
+def sign_token(secret, subject, expires_at, token_id=None):
+    """
+    Create a signed token
+
+    Args:
+        secret: Signing key (the app's SECRET_KEY)
+        subject: Integer ID the token is issued to
+        expires_at: Expiry as a Unix timestamp
+        token_id: Unique token ID, generated when omitted
+
+    Returns:
+        str: "<subject>.<expires_at>.<token_id>.<signature>"
+    """
+    token_id = token_id or secrets.token_urlsafe(12)
+    payload = f'{int(subject)}.{int(expires_at)}.{token_id}'
+    return f'{payload}.{_signature(secret, payload)}'
+
+
+def verify_token(secret, token, now=None):
+    """
+    Check a token's signature and expiry
+
+    Returns:
+        tuple: (subject, expires_at, token_id)
+
+    Raises:
+        InvalidTokenError: If the token is malformed, forged or expired
+    """
+    try:
+        payload, signature = token.rsplit('.', 1)
+        subject, expires_at, token_id = payload.split('.')
+        subject, expires_at = int(subject), int(expires_at)
+    except (AttributeError, ValueError):
+        raise InvalidTokenError('Invalid token')
+
+    if not hmac.compare_digest(signature, _signature(secret, payload)):
+        raise InvalidTokenError('Invalid token')
+    if expires_at <= (now if now is not None else time.time()):
+        raise InvalidTokenError('Token expired. Please login again')
+    return subject, expires_at, token_id
+
@@ -0,0 +1,81 @@
+"""
+Upsert helpers
+Atomic "add to a keyed counter row, creating it if missing" writes shared
+by the rollup, counter and table version services
+"""
+from sqlalchemy import case, or_
+from src.models import db
+
+
+def key_values(section, subject):
+    """
+    Key column values for a record's section and subject
+
+    Unrecorded values are stored as '' because NULLs never conflict in a
+    unique index.
+    """
+    return section or '', subject or ''
+
+
+def _dialect_insert():
+    """The session's dialect insert() with ON CONFLICT support, or None"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+
+def _merged(stored, new, keep_latest):
+    """Column expression combining the stored and new value"""
+    if keep_latest:
+        return case((or_(stored.is_(None), new > stored), new), else_=stored)
+    return stored + new
+
+
+def upsert_increment(table, key_columns, deltas, latest=(), assign=None):
+    """
+    Atomically add deltas to keyed rows, creating the rows that are missing
+
+    Uses INSERT ... ON CONFLICT DO UPDATE on PostgreSQL and SQLite so
+    concurrent writers never race on creating a row; other databases fall
+    back to an UPDATE followed by an INSERT when nothing matched.
+
+    Args:
+        table: Table with a unique constraint on key_columns
+        key_columns: Names of the key columns
+        deltas: {key tuple: {column: value}}; values are added to the stored
+            row, or inserted as they are for a new row
+        latest: Columns of the value dicts that keep the greater of the
+            stored and new value instead of being added
+        assign: {column: value} written as-is on every insert and update
+    """
+    if not deltas:
+        return
+
+    insert = _dialect_insert()
+    assign = assign or {}
+    for key, values in deltas.items():
+        row = dict(zip(key_columns, key), **values, **assign)
+
+        if insert is not None:
+            stmt = insert(table).values(**row)
+            changes = {
+                column: _merged(table.c[column], stmt.excluded[column], column in latest) for column in values
+            }
+            changes.update(assign)
+            db.session.execute(stmt.on_conflict_do_update(index_elements=list(key_columns), set_=changes))
+            continue
+
+        changes = {column: _merged(table.c[column], value, column in latest) for column, value in values.items()}
+        changes.update(assign)
+        updated = db.session.execute(
+            table.update().where(
+                *[table.c[column] == value for column, value in zip(key_columns, key)]
+            ).values(**changes)
+        ).rowcount
+        if not updated:
+            db.session.execute(table.insert().values(**row))
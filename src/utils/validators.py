@@ -2,6 +2,10 @@
 Input validation utilities
 """
 import re
+from datetime import datetime, timedelta, timezone
+
+# Device clocks may run slightly ahead of the server
+MAX_CLOCK_SKEW = timedelta(minutes=5)
 
 
 def validate_student_data(data):
@@ -54,3 +58,49 @@ def validate_nfc_tag(tag_id):
         return False, "Invalid NFC tag ID format"
     
     return True, None
+
+
+def validate_scan_uuid(scan_uuid):
+    """
+    Validate a client-generated scan UUID
+    
+    Args:
+        scan_uuid: UUID string created by the scanning device
+        
+    Returns:
+        tuple: (is_valid, error_message)
+    """
+    if not scan_uuid or not isinstance(scan_uuid, str):
+        return False, "scan_uuid is required"
+    
+    if not re.match(r'^[A-Fa-f0-9]{8}-[A-Fa-f0-9]{4}-[A-Fa-f0-9]{4}-[A-Fa-f0-9]{4}-[A-Fa-f0-9]{12}$', scan_uuid):
+        return False, "Invalid scan_uuid format"
+    
+    return True, None
+
+
+def parse_device_timestamp(value):
+    """
+    Parse an ISO 8601 scan time reported by a device
+    
+    Args:
+        value: Timestamp string, e.g. 2024-01-15T09:05:12.345Z
+        
+    Returns:
+        tuple: (naive UTC datetime or None, error_message)
+    """
+    if not value or not isinstance(value, str):
+        return None, "scanned_at is required"
+    
+    try:
+        timestamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None, "Invalid scanned_at format. Use ISO 8601"
+    
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    if timestamp > datetime.utcnow() + MAX_CLOCK_SKEW:
+        return None, "scanned_at is in the future"
+    
+    return timestamp, None
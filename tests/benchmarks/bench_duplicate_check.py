@@ -0,0 +1,118 @@
+"""
+Duplicate-Window Check Benchmark
+Compares the per-scan duplicate decision at 1M+ attendance rows:
+
+  1. SQL probe with only the single-column student_id/timestamp indexes
+  2. SQL probe served by the composite (student_id, timestamp) index
+  3. In-memory recent-scan index
+
+Usage:
+    python -m tests.benchmarks.bench_duplicate_check --rows 1000000
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from tests.benchmarks.common import latency_line, make_parser, scratch_database_url
+
+
+def report(label, samples):
+    """Print latency summary in microseconds"""
+    print(latency_line(label, samples, 42, unit='us'))
+
+
+def seed(db, Student, Attendance, students, rows):
+    """Insert students and historical attendance spread over 180 days"""
+    from sqlalchemy import insert
+    
+    now = datetime.utcnow()
+    db.session.execute(insert(Student), [
+        {
+            'name': f'Student {i}',
+            'register_number': f'BENCH{i:06d}',
+            'section': f'S{i % 40:02d}',
+            'department': 'Computer Science',
+            'duration': 'Year 2',
+        }
+        for i in range(1, students + 1)
+    ])
+    
+    batch = []
+    for _ in range(rows):
+        batch.append({
+            'student_id': random.randint(1, students),
+            'timestamp': now - timedelta(seconds=random.randint(0, 180 * 86400)),
+            'recorded_by': 'Benchmark',
+        })
+        if len(batch) == 50000:
+            db.session.execute(insert(Attendance), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(Attendance), batch)
+    db.session.commit()
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000, help='historical attendance rows')
+    parser.add_argument('--students', type=int, default=20_000, help='number of students')
+    parser.add_argument('--probes', type=int, default=5_000, help='duplicate checks per scenario')
+    args = parser.parse_args()
+    
+    os.environ['DATABASE_URL'] = scratch_database_url('bench_dup_')
+    
+    from sqlalchemy import text
+    from src.app import create_app
+    from src.models import db, Student, Attendance
+    from src.services.scan_index import scan_index, DUPLICATE_WINDOW
+    
+    app = create_app()
+    with app.app_context():
+        print(f"Seeding {args.students:,} students and {args.rows:,} attendance rows...")
+        started = time.perf_counter()
+        seed(db, Student, Attendance, args.students, args.rows)
+        db.session.execute(text('ANALYZE'))
+        print(f"Seeded in {time.perf_counter() - started:.1f}s\n")
+        
+        probe_ids = [random.randint(1, args.students) for _ in range(args.probes)]
+        
+        def sql_probe():
+            samples = []
+            for student_id in probe_ids:
+                started = time.perf_counter()
+                Attendance.query.filter(
+                    Attendance.student_id == student_id,
+                    Attendance.timestamp >= datetime.utcnow() - DUPLICATE_WINDOW
+                ).first()
+                samples.append(time.perf_counter() - started)
+            return samples
+        
+        db.session.execute(text('DROP INDEX IF EXISTS ix_attendance_student_timestamp'))
+        db.session.commit()
+        report('SQL probe, single-column indexes', sql_probe())
+        
+        db.session.execute(text(
+            'CREATE INDEX ix_attendance_student_timestamp ON attendance (student_id, timestamp)'
+        ))
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+        report('SQL probe, composite index', sql_probe())
+        
+        started = time.perf_counter()
+        size = scan_index.rebuild()
+        print(f"\nRecent-scan index rebuilt with {size:,} students in {(time.perf_counter() - started) * 1000:.1f} ms")
+        
+        samples = []
+        for student_id in probe_ids:
+            started = time.perf_counter()
+            scan_index.last_scan(student_id)
+            samples.append(time.perf_counter() - started)
+        report('In-memory recent-scan index', samples)
+
+
+if __name__ == '__main__':
+    main()
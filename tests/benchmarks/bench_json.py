@@ -0,0 +1,87 @@
+"""
+JSON Response Benchmark
+Serialization time and bytes on the wire for a student list response:
+
+  1. stdlib json provider (Flask default encoder settings)
+  2. orjson provider, when installed
+  3. each of the above gzipped at the configured level
+
+Usage:
+    python -m tests.benchmarks.bench_json --students 10000
+"""
+import gzip
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from tests.benchmarks.common import latency_line, make_parser, scratch_database_url
+
+
+def report(label, samples, size):
+    """Print latency summary in milliseconds and payload size"""
+    print(latency_line(label, samples, 28, percentiles=(95,), extra=f"{size / 1024:>9.1f} KiB"))
+
+
+def build_payload(Student, count):
+    """The /api/students response body for count students"""
+    created = datetime(2024, 1, 1, 9, 0)
+    students = [
+        Student(
+            id=i + 1,
+            name=f'Student {i:05d}',
+            register_number=f'2024CS{i:06d}',
+            section=chr(65 + i % 4),
+            department='Computer Science',
+            duration=f'Year {1 + i % 4}',
+            nfc_tag_id=f'04:A2:{i % 256:02X}:{i // 256 % 256:02X}:1B:2C:80' if i % 3 else None,
+            created_at=created + timedelta(minutes=i),
+            updated_at=created + timedelta(minutes=i)
+        )
+        for i in range(count)
+    ]
+    return {'count': count, 'students': [s.to_dict() for s in students]}
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument('--students', type=int, default=10000, help='Students in the list')
+    parser.add_argument('--repeat', type=int, default=30, help='Encodings per provider')
+    parser.add_argument('--level', type=int, default=6, help='gzip compression level')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', scratch_database_url('bench_json_'))
+
+    from src.app import create_app
+    from src.models import Student
+    from src.utils.json_provider import PROVIDERS, orjson
+
+    app = create_app()
+    payload = build_payload(Student, args.students)
+    print(f"{args.students} students, orjson {'installed' if orjson else 'not installed'}\n")
+
+    for name, provider_class in PROVIDERS.items():
+        if name == 'orjson' and orjson is None:
+            continue
+        provider = provider_class(app)
+
+        with app.test_request_context():
+            samples = []
+            for _ in range(args.repeat):
+                began = time.perf_counter()
+                body = provider.response(payload).get_data()
+                samples.append(time.perf_counter() - began)
+        report(f'{name} encode', samples, len(body))
+
+        samples = []
+        for _ in range(args.repeat):
+            began = time.perf_counter()
+            compressed = gzip.compress(body, compresslevel=args.level)
+            samples.append(time.perf_counter() - began)
+        report(f'{name} + gzip level {args.level}', samples, len(compressed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+"""
+Scan-Storm Benchmark
+Seeds a campus (students, class sections, historical scans) and drives the
+API through the Flask test client with realistic load:
+
+  1. class-start bursts      concurrent scanners POSTing /api/attendance/record
+  2. dashboard polling       /api/attendance/stats (with If-None-Match) and /recent
+  3. search keystrokes       /api/students?search= for each typed prefix
+  4. bulk uploads            CSV files POSTed to /api/students/upload
+
+Reports throughput and p50/p95/p99 latency per scenario. --save writes the
+results as a JSON baseline; --compare checks a run against one and exits
+non-zero when a scenario regressed beyond --tolerance.
+
+Usage:
+    python -m tests.benchmarks.bench_scan_storm --save tests/benchmarks/scan_storm_baseline.json
+    python -m tests.benchmarks.bench_scan_storm --compare tests/benchmarks/scan_storm_baseline.json
+    python -m tests.benchmarks.bench_scan_storm --students 20000 --sections 100 --history-days 60
+"""
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from tests.benchmarks.common import percentile, make_parser, scratch_database_url
+
+FIRST_NAMES = ['Aarav', 'Maria', 'John', 'Priya', 'Wei', 'Fatima', 'Lucas', 'Amara', 'Kenji', 'Sofia',
+               'Omar', 'Elena', 'Ravi', 'Chloe', 'Mateo', 'Aisha', 'Noah', 'Leila', 'Ivan', 'Grace']
+LAST_NAMES = ['Sharma', 'Lopez', 'Smith', 'Nair', 'Chen', 'Khan', 'Martin', 'Okafor', 'Tanaka', 'Rossi',
+              'Haddad', 'Petrova', 'Iyer', 'Dubois', 'Garcia', 'Bello', 'Wilson', 'Farah', 'Ivanov', 'Kim']
+SUBJECTS = ['Mathematics', 'Physics', 'Chemistry', 'Programming', 'Electronics', 'Mechanics']
+CLASS_TIMES = ['09:00-09:50', '10:00-10:50', '11:00-11:50', '14:00-14:50']
+
+# Metrics compared against a baseline, and whether higher is better
+COMPARED = {'throughput': True, 'p95_ms': False}
+
+
+def tag_for(index):
+    """Deterministic NFC tag ID for the index-th seeded student"""
+    return ':'.join(f'{(index >> shift) & 0xFF:02X}' for shift in (24, 16, 8, 0)) + ':AA:BB:CC'
+
+
+def summarize(latencies, elapsed, errors, units=None):
+    """Scenario result: throughput and latency percentiles in milliseconds"""
+    millis = [s * 1000 for s in latencies] or [0.0]
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'throughput': round((units if units is not None else len(latencies)) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(statistics.median(millis), 2),
+        'p95_ms': round(percentile(millis, 95), 2),
+        'p99_ms': round(percentile(millis, 99), 2),
+        'max_ms': round(max(millis), 2)
+    }
+
+
+def seed(db, Student, Attendance, args):
+    """
+    Insert students spread over class sections (student section "S01" attends
+    class section "S-01"), with tags, and a history of past scans; derived
+    tables are rebuilt afterwards
+
+    Returns:
+        dict: section -> list of (student index, register number)
+    """
+    from sqlalchemy import insert
+    from src.services.counter_service import CounterService
+    from src.services.rollup_service import RollupService
+
+    rng = random.Random(42)
+    sections = [f'S-{i + 1:02d}' for i in range(args.sections)]
+    roster = {section: [] for section in sections}
+
+    students = []
+    for i in range(args.students):
+        section = sections[i % len(sections)]
+        register_number = f'{2020 + i % 4}CS{i:06d}'
+        students.append({
+            'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            'register_number': register_number,
+            'section': section.replace('-', ''),
+            'department': 'Computer Science',
+            'duration': f'Year {1 + i % 4}',
+            'nfc_tag_id': tag_for(i)
+        })
+        roster[section].append(i)
+    for start in range(0, len(students), 5000):
+        db.session.execute(insert(Student), students[start:start + 5000])
+    db.session.commit()
+
+    ids = dict(db.session.query(Student.register_number, Student.id))
+    today = datetime.utcnow().replace(hour=9, minute=0, second=0, microsecond=0)
+    history = []
+    for day in range(1, args.history_days + 1):
+        class_day = today - timedelta(days=day)
+        if class_day.weekday() >= 5:
+            continue
+        for s, section in enumerate(sections):
+            subject = SUBJECTS[(s + day) % len(SUBJECTS)]
+            class_time = CLASS_TIMES[(s + day) % len(CLASS_TIMES)]
+            for i in roster[section]:
+                if rng.random() > args.attendance_rate:
+                    continue
+                history.append({
+                    'student_id': ids[students[i]['register_number']],
+                    'timestamp': class_day + timedelta(minutes=rng.randint(0, 10), seconds=rng.randint(0, 59)),
+                    'recorded_by': 'Seed Faculty',
+                    'section': section,
+                    'subject': subject,
+                    'date': class_day.date().isoformat(),
+                    'class_time': class_time
+                })
+        if len(history) >= 20000:
+            db.session.execute(insert(Attendance), history)
+            history = []
+    if history:
+        db.session.execute(insert(Attendance), history)
+    db.session.commit()
+
+    RollupService.rebuild()
+    CounterService.rebuild()
+    return roster, students
+
+
+def run_class_start(app, roster, args):
+    """Every scanner thread runs one class: its whole section scans in, as fast as possible"""
+    sections = list(roster)[:args.scanners]
+    today = datetime.utcnow().date().isoformat()
+    latencies, errors = [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(len(sections) + 1)
+
+    def scanner(section, subject):
+        client = app.test_client()
+        local, failed = [], 0
+        barrier.wait()
+        for i in roster[section]:
+            payload = json.dumps({
+                'nfc_tag_id': tag_for(i), 'faculty_name': 'Storm Faculty', 'section': section,
+                'subject': subject, 'date': today, 'time': CLASS_TIMES[0]
+            })
+            began = time.perf_counter()
+            response = client.post('/api/attendance/record', data=payload, content_type='application/json')
+            local.append(time.perf_counter() - began)
+            if response.status_code not in (201, 202):
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    workers = [
+        threading.Thread(target=scanner, args=(section, SUBJECTS[s % len(SUBJECTS)]))
+        for s, section in enumerate(sections)
+    ]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    began = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return summarize(latencies, time.perf_counter() - began, sum(errors))
+
+
+def run_dashboard_polling(app, args):
+    """Dashboards alternately revalidating stats and fetching recent scans"""
+    client = app.test_client()
+    latencies, errors = [], 0
+    etag = None
+    began = time.perf_counter()
+    for n in range(args.polls):
+        if n % 2 == 0:
+            headers = {'If-None-Match': etag} if etag else {}
+            started = time.perf_counter()
+            response = client.get('/api/attendance/stats', headers=headers)
+            latencies.append(time.perf_counter() - started)
+            etag = response.headers.get('ETag', etag)
+            ok = response.status_code in (200, 304)
+        else:
+            started = time.perf_counter()
+            response = client.get('/api/attendance/recent?limit=50')
+            latencies.append(time.perf_counter() - started)
+            ok = response.status_code == 200
+        errors += 0 if ok else 1
+    return summarize(latencies, time.perf_counter() - began, errors)
+
+
+def run_search_keystrokes(app, students, args):
+    """Search-as-you-type: one request per prefix of a name or register number"""
+    rng = random.Random(7)
+    client = app.test_client()
+    latencies, errors = [], 0
+    began = time.perf_counter()
+    for _ in range(args.searches):
+        student = rng.choice(students)
+        term = student['name'] if rng.random() < 0.6 else student['register_number']
+        for length in range(1, len(term) + 1):
+            started = time.perf_counter()
+            response = client.get('/api/students', query_string={'search': term[:length], 'limit': 20})
+            latencies.append(time.perf_counter() - started)
+            errors += 0 if response.status_code == 200 else 1
+    return summarize(latencies, time.perf_counter() - began, errors)
+
+
+def run_bulk_uploads(app, args):
+    """CSV uploads of new students; throughput is in rows per second"""
+    client = app.test_client()
+    latencies, errors = [], 0
+    began = time.perf_counter()
+    for upload in range(args.uploads):
+        rows = ['Name,Register Number,Section,Department,Duration']
+        rows += [f'{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[i // len(FIRST_NAMES) % len(LAST_NAMES)]},'
+                 f'UP{upload:03d}{i:05d},S01,Computer Science,Year 1'
+                 for i in range(args.upload_rows)]
+        data = {'file': (io.BytesIO('\n'.join(rows).encode()), f'storm_{upload}.csv')}
+        started = time.perf_counter()
+        response = client.post('/api/students/upload', data=data, content_type='multipart/form-data')
+        latencies.append(time.perf_counter() - started)
+        errors += 0 if response.status_code == 201 else 1
+    return summarize(latencies, time.perf_counter() - began, errors, units=args.uploads * args.upload_rows)
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare scenario metrics against a baseline
+
+    Returns:
+        List of regression messages
+    """
+    regressions = []
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+        for metric, higher_is_better in COMPARED.items():
+            old, new = previous[metric], current[metric]
+            if not old:
+                continue
+            change = (new - old) / old
+            if (change < -tolerance) if higher_is_better else (change > tolerance):
+                regressions.append(f'{name}: {metric} {old} -> {new} ({change:+.0%})')
+    return regressions
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument('--students', type=int, default=3000, help='Students to seed')
+    parser.add_argument('--sections', type=int, default=30, help='Class sections')
+    parser.add_argument('--history-days', type=int, default=30, help='Days of historical scans')
+    parser.add_argument('--attendance-rate', type=float, default=0.85, help='Share of students at each class')
+    parser.add_argument('--scanners', type=int, default=8, help='Concurrent classes starting at once')
+    parser.add_argument('--polls', type=int, default=400, help='Dashboard requests')
+    parser.add_argument('--searches', type=int, default=40, help='Search terms typed')
+    parser.add_argument('--uploads', type=int, default=5, help='Bulk uploads')
+    parser.add_argument('--upload-rows', type=int, default=1000, help='Students per upload')
+    parser.add_argument('--database-url', help='Database to use (default: temporary SQLite file)')
+    parser.add_argument('--save', metavar='PATH', help='Write results as a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='Baseline to check this run against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative regression')
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.database_url or scratch_database_url('bench_storm_')
+    # Every test client request comes from one address
+    os.environ['RATE_LIMIT_ENABLED'] = 'false'
+
+    from src.app import create_app
+    from src.models import db, Student, Attendance
+
+    app = create_app()
+    with app.app_context():
+        began = time.perf_counter()
+        roster, students = seed(db, Student, Attendance, args)
+        history = Attendance.query.count()
+        print(f"Seeded {args.students} students in {args.sections} sections, {history} historical scans "
+              f"in {time.perf_counter() - began:.1f} s (profile {app.config['DB_PROFILE']})\n")
+
+    scenarios = [
+        ('class_start_burst', lambda: run_class_start(app, roster, args)),
+        ('dashboard_polling', lambda: run_dashboard_polling(app, args)),
+        ('search_keystrokes', lambda: run_search_keystrokes(app, students, args)),
+        ('bulk_upload', lambda: run_bulk_uploads(app, args)),
+    ]
+
+    results = {
+        'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'db_profile': app.config['DB_PROFILE'],
+            'json_provider': app.config['JSON_PROVIDER']
+        },
+        'parameters': {key: value for key, value in vars(args).items()
+                       if key not in ('database_url', 'save', 'compare', 'tolerance')},
+        'scenarios': {}
+    }
+
+    print(f"{'scenario':<20} {'requests':>8} {'errors':>7} {'throughput':>12} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, run in scenarios:
+        result = run()
+        results['scenarios'][name] = result
+        unit = 'rows/s' if name == 'bulk_upload' else 'req/s'
+        print(f"{name:<20} {result['requests']:>8} {result['errors']:>7} "
+              f"{result['throughput']:>6.0f} {unit:<5} {result['p50_ms']:>8.2f} "
+              f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\nRegressions beyond {args.tolerance:.0%}:")
+            for message in regressions:
+                print(f"  {message}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
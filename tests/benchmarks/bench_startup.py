@@ -0,0 +1,102 @@
+"""
+Cold-Start Benchmark
+Reports `python -X importtime` numbers for the application module and the
+wall-clock time of a fresh process building the app, against a budget:
+
+  1. Import time of the slowest modules (cumulative)
+  2. First start on an empty database (tables created)
+  3. Warm start on an existing database (schema version matches)
+
+Usage:
+    python -m tests.benchmarks.bench_startup --budget-ms 1500
+    python -m tests.benchmarks.bench_startup --module api.index
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, ROOT)
+
+from tests.benchmarks.common import make_parser, scratch_database_url
+
+# Snippet timed in a fresh interpreter; create_app() only exists for src.app
+STARTUP_SNIPPET = """
+import time
+start = time.perf_counter()
+import {module} as target
+if hasattr(target, 'create_app'):
+    target.create_app()
+print(time.perf_counter() - start)
+"""
+
+
+def run_python(args, env):
+    """Run the current interpreter in the project root and return the completed process"""
+    return subprocess.run(
+        [sys.executable] + args, cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True
+    )
+
+
+def import_times(module, env):
+    """
+    Parse -X importtime output for a module
+
+    Returns:
+        list: (cumulative_us, self_us, name) tuples, slowest first
+    """
+    result = run_python(['-X', 'importtime', '-c', f'import {module}'], env)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    return sorted(rows, reverse=True)
+
+
+def startup_seconds(module, env):
+    """Time one fresh process importing the module and building the app"""
+    result = run_python(['-c', STARTUP_SNIPPET.format(module=module)], env)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument('--module', default='src.app', help='Module to import (src.app or api.index)')
+    parser.add_argument('--runs', type=int, default=5, help='Warm-start repetitions')
+    parser.add_argument('--top', type=int, default=15, help='Slowest imports to list')
+    parser.add_argument('--budget-ms', type=float, default=1500, help='Cold-start budget for a warm database')
+    args = parser.parse_args()
+
+    env = dict(os.environ, DATABASE_URL=scratch_database_url('bench_startup_'))
+    env.pop('ATTENDANCE_WRITE_BEHIND', None)
+
+    rows = import_times(args.module, env)
+    total_us = next((cum for cum, _, name in rows if name == args.module), rows[0][0])
+    print(f"import {args.module}: {total_us / 1000:.1f} ms cumulative\n")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, name in rows[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+    heavy = [name for _, _, name in rows if name.split('.')[0] in ('pandas', 'numpy', 'openpyxl')]
+    if heavy:
+        print(f"\nwarning: heavy modules imported at startup: {', '.join(sorted(set(heavy))[:5])}")
+
+    first = startup_seconds(args.module, env)
+    warm = [startup_seconds(args.module, env) for _ in range(args.runs)]
+    warm_ms = statistics.median(warm) * 1000
+
+    print(f"\nfirst start (empty database) {first * 1000:>9.1f} ms")
+    print(f"warm start (median of {args.runs})   {warm_ms:>9.1f} ms   budget {args.budget_ms:.0f} ms")
+
+    if warm_ms > args.budget_ms:
+        print("FAIL: cold start exceeds budget")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Student Search Benchmark
+Compares student search at 100k+ students:
+
+  1. ILIKE '%term%' scan on name/register number (previous search path)
+  2. Indexed, ranked search (FTS5 trigram on SQLite, pg_trgm on PostgreSQL)
+
+Usage:
+    python -m tests.benchmarks.bench_student_search --students 100000
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from tests.benchmarks.common import latency_line, make_parser, scratch_database_url
+
+FIRST_NAMES = ['Aarav', 'Maria', 'John', 'Priya', 'Wei', 'Fatima', 'Lucas', 'Amara', 'Kenji', 'Sofia',
+               'Omar', 'Elena', 'Ravi', 'Chloe', 'Mateo', 'Aisha', 'Noah', 'Leila', 'Ivan', 'Grace']
+LAST_NAMES = ['Sharma', 'Lopez', 'Smith', 'Nair', 'Chen', 'Khan', 'Martin', 'Okafor', 'Tanaka', 'Rossi',
+              'Haddad', 'Petrova', 'Iyer', 'Dubois', 'Garcia', 'Bello', 'Wilson', 'Farah', 'Ivanov', 'Kim']
+DEPARTMENTS = ['CS', 'EC', 'ME', 'CE', 'EE']
+
+
+def report(label, samples, rows):
+    """Print latency summary in milliseconds"""
+    print(latency_line(label, samples, 36, extra=f"avg rows {statistics.mean(rows):>7.0f}"))
+
+
+def seed(db, Student, count):
+    """Insert students with realistic names and register numbers"""
+    from sqlalchemy import insert
+
+    rng = random.Random(42)
+    batch = []
+    for i in range(count):
+        department = DEPARTMENTS[i % len(DEPARTMENTS)]
+        batch.append({
+            'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            'register_number': f'{2018 + i % 6}{department}{i:06d}',
+            'section': chr(65 + i % 4),
+            'department': department,
+            'duration': f'Year {1 + i % 4}'
+        })
+        if len(batch) >= 5000:
+            db.session.execute(insert(Student), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(Student), batch)
+    db.session.commit()
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument('--students', type=int, default=100000, help='Students to seed')
+    parser.add_argument('--queries', type=int, default=200, help='Searches per path')
+    parser.add_argument('--database-url', help='Database to use (default: temporary SQLite file)')
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.database_url or scratch_database_url('bench_search_')
+
+    from src.app import create_app
+    from src.models import db, Student
+    from src.services.search_index import search_index
+    from src.services.student_service import StudentService
+
+    app = create_app()
+    with app.app_context():
+        if Student.query.count() < args.students:
+            print(f"Seeding {args.students} students...")
+            began = time.perf_counter()
+            seed(db, Student, args.students - Student.query.count())
+            print(f"  seeded in {time.perf_counter() - began:.1f} s (search index maintained by triggers)")
+        print(f"search index backend: {search_index.backend}\n")
+
+        rng = random.Random(7)
+        terms = []
+        for _ in range(args.queries):
+            kind = rng.random()
+            if kind < 0.4:
+                terms.append(rng.choice(LAST_NAMES)[:rng.randint(3, 6)].lower())
+            elif kind < 0.7:
+                terms.append(f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}")
+            else:
+                terms.append(f"{rng.randrange(args.students):06d}")
+
+        def ilike(term):
+            return StudentService._ilike(Student.query, term).order_by(Student.register_number).all()
+
+        for label, search in [
+            ('ILIKE scan (all matches)', ilike),
+            ('ILIKE scan (limit 50)', lambda term: StudentService._ilike(Student.query, term)
+                .order_by(Student.register_number).limit(50).all()),
+            ('indexed ranked search (limit 50)', StudentService.search_students),
+        ]:
+            samples, rows = [], []
+            for term in terms:
+                db.session.expunge_all()
+                began = time.perf_counter()
+                found = search(term)
+                samples.append(time.perf_counter() - began)
+                rows.append(len(found))
+            report(label, samples, rows)
+
+
+if __name__ == '__main__':
+    main()
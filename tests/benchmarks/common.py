@@ -0,0 +1,48 @@
+"""
+Shared benchmark helpers
+Command-line parsing, scratch databases and latency reporting used by the
+bench_* scripts
+"""
+import argparse
+import os
+import statistics
+import tempfile
+
+# Display scale and number format per latency unit
+UNITS = {'ms': (1000, '8.2f'), 'us': (1e6, '9.1f')}
+
+
+def percentile(values, pct):
+    """Return the pct-th percentile of a list of numbers"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def make_parser(doc):
+    """Argument parser showing a script's module docstring as its help"""
+    return argparse.ArgumentParser(description=doc, formatter_class=argparse.RawDescriptionHelpFormatter)
+
+
+def scratch_database_url(prefix, name='bench.db'):
+    """SQLite URL of a database file in a fresh temporary directory"""
+    return f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix=prefix), name)}"
+
+
+def latency_line(label, samples, width, unit='ms', percentiles=(50, 95), extra=''):
+    """
+    One summary line: mean and percentiles of durations measured in seconds
+
+    Args:
+        label: Scenario name, left-aligned in ``width`` columns
+        samples: Durations in seconds
+        unit: 'ms' or 'us'
+        percentiles: Percentiles to show after the mean
+        extra: Text appended to the line, optional
+    """
+    scale, number = UNITS[unit]
+    values = [s * scale for s in samples]
+    parts = [f"mean {statistics.mean(values):>{number}} {unit}"]
+    parts += [f"p{pct} {percentile(values, pct):>{number}} {unit}" for pct in percentiles]
+    if extra:
+        parts.append(extra)
+    return f"{label:<{width}} " + '   '.join(parts)
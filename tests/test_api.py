@@ -3,15 +3,21 @@ Test API Endpoints
 Sample test cases for REST API
 """
 import pytest
+import gzip
+import io
 import json
 import sys
 import os
+from contextlib import contextmanager
+from sqlalchemy import event
 
 # Add src to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.app import create_app
-from src.models import db
+from src.models import db, Student, Faculty, SchemaVersion, ensure_schema, SchemaMismatchError
+from src.services.attendance_service import AttendanceService
+from src.utils.pagination import encode_cursor
 
 
 @pytest.fixture
@@ -107,6 +113,56 @@ def test_get_student_by_id_api(client):
     assert data['student']['register_number'] == 'API003'
 
 
+def test_upload_students_api(client):
+    """Test POST /api/students/upload with CSV and Excel files"""
+    from openpyxl import Workbook
+    
+    csv_data = (
+        'name,Register Number,Section,Department,Duration\n'
+        'Upload One,UPL001,A,Computer Science,Year 1\n'
+        ',,,,\n'
+        'Upload Two,UPL002,A,Computer Science,Year 1\n'
+    )
+    response = client.post('/api/students/upload', data={
+        'file': (io.BytesIO(csv_data.encode('utf-8-sig')), 'students.csv')
+    }, content_type='multipart/form-data')
+    data = json.loads(response.data)
+    assert response.status_code == 201
+    assert data['success_count'] == 2
+    
+    workbook = Workbook()
+    workbook.active.append(['Name', 'Register Number', 'Section', 'Department', 'Duration'])
+    workbook.active.append(['Upload Three', 3003, 'B', 'Electronics', 'Year 2'])
+    workbook.active.append(['Upload One', 'UPL001', 'A', 'Computer Science', 'Year 1'])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    
+    response = client.post('/api/students/upload', data={
+        'file': (buffer, 'students.xlsx')
+    }, content_type='multipart/form-data')
+    data = json.loads(response.data)
+    assert data['success_count'] == 1
+    assert data['failed_count'] == 1
+    assert 'already exists' in data['errors'][0]['error']
+    
+    response = client.post('/api/students/upload', data={
+        'file': (io.BytesIO(b'Name,Section\nNobody,A\n'), 'students.csv')
+    }, content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert 'Missing required columns' in json.loads(response.data)['error']
+    
+    # Malformed bytes past the header are only met while rows are consumed
+    rows = ''.join(f'Late Error,LTE{i:04d},A,Computer Science,Year 1\n' for i in range(500))
+    malformed = ('Name,Register Number,Section,Department,Duration\n' + rows).encode() + b'Bad \xff Row,LTE9999,A,CS,Year 1\n'
+    response = client.post('/api/students/upload', data={
+        'file': (io.BytesIO(malformed), 'students.csv')
+    }, content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert json.loads(response.data)['error'].startswith('Error parsing file')
+    assert Student.query.filter(Student.register_number.like('LTE%')).count() == 0
+
+
 def test_attendance_stats_api(client):
     """Test GET /api/attendance/stats"""
     response = client.get('/api/attendance/stats')
@@ -117,5 +173,529 @@ def test_attendance_stats_api(client):
     assert 'today_attendance_count' in data
 
 
+def test_conditional_get_returns_304_until_a_write(client):
+    """Test ETag revalidation on student and stats endpoints"""
+    client.post('/api/students', data=json.dumps({
+        'name': 'Etag Student', 'register_number': 'ETAG001', 'section': 'A',
+        'department': 'Computer Science', 'duration': 'Year 1'
+    }), content_type='application/json')
+    
+    for url in ['/api/students', '/api/attendance/stats']:
+        first = client.get(url)
+        etag = first.headers['ETag']
+        assert etag.startswith('W/')
+        
+        cached = client.get(url, headers={'If-None-Match': etag})
+        assert cached.status_code == 304
+        assert cached.data == b''
+    
+    student_etag = client.get('/api/students').headers['ETag']
+    stats_etag = client.get('/api/attendance/stats').headers['ETag']
+    client.post('/api/attendance/record', data=json.dumps({'student_id': 1}),
+                content_type='application/json')
+    
+    # Attendance writes invalidate stats but not the student list
+    assert client.get('/api/students', headers={'If-None-Match': student_etag}).status_code == 304
+    response = client.get('/api/attendance/stats', headers={'If-None-Match': stats_etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != stats_etag
+    assert json.loads(response.data)['today_attendance_count'] >= 1
+    
+    client.delete('/api/students/1')
+    assert client.get('/api/students', headers={'If-None-Match': student_etag}).status_code == 200
+
+
+def test_if_modified_since_ignored_within_the_write_second(app, client, monkeypatch):
+    """Test Last-Modified is withheld until the second of the last write has passed"""
+    from datetime import datetime, timedelta, timezone
+    from werkzeug.http import http_date
+    from src.models import TableVersion
+    from src.utils import conditional
+    client.post('/api/students', data=json.dumps({
+        'name': 'Since Student', 'register_number': 'IMS001', 'section': 'A',
+        'department': 'Computer Science', 'duration': 'Year 1'
+    }), content_type='application/json')
+    with app.app_context():
+        written = db.session.get(TableVersion, 'students').updated_at.replace(tzinfo=timezone.utc)
+    
+    class FrozenDatetime(datetime):
+        now_at = written
+        
+        @classmethod
+        def now(cls, tz=None):
+            return cls.now_at
+    
+    monkeypatch.setattr(conditional, 'datetime', FrozenDatetime)
+    since = {'If-Modified-Since': http_date(written.replace(microsecond=0))}
+    
+    # A later write in the same second would share the truncated timestamp
+    response = client.get('/api/students', headers=since)
+    assert response.status_code == 200
+    assert 'Last-Modified' not in response.headers
+    
+    FrozenDatetime.now_at = written + timedelta(seconds=2)
+    response = client.get('/api/students')
+    assert response.headers['Last-Modified'] == since['If-Modified-Since']
+    assert client.get('/api/students', headers=since).status_code == 304
+    
+    # Attendance inserts carry no write time, so stats revalidate by ETag only
+    assert 'Last-Modified' not in client.get('/api/attendance/stats').headers
+
+
+def test_json_provider_and_gzip(app, client):
+    """Test ISO datetimes from the JSON provider and opt-in gzip above the threshold"""
+    from datetime import datetime
+    assert app.json.dumps({'at': datetime(2024, 1, 2, 9, 30)}) == '{"at":"2024-01-02T09:30:00"}'
+    
+    for i in range(30):
+        db.session.add(Student(name=f'Gzip Student {i}', register_number=f'GZ{i:03d}', section='A',
+                               department='Computer Science', duration='Year 1'))
+    db.session.commit()
+    
+    app.config['JSON_GZIP'] = True
+    app.config['JSON_GZIP_MIN_BYTES'] = 1024
+    
+    plain = client.get('/api/students')
+    assert 'Content-Encoding' not in plain.headers
+    
+    response = client.get('/api/students', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert len(response.data) < len(plain.data)
+    assert json.loads(gzip.decompress(response.data)) == json.loads(plain.data)
+    
+    small = client.get('/api/students/1', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+
+
+def test_remember_token_verified_without_database(app, client, monkeypatch):
+    """Test signed remember tokens, their cached profile and revocation shared between workers"""
+    from datetime import datetime, timedelta
+    from src.models import RevokedToken
+    from src.services.faculty_service import revoked_tokens
+    from src.utils.tokens import verify_token
+    
+    def post(url, payload):
+        return client.post(url, data=json.dumps(payload), content_type='application/json')
+    
+    def remember(email, name=None):
+        otp = json.loads(post('/api/faculty/login', {'email': email, 'name': name}).data)['otp']
+        return json.loads(post('/api/faculty/verify-otp', {
+            'email': email, 'otp': otp, 'remember_me': True
+        }).data)['remember_token']
+    
+    email = 'token.faculty@example.com'
+    token = remember(email, 'Token Faculty')
+    
+    response = post('/api/faculty/verify-token', {'email': email, 'token': token})
+    assert response.status_code == 200
+    assert json.loads(response.data)['faculty']['email'] == email
+    
+    with count_queries() as statements:
+        assert post('/api/faculty/verify-token', {'email': email, 'token': token}).status_code == 200
+        forged = token[:-1] + ('A' if token[-1] != 'A' else 'B')
+        assert post('/api/faculty/verify-token', {'email': email, 'token': forged}).status_code == 400
+        assert post('/api/faculty/verify-token', {'email': 'other@example.com', 'token': token}).status_code == 400
+    assert statements == []
+    
+    # A logout handled by another worker is seen on the next revocation reload
+    _, expires_at, token_id = verify_token(app.config['SECRET_KEY'], token)
+    db.session.add(RevokedToken(token_id=token_id, expires_at=datetime.utcfromtimestamp(expires_at)))
+    db.session.commit()
+    monkeypatch.setattr(revoked_tokens, 'ttl', 0)
+    assert post('/api/faculty/verify-token', {'email': email, 'token': token}).status_code == 400
+    monkeypatch.undo()
+    
+    token = remember(email)
+    post('/api/faculty/logout', {'email': email, 'token': token})
+    assert post('/api/faculty/verify-token', {'email': email, 'token': token}).status_code == 400
+    
+    # Unsigned tokens issued before signed ones are honoured until they expire
+    faculty = Faculty.query.filter_by(email=email).first()
+    faculty.remember_token = 'legacy-unsigned-token'
+    faculty.remember_expires = datetime.utcnow() + timedelta(days=1)
+    db.session.commit()
+    assert post('/api/faculty/verify-token', {'email': email, 'token': 'legacy-unsigned-token'}).status_code == 200
+    post('/api/faculty/logout', {'email': email})
+    assert post('/api/faculty/verify-token', {'email': email, 'token': 'legacy-unsigned-token'}).status_code == 400
+
+
+def test_request_settings_only_apply_inside_requests(app, client, monkeypatch):
+    """Test SET LOCAL limits reach request transactions, but not CLI work or exempt views"""
+    from sqlalchemy import text
+    applied = []
+    monkeypatch.setitem(app.config, 'DB_REQUEST_SETTINGS', {'statement_timeout': 5000})
+    
+    def exec_driver_sql(self, statement, *args, **kwargs):
+        applied.append(statement)
+    
+    from sqlalchemy.engine import Connection
+    monkeypatch.setattr(Connection, 'exec_driver_sql', exec_driver_sql)
+    
+    db.session.remove()
+    db.session.execute(text('SELECT 1'))
+    db.session.remove()
+    assert applied == []
+    
+    client.get('/api/students')
+    assert applied == ['SET LOCAL statement_timeout = 5000']
+    
+    applied.clear()
+    client.get('/api/attendance/export').get_data()
+    assert applied == []
+
+
+def test_rate_limit_and_concurrency_cap(client):
+    """Test 429 with Retry-After from the token buckets and the expensive-request cap"""
+    from src.utils.rate_limit import rate_limiter, expensive_requests
+    rate_limiter.configure({'login': '2/minute', 'login_ip': '4/minute'})
+    
+    def login(email):
+        return client.post('/api/faculty/login', data=json.dumps({'email': email, 'name': 'Limited'}),
+                           content_type='application/json')
+    
+    assert login('limited@example.com').status_code == 200
+    assert login('limited@example.com').status_code == 200
+    response = login('limited@example.com')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    
+    # One user exhausting their email's bucket does not lock out their IP,
+    # which has its own looser bucket
+    assert login('someone.else@example.com').status_code == 200
+    assert login('third@example.com').status_code == 200
+    assert login('fourth@example.com').status_code == 429
+    stats = json.loads(client.get('/api/attendance/limits/stats').data)
+    assert stats['rate_limits']['classes']['login']['rejected'] == 1
+    assert stats['rate_limits']['classes']['login_ip']['rejected'] == 1
+    
+    expensive_requests.configure(1)
+    assert expensive_requests.try_acquire()
+    assert client.get('/api/attendance/export').status_code == 429
+    expensive_requests.release()
+    
+    response = client.get('/api/attendance/export')
+    assert response.status_code == 200
+    response.get_data()
+    response.close()
+    assert expensive_requests.stats()['in_flight'] == 0
+
+
+def test_metrics_endpoint_and_headers(app, client):
+    """Test request histograms at /api/metrics and the opt-in timing headers"""
+    app.config['METRICS_HEADERS'] = True
+    response = client.get('/api/students/1')
+    assert int(response.headers['X-Query-Count']) >= 1
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+    
+    app.config['METRICS_HEADERS'] = False
+    assert 'X-Query-Count' not in client.get('/api/students/1').headers
+    
+    response = client.get('/api/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    body = response.get_data(as_text=True)
+    assert '# TYPE http_request_duration_seconds histogram' in body
+    assert 'http_request_duration_seconds_bucket{endpoint="students.get_student",method="GET",status="404",le="+Inf"}' in body
+    assert 'http_request_db_queries_count{endpoint="students.get_student"}' in body
+    assert 'rate_limit_requests_total{class="scan",result="allowed"}' in body
+
+
+def test_slow_query_log_captures_plan_and_caller(app, client):
+    """Test slow statements are logged with normalized SQL, caller and query plan"""
+    from src.utils.slow_queries import slow_query_log
+    slow_query_log.configure(threshold_ms=0)
+    
+    # SQL text and plans are only served to admins who turn the endpoint on
+    assert client.get('/api/metrics/slow-queries').status_code == 404
+    app.config['SLOW_QUERY_ENDPOINT'] = True
+    
+    client.get('/api/students?search=zzz')
+    client.get('/api/students?search=yyy')
+    
+    data = json.loads(client.get('/api/metrics/slow-queries').data)
+    searches = [q for q in data['queries'] if q['caller'] == 'StudentService.search_students']
+    assert len(searches) >= 2
+    assert "'zzz'" not in searches[0]['statement'] and 'zzz' not in str(searches[0]['parameters'])
+    assert searches[0]['endpoint'] == 'students.get_students'
+    assert searches[0]['plan']
+    assert data['stats']['plans_cached'] < data['stats']['recorded']
+    
+    assert client.delete('/api/metrics/slow-queries').status_code == 405
+    slow_query_log.configure(threshold_ms=None)
+
+
+def test_query_timing_leaves_nothing_on_connection_after_errors(app):
+    """Test statements that raise do not leave start times behind on the connection"""
+    from sqlalchemy import text
+    with app.app_context():
+        with db.engine.connect() as conn:
+            for _ in range(5):
+                with pytest.raises(Exception):
+                    conn.execute(text('SELECT * FROM no_such_table'))
+            conn.execute(text('SELECT 1'))
+            assert not [key for key, value in conn.info.items() if isinstance(value, list) and value]
+
+
+def test_slow_query_explain_is_isolated_in_savepoint_on_postgres():
+    """Test a failed PostgreSQL EXPLAIN is rolled back to a savepoint, not left aborting the transaction"""
+    from types import SimpleNamespace
+    from src.utils.slow_queries import SlowQueryLog
+    executed = []
+    
+    class FakeCursor:
+        def execute(self, statement, parameters=None):
+            executed.append(statement)
+            if statement.startswith('EXPLAIN'):
+                raise RuntimeError('cannot explain')
+        
+        def close(self):
+            pass
+    
+    conn = SimpleNamespace(dialect=SimpleNamespace(name='postgresql'))
+    cursor = SimpleNamespace(connection=SimpleNamespace(autocommit=False, cursor=FakeCursor))
+    plan = SlowQueryLog._explain(conn, cursor, 'SELECT 1', (), False)
+    
+    assert plan == ['(plan unavailable: cannot explain)']
+    assert executed == [
+        'SAVEPOINT slow_query_explain',
+        'EXPLAIN SELECT 1',
+        'ROLLBACK TO SAVEPOINT slow_query_explain',
+    ]
+
+
+@contextmanager
+def count_queries():
+    """Count SQL statements executed inside the block"""
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def seed_attendance(prefix, count):
+    """Create students with one attendance record each, plus history for student 1"""
+    for i in range(count):
+        db.session.add(Student(
+            name=f'Student {prefix} {chr(65 + i)}',
+            register_number=f'{prefix}{i:03d}',
+            section='A',
+            department='Computer Science',
+            duration='Year 3'
+        ))
+    db.session.commit()
+    
+    students = Student.query.filter(Student.register_number.like(f'{prefix}%')).all()
+    AttendanceService.record_attendance_batch([{'student_id': s.id} for s in students], 'Dr. Smith')
+    AttendanceService.sync_scans([
+        {'scan_uuid': f'00000000-0000-4000-8000-{prefix}{i:09d}', 'student_id': 1,
+         'scanned_at': f'2024-01-{i + 1:02d}T09:00:00Z'}
+        for i in range(count)
+    ], 'Dr. Smith')
+
+
+@pytest.mark.parametrize('endpoint', [
+    '/api/attendance/recent?limit=500',
+    '/api/attendance/date',
+    '/api/attendance/student/1',
+])
+def test_attendance_lists_use_constant_queries(app, client, endpoint):
+    """Test that attendance list endpoints do not issue a query per row"""
+    seed_attendance('100', 2)
+    with count_queries() as few:
+        response = client.get(endpoint)
+    few_rows = json.loads(response.data)['count']
+    
+    seed_attendance('200', 10)
+    with count_queries() as many:
+        response = client.get(endpoint)
+    data = json.loads(response.data)
+    
+    assert response.status_code == 200
+    assert data['count'] > few_rows
+    assert data['attendance'][0]['student_name']
+    assert len(many) == len(few)
+
+
+def test_attendance_by_date_pagination_api(app, client):
+    """Test GET /api/attendance/date with limit and cursor"""
+    seed_attendance('300', 5)
+    
+    response = client.get('/api/attendance/date?limit=2')
+    first = json.loads(response.data)
+    assert first['count'] == 2
+    assert first['next_cursor']
+    
+    response = client.get(f"/api/attendance/date?limit=10&cursor={first['next_cursor']}")
+    second = json.loads(response.data)
+    assert second['count'] == 3
+    assert second['next_cursor'] is None
+    assert not {r['id'] for r in first['attendance']} & {r['id'] for r in second['attendance']}
+    
+    for cursor in ['bogus', encode_cursor([['x'], 1]), encode_cursor(['yesterday', 1]), encode_cursor(['2024-01-01', True])]:
+        response = client.get(f'/api/attendance/date?cursor={cursor}')
+        assert response.status_code == 400
+        assert json.loads(response.data)['error'] == 'Invalid cursor'
+
+
+def test_section_roster_api(app, client):
+    """Test GET /api/attendance/roster marks present and absent in one query"""
+    for number, section in [('ROS001', 'R'), ('ROS002', 'R'), ('ROS003', 'Q')]:
+        db.session.add(Student(name=f'Roster {number}', register_number=number, section=section,
+                               department='Computer Science', duration='Year 3'))
+    db.session.commit()
+    
+    present = Student.query.filter_by(register_number='ROS001').first()
+    other = Student.query.filter_by(register_number='ROS003').first()
+    AttendanceService.record_attendance(present.id, 'Dr. Smith', subject='Math', date='2024-03-01')
+    AttendanceService.record_attendance(other.id, 'Dr. Smith', subject='Math', date='2024-03-01')
+    
+    db.session.expunge_all()
+    
+    with count_queries() as queries:
+        response = client.get('/api/attendance/roster?section=R&subject=Math&date=2024-03-01')
+    data = json.loads(response.data)
+    
+    assert response.status_code == 200
+    assert 'max-age' in response.headers['Cache-Control']
+    assert len(queries) == 1
+    assert (data['total'], data['present'], data['absent']) == (2, 1, 1)
+    assert [(s['register_number'], s['present']) for s in data['students']] == [('ROS001', True), ('ROS002', False)]
+    assert data['students'][0]['scanned_at']
+    
+    response = client.get('/api/attendance/roster?section=R&subject=Physics&date=2024-03-01')
+    assert json.loads(response.data)['present'] == 0
+    
+    assert client.get('/api/attendance/roster').status_code == 400
+
+
+def test_attendance_stream_api(app, client):
+    """Test GET /api/attendance/stream pushes matching scans once"""
+    from src.services.scan_feed import scan_feed
+    
+    for number in ('SSE001', 'SSE002'):
+        db.session.add(Student(name=f'Stream {number}', register_number=number, section='A',
+                               department='Computer Science', duration='Year 3'))
+    db.session.commit()
+    first, second = Student.query.filter(Student.register_number.like('SSE%')).order_by(Student.id).all()
+    
+    response = client.get('/api/attendance/stream?section=S-01', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    assert next(chunks).startswith(b'retry:')
+    assert scan_feed.stats()['subscribers'] == 1
+    
+    AttendanceService.record_attendance(first.id, 'Dr. Smith', section='S-02')
+    AttendanceService.record_attendance(second.id, 'Dr. Smith', section='S-01')
+    
+    event = next(chunks).decode()
+    assert event.startswith('event: scan\n')
+    payload = json.loads(event.split('data: ', 1)[1])
+    assert payload['register_number'] == 'SSE002'
+    assert payload['section'] == 'S-01'
+    
+    response.close()
+    assert scan_feed.stats()['subscribers'] == 0
+
+
+def test_attendance_export_api(app, client):
+    """Test GET /api/attendance/export in both formats"""
+    seed_attendance('400', 3)
+    
+    response = client.get('/api/attendance/export?from=2024-01-01&to=2024-01-02')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    lines = response.get_data(as_text=True).strip().splitlines()
+    assert lines[0].startswith('id,timestamp,register_number')
+    assert len(lines) == 3
+    
+    response = client.get('/api/attendance/export?format=ndjson&from=2024-01-01&to=2024-01-03')
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(rows) == 3
+    assert rows[0]['register_number'] == '400000'
+    assert rows[0]['timestamp'] < rows[-1]['timestamp']
+    
+    response = client.get('/api/attendance/export?format=xml')
+    assert response.status_code == 400
+
+
+def test_write_behind_does_not_lose_acknowledged_scans(app, client):
+    """Test that 202-acknowledged scans survive a failing writer"""
+    from src.services.attendance_queue import attendance_queue, DeadLetterJournal
+    from src.models import Attendance
+    students = [
+        Student(name=f'Queued {chr(65 + i)}', register_number=f'500{i:03d}', section='A',
+                department='Computer Science', duration='Year 3')
+        for i in range(3)
+    ]
+    db.session.add_all(students)
+    db.session.commit()
+    before = Attendance.query.count()
+    
+    calls = {'count': 0}
+    
+    def flaky_writer(items):
+        # Two transient failures, then one row that never writes
+        calls['count'] += 1
+        if calls['count'] <= 2:
+            raise RuntimeError('database is locked')
+        if any(record['student_id'] == students[2].id for _, record in items):
+            raise RuntimeError('constraint failed')
+        AttendanceService.write_queued(items)
+    
+    attendance_queue.configure(batch_size=10, flush_interval_ms=1000, max_retries=3, retry_backoff_ms=1)
+    attendance_queue.dead_letter = DeadLetterJournal()
+    attendance_queue.start(app, flaky_writer)
+    try:
+        for student in students:
+            response = client.post('/api/attendance/record', data=json.dumps({
+                'student_id': student.id, 'faculty_name': 'Dr. Smith'
+            }), content_type='application/json')
+            assert response.status_code == 202
+    finally:
+        attendance_queue.stop()
+    
+    stats = attendance_queue.stats()
+    assert stats['retries'] >= 2
+    assert stats['dead_lettered'] == 1
+    assert Attendance.query.count() == before + 2
+    assert [record['student_id'] for _, record in attendance_queue.dead_letter.read()] == [students[2].id]
+    
+    assert attendance_queue.replay_dead_letters(AttendanceService.write_queued) == (1, 0)
+    assert Attendance.query.count() == before + 3
+    assert attendance_queue.stats()['dead_letter_pending'] == 0
+
+
+def test_ensure_schema_skips_when_version_matches(app):
+    """Test that create_all only runs when the stored schema version differs"""
+    ensure_schema()
+    assert ensure_schema() is False
+    
+    db.session.get(SchemaVersion, 1).version = 'stale'
+    db.session.commit()
+    assert ensure_schema() is True
+    assert ensure_schema() is False
+
+
+def test_ensure_schema_fails_on_missing_columns(app):
+    """Test that columns create_all cannot add are reported instead of ignored"""
+    from sqlalchemy import text
+    db.session.execute(text('DROP INDEX ix_attendance_scan_uuid'))
+    db.session.execute(text('ALTER TABLE attendance DROP COLUMN scan_uuid'))
+    db.session.get(SchemaVersion, 1).version = 'stale'
+    db.session.commit()
+    
+    with pytest.raises(SchemaMismatchError) as error:
+        ensure_schema()
+    assert 'ALTER TABLE attendance ADD COLUMN scan_uuid VARCHAR(36)' in str(error.value)
+    assert db.session.get(SchemaVersion, 1).version == 'stale'
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
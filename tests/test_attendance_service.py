@@ -0,0 +1,546 @@
+"""
+Test Attendance Service
+Sample test cases for attendance recording
+"""
+import pytest
+import sys
+import os
+from datetime import date, datetime, timedelta
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app import create_app
+from src.models import db, Student, Attendance, ArchivedAttendance, DailyAttendanceRollup
+from src.services.attendance_service import AttendanceService
+from src.services.scan_index import scan_index
+from src.services.attendance_queue import AttendanceWriteQueue, DeadLetterJournal, QueueFullError
+from src.services.rollup_service import RollupService
+from src.services.counter_service import CounterService
+from src.services.scan_feed import ScanFeedHub
+from src.services.student_service import StudentService
+from src.services.archive_service import ArchiveService, archived_ranges
+
+
+@pytest.fixture
+def app():
+    """Create test app"""
+    app = create_app()
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def create_students(count, section='A'):
+    """Create students with NFC tags AA:00, AA:01, ..."""
+    students = []
+    for i in range(count):
+        student = Student(
+            name=f'Student {chr(65 + i)}',
+            register_number=f'ATT{i:03d}',
+            section=section,
+            department='Computer Science',
+            duration='Year 3',
+            nfc_tag_id=f'AA:{i:02X}'
+        )
+        db.session.add(student)
+        students.append(student)
+    db.session.commit()
+    return students
+
+
+def test_record_attendance_batch(app):
+    """Test recording many scans in one batch"""
+    with app.app_context():
+        create_students(3)
+        
+        scans = [{'nfc_tag_id': 'AA:00'}, {'nfc_tag_id': 'AA:01'}, {'nfc_tag_id': 'AA:02'}]
+        results = AttendanceService.record_attendance_batch(scans, 'Dr. Smith', section='A', subject='Maths')
+        
+        assert [r['success'] for r in results] == [True, True, True]
+        assert results[0]['attendance']['register_number'] == 'ATT000'
+        assert Attendance.query.count() == 3
+
+
+def test_record_attendance_batch_reports_per_scan_errors(app):
+    """Test that unknown tags and duplicates fail without aborting the batch"""
+    with app.app_context():
+        create_students(2)
+        AttendanceService.record_attendance_batch([{'nfc_tag_id': 'AA:00'}], 'Dr. Smith')
+        
+        scans = [
+            {'nfc_tag_id': 'AA:00'},  # Already recorded
+            {'nfc_tag_id': 'FF:FF'},  # Unknown tag
+            {'nfc_tag_id': 'AA:01'},
+            {'nfc_tag_id': 'AA:01'},  # Duplicate inside the batch
+            {}
+        ]
+        results = AttendanceService.record_attendance_batch(scans, 'Dr. Smith')
+        
+        assert [r['success'] for r in results] == [False, False, True, False, False]
+        assert 'already recorded' in results[0]['error']
+        assert results[1]['error'] == 'No student found with this NFC tag'
+        assert Attendance.query.count() == 2
+
+
+def test_record_attendance_batch_coerces_student_ids(app):
+    """Test that JSON string IDs resolve and malformed IDs fail per scan"""
+    with app.app_context():
+        students = create_students(2)
+        scans = [
+            {'student_id': str(students[0].id)},
+            {'student_id': [students[1].id]},
+            {'student_id': 'abc'},
+            {'student_id': float(students[1].id)}
+        ]
+        
+        results = AttendanceService.record_attendance_batch(scans, 'Dr. Smith')
+        
+        assert [r['success'] for r in results] == [True, False, False, True]
+        assert results[1]['error'] == results[2]['error'] == 'student_id must be an integer'
+        assert results[0]['attendance']['student_name'] == 'Student A'
+
+
+def test_duplicate_window_uses_recent_scan_index(app):
+    """Test that a repeat scan is rejected from the in-memory index"""
+    with app.app_context():
+        student = create_students(1)[0]
+        
+        success1, _ = AttendanceService.record_attendance(student.id, 'Dr. Smith')
+        assert success1 is True
+        assert scan_index.last_scan(student.id) is not None
+        
+        success2, result2 = AttendanceService.record_attendance(student.id, 'Dr. Smith')
+        assert success2 is False
+        assert 'already recorded' in result2
+
+
+def test_duplicate_window_falls_back_to_database(app):
+    """Test that a non-authoritative index confirms misses in the database"""
+    # Several workers may share the database unless a deployment opts in
+    assert app.config['SCAN_INDEX_AUTHORITATIVE'] is False
+    with app.app_context():
+        student = create_students(1)[0]
+        AttendanceService.record_attendance(student.id, 'Dr. Smith')
+        
+        # Simulate a scan written by another process
+        scan_index.clear()
+        authoritative = scan_index.authoritative
+        scan_index.authoritative = False
+        try:
+            success, result = AttendanceService.record_attendance(student.id, 'Dr. Smith')
+        finally:
+            scan_index.authoritative = authoritative
+        
+        assert success is False
+        assert 'already recorded' in result
+        assert scan_index.last_scan(student.id) is not None
+
+
+def test_sync_scans_is_idempotent_and_keeps_device_time(app):
+    """Test that retried journal uploads are deduplicated on scan_uuid"""
+    with app.app_context():
+        create_students(2)
+        scans = [
+            {'scan_uuid': '3f2b8c1e-0000-4000-8000-000000000001', 'nfc_tag_id': 'AA:00',
+             'scanned_at': '2024-01-15T09:05:00Z'},
+            {'scan_uuid': '3f2b8c1e-0000-4000-8000-000000000002', 'nfc_tag_id': 'AA:01',
+             'scanned_at': '2024-01-15T09:06:00+05:30'},
+        ]
+        
+        first = AttendanceService.sync_scans(scans, 'Dr. Smith', section='A')
+        second = AttendanceService.sync_scans(scans, 'Dr. Smith', section='A')
+        
+        assert [r['status'] for r in first] == ['recorded', 'recorded']
+        assert [r['status'] for r in second] == ['duplicate', 'duplicate']
+        assert Attendance.query.count() == 2
+        
+        record = Attendance.query.filter_by(scan_uuid=scans[1]['scan_uuid']).first()
+        assert record.timestamp == datetime(2024, 1, 15, 3, 36)
+
+
+def test_sync_scans_applies_window_around_device_time(app):
+    """Test that two offline scans of a student in one class are deduplicated"""
+    with app.app_context():
+        create_students(1)
+        scans = [
+            {'scan_uuid': '3f2b8c1e-0000-4000-8000-000000000003', 'nfc_tag_id': 'AA:00',
+             'scanned_at': '2024-01-15T09:05:00Z'},
+            {'scan_uuid': '3f2b8c1e-0000-4000-8000-000000000004', 'nfc_tag_id': 'AA:00',
+             'scanned_at': '2024-01-15T09:25:00Z'},
+            {'scan_uuid': 'not-a-uuid', 'nfc_tag_id': 'AA:00', 'scanned_at': '2024-01-15T11:00:00Z'},
+        ]
+        
+        results = AttendanceService.sync_scans(scans, 'Dr. Smith')
+        
+        assert [r['status'] for r in results] == ['recorded', 'rejected', 'rejected']
+        assert 'already recorded' in results[1]['error']
+
+
+def test_sync_scans_claims_recent_scan_index(app):
+    """Test that a journal replay and a live scan cannot both record a student"""
+    with app.app_context():
+        students = create_students(2)
+        scanned_at = (datetime.utcnow() - timedelta(minutes=5)).isoformat() + 'Z'
+        
+        # A live /record that has claimed the window but not committed yet
+        assert scan_index.claim(students[0].id, datetime.utcnow()) is None
+        results = AttendanceService.sync_scans([
+            {'scan_uuid': '3f2b8c1e-0000-4000-8000-000000000501', 'nfc_tag_id': 'AA:00', 'scanned_at': scanned_at}
+        ], 'Dr. Smith')
+        assert results[0]['status'] == 'rejected'
+        
+        # The replay's claim in turn blocks the live scan
+        results = AttendanceService.sync_scans([
+            {'scan_uuid': '3f2b8c1e-0000-4000-8000-000000000502', 'nfc_tag_id': 'AA:01', 'scanned_at': scanned_at}
+        ], 'Dr. Smith')
+        assert results[0]['status'] == 'recorded'
+        success, message = AttendanceService.record_attendance(students[1].id, 'Dr. Smith')
+        assert not success and 'already recorded' in message
+
+
+def test_to_dict_loads_student_columns_when_not_selected(app):
+    """Test that records loaded without _with_student still serialize the student"""
+    with app.app_context():
+        students = create_students(1)
+        success, attendance = AttendanceService.record_attendance(students[0].id, 'Dr. Smith')
+        attendance_id = attendance.id
+        db.session.expunge_all()
+        
+        record = db.session.get(Attendance, attendance_id).to_dict()
+        assert record['student_name'] == 'Student A'
+        assert record['register_number'] == 'ATT000'
+
+
+def test_write_behind_queue_group_commits(app):
+    """Test that queued scans are written together and flushed on stop"""
+    with app.app_context():
+        students = create_students(3)
+        queue = AttendanceWriteQueue(maxsize=10, batch_size=10, flush_interval_ms=1000)
+        queue.start(app, AttendanceService.write_queued)
+        
+        for student in students:
+            queue.submit((datetime.utcnow(), {
+                'student_id': student.id,
+                'recorded_by': 'Dr. Smith',
+                'section': 'A',
+                'subject': 'Maths',
+                'date': None,
+                'class_time': None
+            }))
+        queue.stop()
+        
+        assert Attendance.query.count() == 3
+        stats = queue.stats()
+        assert stats['written'] == 3
+        assert stats['batches'] == 1
+
+
+def test_write_behind_queue_rejects_when_full(app):
+    """Test backpressure when the queue is at capacity"""
+    queue = AttendanceWriteQueue(maxsize=1)
+    queue.submit((datetime.utcnow(), {}))
+    
+    with pytest.raises(QueueFullError):
+        queue.submit((datetime.utcnow(), {}))
+    assert queue.stats()['rejected'] == 1
+
+
+def test_write_behind_queue_stop_never_writes_beside_the_writer():
+    """Test that stop leaves a busy writer to drain instead of flushing alongside it"""
+    import threading
+    import time
+    from flask import Flask
+    release = threading.Event()
+    calls = []
+    
+    def writer(items):
+        calls.append((threading.current_thread().name, len(items)))
+        release.wait(5)
+    
+    queue = AttendanceWriteQueue(batch_size=1, flush_interval_ms=1)
+    queue.start(Flask(__name__), writer)
+    for n in range(3):
+        queue.submit((datetime.utcnow(), {'student_id': n}))
+    while not calls:
+        time.sleep(0.01)
+    
+    queue.stop(timeout=0.05)
+    assert queue.enabled
+    release.set()
+    queue._thread.join(5)
+    assert [name for name, _ in calls] == ['attendance-writer'] * 3
+    
+    queue.stop()
+    assert not queue.enabled
+
+
+def test_dead_letter_journal_counts_without_rereading(tmp_path):
+    """Test the journal length is kept up to date and survives a restart"""
+    path = str(tmp_path / 'dead.jsonl')
+    journal = DeadLetterJournal(path)
+    journal.append([(datetime(2024, 1, 1), {'student_id': 1}), (datetime(2024, 1, 1), {'student_id': 2})])
+    assert len(journal) == 2
+    assert len(DeadLetterJournal(path)) == 2
+    
+    journal.replace(journal.read()[1:])
+    assert len(journal) == 1
+    journal.replace([])
+    assert len(journal) == 0
+
+
+def rollup_rows():
+    """Snapshot of all rollup rows"""
+    return sorted(
+        (r.date, r.section, r.subject, r.scans, r.unique_students)
+        for r in DailyAttendanceRollup.query.all()
+    )
+
+
+def test_daily_rollups_maintained_on_insert(app):
+    """Test that stats come from rollups that match a full rebuild"""
+    with app.app_context():
+        create_students(3)
+        AttendanceService.record_attendance_batch(
+            [{'nfc_tag_id': 'AA:00'}, {'nfc_tag_id': 'AA:01'}], 'Dr. Smith', section='A', subject='Maths'
+        )
+        AttendanceService.sync_scans([
+            {'scan_uuid': '3f2b8c1e-0000-4000-8000-000000000005', 'nfc_tag_id': 'AA:00',
+             'scanned_at': '2024-01-15T09:05:00Z', 'subject': 'Physics'},
+            {'scan_uuid': '3f2b8c1e-0000-4000-8000-000000000006', 'nfc_tag_id': 'AA:00',
+             'scanned_at': '2024-01-15T11:05:00Z', 'subject': 'Maths'},
+        ], 'Dr. Smith', section='A')
+        
+        stats = AttendanceService.get_attendance_stats()
+        assert stats['total_attendance_records'] == 4
+        assert stats['today_attendance_count'] == 2
+        assert stats['today_unique_students'] == 2
+        
+        day = AttendanceService.get_daily_summary(start=datetime(2024, 1, 15).date(), end=datetime(2024, 1, 15).date())
+        assert day == [{'date': '2024-01-15', 'section': '*', 'subject': '*', 'scans': 2, 'unique_students': 1}]
+        
+        incremental = rollup_rows()
+        RollupService.rebuild()
+        assert rollup_rows() == incremental
+
+
+def test_daily_rollups_updated_on_student_delete(app):
+    """Test that deleting a student removes their scans from the rollups"""
+    with app.app_context():
+        students = create_students(2)
+        AttendanceService.record_attendance_batch(
+            [{'nfc_tag_id': 'AA:00'}, {'nfc_tag_id': 'AA:01'}], 'Dr. Smith', section='A', subject='Maths'
+        )
+        
+        StudentService.delete_student(students[0].id)
+        
+        stats = AttendanceService.get_attendance_stats()
+        assert stats['total_attendance_records'] == 1
+        assert stats['today_unique_students'] == 1
+        incremental = rollup_rows()
+        RollupService.rebuild()
+        assert rollup_rows() == incremental
+
+
+def test_attendance_counters_track_sessions_and_percentages(app):
+    """Test per-student counters and sessions held, matching a full rebuild"""
+    with app.app_context():
+        students = create_students(2)
+        
+        def scan(n, tag, day, hour, subject='Maths'):
+            return {'scan_uuid': f'3f2b8c1e-0000-4000-8000-0000000001{n:02d}', 'nfc_tag_id': tag,
+                    'scanned_at': f'2024-02-0{day}T{hour:02d}:00:00Z', 'date': f'2024-02-0{day}',
+                    'subject': subject}
+        
+        AttendanceService.sync_scans([
+            scan(1, 'AA:00', 1, 9), scan(2, 'AA:01', 1, 9),
+            scan(3, 'AA:00', 1, 11),  # same session again, outside the duplicate window
+            scan(4, 'AA:00', 2, 9), scan(5, 'AA:00', 2, 10, subject='Physics'),
+        ], 'Dr. Smith', section='S-01', class_time='09:00-09:50')
+        
+        summary = CounterService.get_student_summary(students[0].id)
+        maths = [row for row in summary['subjects'] if row['subject'] == 'Maths'][0]
+        assert (maths['attended'], maths['sessions'], maths['percentage']) == (2, 2, 100.0)
+        assert summary['overall'] == {'attended': 3, 'sessions': 3, 'percentage': 100.0}
+        
+        section = CounterService.get_section_summary('S-01', 'Maths')
+        assert [(row['register_number'], row['percentage']) for row in section] == [('ATT000', 100.0), ('ATT001', 50.0)]
+        
+        def counter_rows():
+            return CounterService.get_section_summary('S-01')
+        
+        incremental = counter_rows()
+        CounterService.rebuild()
+        assert counter_rows() == incremental
+
+
+def test_attendance_counters_probe_stored_sessions_with_exists(app):
+    """Test later scans of a stored session are counted once, probing with EXISTS only"""
+    from sqlalchemy import event
+    with app.app_context():
+        students = create_students(2)
+        
+        def sync(n, tag, hour, date='2024-03-04'):
+            scan = {'scan_uuid': f'3f2b8c1e-0000-4000-8000-0000000002{n:02d}', 'nfc_tag_id': tag,
+                    'scanned_at': f'2024-03-04T{hour:02d}:00:00Z', 'date': date, 'subject': 'Maths'}
+            return AttendanceService.sync_scans([scan], 'Dr. Smith', section='S-02', class_time='09:00-09:50')
+        
+        sync(1, 'AA:00', 9)
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            sync(2, 'AA:00', 11, date=None)  # same session, class date taken from the scan time
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        sync(3, 'AA:01', 12)
+        
+        probes = [s for s in statements if 'attendance.class_time = ' in s]
+        assert probes and all('EXISTS' in s for s in probes)
+        
+        summary = CounterService.get_section_summary('S-02', 'Maths')
+        assert [(row['attended'], row['sessions']) for row in summary] == [(1, 1), (1, 1)]
+        incremental = CounterService.get_section_summary('S-02')
+        CounterService.rebuild()
+        assert CounterService.get_section_summary('S-02') == incremental
+
+
+def test_archive_semester_is_resumable_and_routed_transparently(app, monkeypatch):
+    """Test chunked archival of a closed semester and reads across both tables"""
+    monkeypatch.setattr(archived_ranges, 'ttl', 0)
+    with app.app_context():
+        students = create_students(2)
+        old_scans = [
+            {'scan_uuid': f'3f2b8c1e-0000-4000-8000-0000000002{n:02d}', 'nfc_tag_id': tag,
+             'scanned_at': f'2024-01-1{n}T09:00:00Z'}
+            for n, tag in [(0, 'AA:00'), (1, 'AA:00'), (2, 'AA:01')]
+        ]
+        AttendanceService.sync_scans(old_scans, 'Dr. Smith', section='S-01')
+        AttendanceService.record_attendance(students[0].id, 'Dr. Smith', section='S-01')
+        totals = AttendanceService.get_attendance_stats()['total_attendance_records']
+        
+        assert ArchiveService.create_semester('2024-even', '2024-01-01', '2024-05-31')[0]
+        assert not ArchiveService.create_semester('overlap', '2024-05-01', '2024-06-30')[0]
+        
+        # Interrupted after one chunk: records are split across both tables
+        success, result = ArchiveService.archive_semester('2024-even', chunk_size=2, max_chunks=1)
+        assert success and result['status'] == 'archiving' and result['moved'] == 2
+        assert len(AttendanceService.get_attendance_by_student(students[0].id)) == 3
+        
+        success, result = ArchiveService.archive_semester('2024-even', chunk_size=2)
+        assert success and result['status'] == 'archived' and result['archived_rows'] == 3
+        assert Attendance.query.count() == 1
+        assert ArchivedAttendance.query.count() == 3
+        
+        history = AttendanceService.get_attendance_by_student(students[0].id)
+        assert [r.timestamp.date() for r in history] == [
+            datetime.utcnow().date(), date(2024, 1, 11), date(2024, 1, 10)
+        ]
+        assert history[1].to_dict()['student_name'] == 'Student A'
+        assert [r.student_id for r in AttendanceService.get_recent_attendance(limit=1)] == [students[0].id]
+        assert len(AttendanceService.get_attendance_by_date(date(2024, 1, 12))) == 1
+        assert [row['present'] for row in AttendanceService.get_section_roster('A', date(2024, 1, 10))] == [True, False]
+        assert len(list(AttendanceService.iter_export_rows())) == 4
+        
+        # Journals re-sent after archival are still recognised
+        assert [r['status'] for r in AttendanceService.sync_scans(old_scans, 'Dr. Smith')] == ['duplicate'] * 3
+        
+        RollupService.rebuild()
+        assert AttendanceService.get_attendance_stats()['total_attendance_records'] == totals
+        
+        StudentService.delete_student(students[0].id)
+        assert ArchivedAttendance.query.count() == 1
+
+
+def test_date_page_merges_half_archived_day_in_order(app, monkeypatch):
+    """Test that a day split across both tables pages in (timestamp, id) order"""
+    monkeypatch.setattr(archived_ranges, 'ttl', 0)
+    with app.app_context():
+        create_students(3)
+        # Synced one at a time so the 09:00 scan gets the lowest id
+        for n, (tag, hour) in enumerate([('AA:00', '09'), ('AA:01', '08'), ('AA:02', '10')]):
+            AttendanceService.sync_scans([
+                {'scan_uuid': f'3f2b8c1e-0000-4000-8000-0000000003{n:02d}', 'nfc_tag_id': tag,
+                 'scanned_at': f'2024-02-05T{hour}:00:00Z'}
+            ], 'Dr. Smith')
+        ArchiveService.create_semester('2024-even', '2024-01-01', '2024-05-31')
+        ArchiveService.archive_semester('2024-even', chunk_size=1, max_chunks=1)
+        
+        day = date(2024, 2, 5)
+        records, cursor = AttendanceService.get_attendance_by_date_page(day, limit=2)
+        assert [r.timestamp.hour for r in records] == [10, 9]
+        records, cursor = AttendanceService.get_attendance_by_date_page(day, cursor=cursor, limit=2)
+        assert [r.timestamp.hour for r in records] == [8]
+        assert cursor is None
+
+
+def test_daily_rollups_count_late_sync_into_archived_day_once(app, monkeypatch):
+    """Test a scan synced into an archived day finds the student's archived scans"""
+    monkeypatch.setattr(archived_ranges, 'ttl', 0)
+    with app.app_context():
+        create_students(1)
+        
+        def sync(n, hour):
+            AttendanceService.sync_scans([{'scan_uuid': f'3f2b8c1e-0000-4000-8000-0000000005{n:02d}',
+                                           'nfc_tag_id': 'AA:00', 'scanned_at': f'2024-02-05T{hour}:00:00Z'}],
+                                         'Dr. Smith', section='S-01')
+        
+        sync(0, '09')
+        ArchiveService.create_semester('2024-even', '2024-01-01', '2024-05-31')
+        ArchiveService.archive_semester('2024-even')
+        sync(1, '14')
+        
+        day = [row for row in rollup_rows() if row[0] == date(2024, 2, 5)]
+        assert [row[3:] for row in day] == [(2, 1), (2, 1)]
+        incremental = rollup_rows()
+        RollupService.rebuild()
+        assert rollup_rows() == incremental
+
+
+def test_archive_job_waits_out_range_cache_ttl(app, monkeypatch):
+    """Test that no row moves before other processes' range caches expire"""
+    import src.services.archive_service as archive_module
+    slept = []
+    monkeypatch.setattr(archive_module.time, 'sleep', slept.append)
+    with app.app_context():
+        create_students(1)
+        AttendanceService.sync_scans([{'scan_uuid': '3f2b8c1e-0000-4000-8000-000000000400',
+                                       'nfc_tag_id': 'AA:00', 'scanned_at': '2024-02-05T09:00:00Z'}], 'Dr. Smith')
+        ArchiveService.create_semester('2024-even', '2024-01-01', '2024-05-31')
+        
+        ArchiveService.archive_semester('2024-even', max_chunks=0)
+        assert len(slept) == 1 and 59 < slept[0] <= archived_ranges.ttl
+        
+        # A resumed job only waits for what is left of the TTL
+        semester = ArchiveService.get_semesters()[0]
+        semester.archiving_started_at -= timedelta(seconds=archived_ranges.ttl)
+        db.session.commit()
+        success, result = ArchiveService.archive_semester('2024-even')
+        assert success and result['status'] == 'archived'
+        assert len(slept) == 1
+
+
+def test_scan_feed_drops_oldest_for_slow_clients():
+    """Test that a full client buffer evicts old events instead of blocking"""
+    hub = ScanFeedHub(buffer_size=2)
+    slow = hub.subscribe()
+    maths = hub.subscribe(subject='Maths')
+    
+    hub.publish([{'id': i, 'subject': 'Maths' if i % 2 else 'Physics'} for i in range(5)])
+    
+    assert [slow.get(timeout=0)['id'], slow.get(timeout=0)['id']] == [3, 4]
+    assert slow.take_dropped() == 3
+    assert [maths.get(timeout=0)['id'], maths.get(timeout=0)['id']] == [1, 3]
+    assert maths.take_dropped() == 0
+    
+    hub.unsubscribe(slow)
+    assert hub.stats()['subscribers'] == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,84 @@
+"""
+Test NFC Service
+Sample test cases for NFC tag resolution and the tag cache
+"""
+import pytest
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.app import create_app
+from src.models import db, Student
+from src.services.nfc_service import NFCService, tag_cache
+from src.services.student_service import StudentService
+
+
+@pytest.fixture
+def app():
+    """Create test app"""
+    app = create_app()
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def student(app):
+    """Create a student with an NFC tag"""
+    student = Student(
+        name='Alice Johnson',
+        register_number='NFC001',
+        section='A',
+        department='Computer Science',
+        duration='Year 3',
+        nfc_tag_id='04:A1:B2'
+    )
+    db.session.add(student)
+    db.session.commit()
+    return student
+
+
+def test_resolve_tag_uses_cache(app, student):
+    """Test that repeat tag lookups are served from the cache"""
+    with app.app_context():
+        first = NFCService.resolve_tag('04:A1:B2')
+        second = NFCService.resolve_tag('04:A1:B2')
+        
+        assert first == second
+        assert first.register_number == 'NFC001'
+        stats = NFCService.get_cache_stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+
+
+def test_unregister_invalidates_cache(app, student):
+    """Test that unregistering a tag removes it from the cache"""
+    with app.app_context():
+        assert NFCService.is_tag_registered('04:A1:B2')
+        
+        success, _ = NFCService.unregister_tag(student.id)
+        
+        assert success is True
+        assert NFCService.is_tag_registered('04:A1:B2') is False
+
+
+def test_delete_student_invalidates_cache(app, student):
+    """Test that deleting a student removes their tag from the cache"""
+    with app.app_context():
+        NFCService.resolve_tag('04:A1:B2')
+        
+        StudentService.delete_student(student.id)
+        
+        assert tag_cache.get('04:A1:B2') is None
+        assert NFCService.resolve_tag('04:A1:B2') is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -12,6 +12,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from src.app import create_app
 from src.models import db, Student
 from src.services.student_service import StudentService
+from src.utils.pagination import InvalidCursorError
 
 
 @pytest.fixture
@@ -113,6 +114,33 @@ def test_search_students(app):
         assert len(results) == 1
 
 
+def test_search_index_tracks_changes(app):
+    """Test ranked indexed search follows inserts, updates and deletes"""
+    from src.services.search_index import search_index
+    
+    with app.app_context():
+        assert search_index.backend == 'fts5'
+        for name, number in [('Maria Lopez', 'IDX001'), ('Mario Rossi', 'IDX002'), ('Amaria Khan', 'IDX003')]:
+            StudentService.create_student({
+                'name': name, 'register_number': number, 'section': 'A',
+                'department': 'Computer Science', 'duration': 'Year 3'
+            })
+        
+        assert {s.name for s in StudentService.search_students('mari')} == {'Maria Lopez', 'Mario Rossi', 'Amaria Khan'}
+        assert len(StudentService.search_students('mari', limit=2)) == 2
+        assert [s.name for s in StudentService.search_students('x002')] == ['Mario Rossi']
+        assert StudentService.search_students('IDX', filters={'section': 'B'}) == []
+        
+        student = Student.query.filter_by(register_number='IDX002').first()
+        student.name = 'Marco Rossi'
+        db.session.commit()
+        assert 'Marco Rossi' not in {s.name for s in StudentService.search_students('mari')}
+        assert [s.name for s in StudentService.search_students('marco')] == ['Marco Rossi']
+        
+        StudentService.delete_student(student.id)
+        assert StudentService.search_students('rossi') == []
+
+
 def test_filter_students_by_section(app):
     """Test filtering students by section"""
     with app.app_context():
@@ -134,5 +162,61 @@ def test_filter_students_by_section(app):
         assert all(s.section == 'A' for s in students)
 
 
+def test_students_keyset_pagination(app):
+    """Test paging through students with a cursor"""
+    with app.app_context():
+        for letter in 'EDCBA':
+            StudentService.create_student({
+                'name': f'Student {letter}',
+                'register_number': f'PAGE{letter}',
+                'section': 'A',
+                'department': 'Computer Science',
+                'duration': 'Year 3'
+            })
+        
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = StudentService.get_students_page(cursor=cursor, limit=2)
+            assert len(page) <= 2
+            seen.extend(s.register_number for s in page)
+            if not cursor:
+                break
+        
+        assert seen == ['PAGEA', 'PAGEB', 'PAGEC', 'PAGED', 'PAGEE']
+        
+        with pytest.raises(InvalidCursorError):
+            StudentService.get_students_page(cursor='not-a-cursor')
+
+
+def test_bulk_create_students(app):
+    """Test set-based bulk import reports per-row failures"""
+    with app.app_context():
+        StudentService.create_student({
+            'name': 'Existing Student',
+            'register_number': 'BULK000',
+            'section': 'A',
+            'department': 'Computer Science',
+            'duration': 'Year 3'
+        })
+        
+        rows = [
+            {'name': f'Bulk Student {chr(65 + i)}', 'register_number': f'BULK{i:03d}',
+             'section': 'A', 'department': 'Computer Science', 'duration': 'Year 3'}
+            for i in range(7)
+        ]
+        rows.append(dict(rows[1]))  # duplicate within the file
+        rows.append({'name': 'No Number', 'register_number': '', 'section': 'A',
+                     'department': 'Computer Science', 'duration': 'Year 3'})
+        
+        success_count, failed_count, errors = StudentService.bulk_create_students(rows, chunk_size=2)
+        
+        assert success_count == 6
+        assert failed_count == 3
+        assert [e['row'] for e in errors] == [2, 9, 10]
+        assert 'already exists' in errors[0]['error']
+        assert Student.query.filter(Student.register_number.like('BULK%')).count() == 7
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])